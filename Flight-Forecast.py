@@ -23,10 +23,11 @@ This leads us to our goal. In this project, we’ve sourced a [Flight Status dat
 
 # Approach, Part I - Setup
 
-The first step is the easiest - installing and importing all the necessary dependencies and packages. Since the Flight Status dataset is so large, we read it in (as `df`) from our Google Drive.
+The first step is the easiest - installing and importing all the necessary dependencies and packages. Since the Flight Status dataset is so large, we read it in (as `df`) from our Google Drive in chunks with a compact column schema and joined with the airline info. The first run converts the merged data into a Parquet dataset with one file per month, sorted by origin state (`flight_forecast.store.convert_to_parquet`); every later run loads only the columns, months and states it needs from there, which takes seconds instead of minutes. Null rows are dropped and the 1.5 million row sample is drawn while loading, so we never hold the whole dataset in memory. As before, the sample (and the EDA and outlier bounds below) covers all US flights; the Pennsylvania filter comes after the outlier removal.
+
+Outside Colab the files are read from `FLIGHT_FORECAST_DATA_DIR` instead of Google Drive, and the same stages run from the command line without the notebook: `python -m flight_forecast ingest`, `train --model rf|lr|nn|hgb`, `predict` and `report` (see `flight_forecast/cli.py`).
 """
 
-!pip install pandasql
 !pip install scikit-plot
 
 # Import necessary packages
@@ -35,10 +36,9 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
-import pandasql as ps
 import plotly.express as px
 import plotly.graph_objects as go
-import gc
+import os
 
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
@@ -49,26 +49,51 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import GridSearchCV
-
-# Mount drive
-from google.colab import drive
-drive.mount('/content/drive')
+from flight_forecast.search import HalvingForestSearch
+
+from flight_forecast.store import convert_to_parquet, load_parquet
+from flight_forecast.outliers import OutlierFilter
+from flight_forecast.slicing import FlightIndex
+from flight_forecast.encoding import CategoricalEncoder, encode_bools
+from flight_forecast.correlation import CorrelationAccumulator
+from flight_forecast.profiling import Profiler
+from flight_forecast.cache import StageCache
+
+# Every step below runs inside profiler.stage(...), which records its wall and CPU time, peak memory
+# and the rows/bytes in and out, and runs gc.collect() when the step is done
+profiler = Profiler(verbose = True)
+
+# On Colab, mount the shared drive; anywhere else the files are read from and written to
+# $FLIGHT_FORECAST_DATA_DIR (default: the current directory), like `python -m flight_forecast`
+try:
+    from google.colab import drive
+    drive.mount('/content/drive')
+    data_dir = '/content/drive/Shareddrives/CIS 5450 Project (VPN)'
+except ImportError:
+    data_dir = os.environ.get('FLIGHT_FORECAST_DATA_DIR', '.')
 
 # Read the csv file for 2022 flight data and airline info, save into to dataframes called "df_2022" and "df_url_airlines"
-df_url_2022 = '/content/drive/Shareddrives/CIS 5450 Project (VPN)/Combined_Flights_2022.csv'
-df_url_airlines = '/content/drive/Shareddrives/CIS 5450 Project (VPN)/Airlines.csv'
-
-# We join with additional data about airlines
-df_2022 = pd.read_csv(df_url_2022)
-gc.collect()
-df_airlines = pd.read_csv(df_url_airlines)
-gc.collect()
-df_airlines.rename(columns={'Description': 'Airline'}, inplace = True)
-
-# Merge into singular dataframe df
-df = pd.merge(df_2022, df_airlines, on = 'Airline', how = 'inner')
-gc.collect()
+df_url_2022 = os.path.join(data_dir, 'Combined_Flights_2022.csv')
+df_url_airlines = os.path.join(data_dir, 'Airlines.csv')
+df_parquet_2022 = os.path.join(data_dir, 'Combined_Flights_2022_parquet')
+
+# Results of the loading, cleaning, encoding and feature steps are cached on disk, keyed by a hash of
+# their inputs and parameters, so changing a later cell doesn't redo them; the least recently used
+# results are deleted once the cache takes more than 20 GB
+stage_cache = StageCache(os.path.join(data_dir, 'stage_cache'), max_bytes = 20 * 2**30)
+
+# One-time conversion: read the flights in chunks, join with additional data about airlines
+# and save the merged data as one Parquet file per month, sorted by origin state
+if not os.path.exists(df_parquet_2022):
+    with profiler.stage('convert_parquet'):
+        convert_to_parquet(df_url_2022, df_url_airlines, df_parquet_2022)
+
+# Load the merged data, dropping rows with nulls, and keep a random sample of (up to) 1,500,000 of
+# the remaining flights, drawn while the data is read
+with profiler.stage('load_sample') as stage:
+    df = stage_cache.call('load_sample', load_parquet, df_parquet_2022, dropna = True,
+                          sample_size = 1500000, random_state = 42)
+    stage.output(df)
 
 """# Approach, Part II - Data Cleaning & Feature Engineering
 
@@ -85,18 +110,11 @@ df.info()
 
 """# Approach, Part II - Exploratory Data Analysis
 
-We want to create an accurate analysis and summary our dataset. We'll start out by dropping any null rows in the dataset, shuffling, then taking the first 1.5 million rows, then visualizing the different columns as histograms to observe the distribution of data values for each attribute.
+We want to create an accurate analysis and summary our dataset. Null rows were dropped and a random sample of 1.5 million rows was taken while loading; next we visualize the different columns as histograms to observe the distribution of data values for each attribute.
 
-Note that due to the shuffling, re-running the notebook provides different results than what is in the slides
+The sample is drawn while loading (`sample_size` above) with a fixed seed, so re-running the notebook gives the same rows every time. Note that this is a different sample than the one behind the results in the slides. Pass `stratify = 'Month'` (or `'Airline'`) to `load_parquet` to keep each month's (or carrier's) share of the data in the sample.
 """
 
-# Drop null rows
-df.dropna(inplace = True)
-
-# Shuffle and take the first 1,500,000 rows
-df = df.sample(frac=1).head(1500000).reset_index(drop=True)
-gc.collect()
-
 """### Histogram of Numerical Columns
 
 Created histogram plots of every feature containing numerical data (20 plots)
@@ -110,29 +128,17 @@ Findings:
 
 """
 
-# Select numerical columns to plot
-numerical_cols = df.select_dtypes(include=['int64', 'float64']).columns
-
-# Calculate the number of rows needed for three columns
-n_rows = (len(numerical_cols) + 2) // 3
+from flight_forecast import plotting
 
-# Create a figure with multiple subplots
-fig, axes = plt.subplots(nrows=n_rows, ncols=3, figsize=(15, n_rows * 2))
-fig.tight_layout(pad=5.0)  # Adjust padding
+# Select numerical columns to plot
+numerical_cols = df.select_dtypes(include='number').columns
 
 # Generate a list of random colors
 colors = np.random.choice(list(mcolors.CSS4_COLORS.values()), len(numerical_cols), replace=False)
 
-# Flatten the axes array and plot each column with a random color
-for ax, col, color in zip(axes.flat, numerical_cols, colors):
-    df[col].hist(bins=20, ax=ax, color=color)
-    ax.set_title(f'Histogram of {col}')
-    ax.set_xlabel(col)
-    ax.set_ylabel('Frequency')
-
-# Hide any unused axes if the number of numerical columns isn't a multiple of three
-for i in range(len(numerical_cols), n_rows * 3):
-    fig.delaxes(axes.flatten()[i])
+# One histogram per column in a grid of three columns; the counts are computed with NumPy
+# and only the 20 bins per column are drawn
+plotting.plot_histograms(df, numerical_cols, bins=20, ncols=3, colors=colors)
 
 # Show the plot
 plt.show()
@@ -149,15 +155,13 @@ Findings:
 
 """
 
-# Define the subset of the DataFrame to be plotted
-subset_df = df[['DepDelay', 'ArrDelay', 'AirTime', 'Distance']]
-
-# Create the scatter matrix (pair plot) using Plotly Express
-fig = px.scatter_matrix(subset_df,
-                        dimensions=['DepDelay', 'ArrDelay', 'AirTime', 'Distance'],
-                        title='Pair Plot of Departure Delay, Arrival Delay, Air Time, and Distance',
-                        labels={col: col.replace('_', ' ') for col in subset_df.columns},
-                        height=900, width=900)
+# Create the pair plot with Plotly: a histogram per feature on the diagonal and the density of
+# every pair (flights per bin, log scale) elsewhere, so the figure size doesn't grow with the rows
+fig = plotting.density_matrix(df,
+                              dimensions=['DepDelay', 'ArrDelay', 'AirTime', 'Distance'],
+                              bins=60,
+                              title='Pair Plot of Departure Delay, Arrival Delay, Air Time, and Distance',
+                              height=900, width=900)
 
 # Show the plot
 fig.show()
@@ -178,16 +182,17 @@ Findings:
 # Assuming 'df' is your DataFrame
 fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-sns.boxplot(x=df['ArrDelay'], ax=axes[0, 0])
+# Quartiles and whiskers are computed once, and at most 200 outliers per box are drawn
+plotting.plot_box(axes[0, 0], df['ArrDelay'])
 axes[0, 0].set_title('Arrival Delay (ArrDelay)')
 
-sns.boxplot(x=df['DepDelay'], ax=axes[0, 1])
+plotting.plot_box(axes[0, 1], df['DepDelay'])
 axes[0, 1].set_title('Departure Delay (DepDelay)')
 
-sns.boxplot(x=df['AirTime'], ax=axes[1, 0])
+plotting.plot_box(axes[1, 0], df['AirTime'])
 axes[1, 0].set_title('Air Time')
 
-sns.boxplot(x=df['Distance'], ax=axes[1, 1])
+plotting.plot_box(axes[1, 1], df['Distance'])
 axes[1, 1].set_title('Distance')
 
 plt.tight_layout()
@@ -214,81 +219,50 @@ And what are solutions to clean the data?
 print(df['ArrDel15'].nunique())
 print(df['DepDel15'].nunique())
 
-df = df.drop(columns= ['ArrDel15', 'DepDel15'])
-gc.collect()
-
-# Define the columns to check for outliers
-columns = df.select_dtypes(exclude=['object', 'bool']).columns
-
-# Initialize a set to store outlier indices
-outliers = set()
-
-for col in columns:
-    # Calculate Q1 (1th percentile) and Q3 (99th percentile)
-    Q1 = df[col].quantile(0.01)
-    Q3 = df[col].quantile(0.99)
-    IQR = Q3 - Q1
+with profiler.stage('drop_columns', inputs = df) as stage:
+    df = stage.output(df.drop(columns= ['ArrDel15', 'DepDel15']))
 
-    # Calculate the outlier cutoffs
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-
-    # Determine which rows in the DataFrame have outliers
-    outlier_rows = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-
-    # Store the indices of the outliers
-    outliers.update(outlier_rows.index)
-
-# Ensure all indices are currently in the DataFrame before attempting to drop
-outliers = [idx for idx in outliers if idx in df.index]
+# Check every numerical column for outliers:
+# Q1 (1th percentile) and Q3 (99th percentile) of all columns are computed at once,
+# and a row is dropped if any column falls outside [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR]
+outlier_filter = OutlierFilter(lower = 0.01, upper = 0.99, k = 1.5)
 
 # Remove outliers from dataset
-df = df.drop(index = outliers)
-gc.collect()
+with profiler.stage('outliers', inputs = df) as stage:
+    df = stage.output(stage_cache.call('outliers', outlier_filter.fit_transform, df))
+
+"""This block of code filters the dataset to include only those flights where either the origin or destination is in Pennsylvania and ensures that these flights have not been cancelled or diverted. This process focuses our data to focus on flights specifically relevant to Pennsylvania.
 
-"""This block of code filters the dataset to include only those flights where either the origin or destination is in Pennsylvania and ensures that these flights have not been cancelled or diverted. This process focuses our data to focus on flights specifically relevant to Pennsylvania."""
+`FlightIndex` groups the row positions by origin/destination state, airport and airline once, so looking at another region (e.g. `states = ['NY']`, `airports = ['PHL']` or `airlines = [...]`) is just another call to `slice` on the same index. The PA slice is cached like the stages before it."""
 
 # Filter by flights whose origin or destination is in Pennsylvania
 # Also filter by non-cancelled and non-diverted flights
+def pa_flights(df):
+    return FlightIndex(df).slice(states = ['PA'], drop_cancelled = True, drop_diverted = True)
 
-query = '''
-
-SELECT *
-FROM df
-WHERE
-  (OriginState = 'PA' OR DestState = 'PA')
-  AND NOT Cancelled
-  AND NOT Diverted
-
-'''
-
-df = ps.sqldf(query, locals())
-gc.collect()
+with profiler.stage('pa_filter', inputs = df) as stage:
+    df = stage.output(stage_cache.call('pa_filter', pa_flights, df))
 
 #Converting to int so that we can process
-
-for col in df.columns:
-  if df[col].dtype=='object':
-    lis = df[col].unique()
-    dic = {}
-    for index, element in enumerate(lis):
-      dic[element] = index
-    df[col] = df[col].map(lambda x: dic[x])
+# Every text column is mapped to its position in a sorted vocabulary of its values
+# The vocabularies are saved with the models so new flights get the same codes (unseen values become -1)
+def fit_encoder(df):
+    encoder = CategoricalEncoder()
+    return encoder.fit_transform(df), encoder
+
+with profiler.stage('encode', inputs = df) as stage:
+    df, vocab_encoder = stage_cache.call('encode', fit_encoder, df)
+    stage.output(df)
+vocab_encoder.save(os.path.join(data_dir, 'categorical_vocabularies.json'))
 df.head()
 
-# Select columns with object and bool
+# Select columns with bool
 categorical_cols = df.select_dtypes(include=['bool']).columns.tolist()
 
-# Applying OneHotEncoder
-encoder = OneHotEncoder(sparse_output = False, drop='first')
-encoded_features = encoder.fit_transform(df[categorical_cols])
-
-# Creating a DataFrame with the encoded features
-encoded_df = pd.DataFrame(encoded_features, columns=encoder.get_feature_names_out(categorical_cols))
-
-# Concatenating the original DataFrame with the new one (excluding original categorical columns)
-df = pd.concat([df.drop(categorical_cols, axis=1), encoded_df], axis=1)
-df.dropna(inplace=True)
+# One-hot encode them (dropping the first category, like OneHotEncoder(drop='first'))
+# Each flag becomes a one-byte <col>_True column in place, instead of a float64 matrix concatenated onto df
+with profiler.stage('encode_bools', inputs = df) as stage:
+    df = stage.output(stage_cache.call('encode_bools', encode_bools, df, categorical_cols))
 
 df.shape
 
@@ -297,13 +271,14 @@ df.head()
 """## Feature Importance: finding correlations with the output
 
 The objective is to identify which features are most strongly correlated with arrival delays, potentially offering insights into which factors significantly influence flight delays.
-"""
 
-# Calculate the correlation matrix
-correlation_matrix = df.corr()
+We only need the correlations with `ArrDelay`, so instead of the full correlation matrix we compute just that column. The same accumulator can be updated chunk by chunk (`update`) to get correlations over more data than fits in memory.
+"""
 
-# Extract the correlations of all features with 'ArrDelay'
-arrdelay_correlations = correlation_matrix['ArrDelay']
+# Calculate the correlations of all features with 'ArrDelay'
+with profiler.stage('correlation', inputs = df):
+    arrdelay_corr = CorrelationAccumulator(targets = 'ArrDelay').update(df)
+arrdelay_correlations = arrdelay_corr.correlations()['ArrDelay']
 
 # Drop the self-correlation of 'ArrDelay' with itself
 arrdelay_correlations = arrdelay_correlations.drop('ArrDelay', axis=0)
@@ -320,6 +295,14 @@ highest_correlation_value = arrdelay_correlations[most_correlated_feature]
 
 arrdelay_correlations.reset_index().dropna().sort_values(by='ArrDelay')
 
+from flight_forecast.features import FEATURES
+
+# Rank features by absolute correlation; the 10 model features (FEATURES) were hand-picked from this list,
+# leaving out redundant columns, so check where each of them ranks (NaN: not in the top 20)
+top_features = arrdelay_corr.top_k(k = 20, exclude = ['ArrDelayMinutes'])
+print(top_features)
+print(top_features.abs().rank(ascending = False).reindex(FEATURES))
+
 """# Linear Regression
 
 ### Justification
@@ -334,43 +317,43 @@ arrdelay_correlations.reset_index().dropna().sort_values(by='ArrDelay')
 3.   **Homoscedasticity:** The model assumes homoscedasticity, meaning the residuals (differences between observed and predicted values) should have constant variance across all levels of the independent variables. Heteroscedasticity (non-constant variance) can lead to inefficiencies and an underestimate of the standard errors.
 """
 
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.metrics import mean_squared_error
-import math
+"""### Preparing the features
 
-# Select top 10 features from df (without redundancy)
-columns = ['ArrivalDelayGroups', 'DepDelay', 'TaxiOut', 'DepTime', 'WheelsOff', 'TaxiIn', 'CRSDepTime', 'CRSArrTime', 'Marketing_Airline_Network', 'IATA_Code_Marketing_Airline']
+All three models use the same features, train/test split, scaling and PCA, so we fit them once with `FeaturePipeline` and save the result. The PCA is fitted a single time and keeps the fewest components that explain at least 80% of the variance (the dashed line in the plot below), instead of us reading `n` off the plot and refitting. The prepared train/test matrices are cached as float32 arrays in `feature_dir`, so the models below (and later runs, via `FeaturePipeline.load(feature_dir)`) all train from the same arrays without recomputing anything.
+"""
 
-# Selecting features and target variable
-X = df[columns]
-y = df['ArrDelay']
+from sklearn.metrics import mean_squared_error
+import math
 
-# Handling missing values
-X.fillna(X.mean(), inplace=True)
-y.fillna(y.mean(), inplace=True)
+from flight_forecast.features import FeaturePipeline
+from flight_forecast.ingest import iter_flights
+from flight_forecast.linear import StreamingLinearRegression, fit_on_chunks
 
-# Splitting the dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# The top 10 features from the correlation ranking (without redundancy), as picked above
+columns = FEATURES
 
-# Scaling the features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+# Fill missing values, split, scale and fit PCA once, keeping enough components for 80% of the variance
+feature_dir = os.path.join(data_dir, 'feature_pipeline')
+with profiler.stage('features', inputs = df) as stage:
+    feature_pipeline = stage_cache.call('features', FeaturePipeline(features = columns, target = 'ArrDelay', variance = 0.8).fit, df)
+    stage.output([feature_pipeline.X_train_pca, feature_pipeline.X_test_pca])
+feature_pipeline.save(feature_dir)
 
-# Instantiate and Fit PCA
-pca = PCA()
-X2 = pca.fit(X_train)
+# Scaled features for the linear regression
+X_train = feature_pipeline.X_train_scaled
+X_test = feature_pipeline.X_test_scaled
+y_train = feature_pipeline.y_train
+y_test = feature_pipeline.y_test
 
 # Save the explained variance ratios into variable called "explained_variance_ratios"
-explained_variance_ratios = pca.explained_variance_ratio_
+explained_variance_ratios = feature_pipeline.explained_variance_ratio_
 
 # Save the cumulative explained variance ratios into variable called "cum_evr"
-cum_evr = np.cumsum(explained_variance_ratios)
+cum_evr = feature_pipeline.reducer_.cumulative_variance_
 
-# Find optimal num components to use (n) by plotting explained variance ratio
+# Number of components picked to reach 80% of the variance
+n = feature_pipeline.reducer_.n_components_
+print("Number of PCA components:", n)
 
 x_ticks = np.arange(len(cum_evr)) + 1
 
@@ -381,17 +364,25 @@ plt.xlabel('Number of Components')
 plt.ylabel('Cumulative Explained Variance')
 plt.title('Cumulative Explained Variance vs. Number of PCA Components')
 
-# 1. Refit and transform on training with parameter n (as deduced from the last step)
-n = 4
-pca = PCA(n_components = n)
-X_train_pca = pca.fit_transform(X_train)
-
-# 2. Transform on Testing Set and store it as `X_test_pca`
-X_test_pca = pca.transform(X_test)
+# Training and testing set with n principal components
+X_train_pca = feature_pipeline.X_train_pca
+X_test_pca = feature_pipeline.X_test_pca
 
 # Creating and training the model
-lr_model = LinearRegression()
-lr_model.fit(X_train, y_train)
+# The model only keeps running sums (X^T X, X^T y and the scaling statistics) and solves once at the end,
+# so it reads the training set 100,000 rows at a time and gives the same coefficients as LinearRegression
+lr_model = StreamingLinearRegression()
+with profiler.stage('train_lr', inputs = [X_train, y_train]):
+    lr_model.fit(X_train, y_train, chunksize = 100000)
+
+# To train on more data than fits in memory (e.g. every year of flights), feed it chunks instead;
+# transform = feature_pipeline.scale gives it the same scaled input as X_test_scaled below
+# lr_model = fit_on_chunks(iter_flights(df_url_2022, df_url_airlines, states = ['PA']), columns, 'ArrDelay',
+#                          encoder = vocab_encoder, transform = feature_pipeline.scale)
+
+# Save the model for the prediction server (python -m flight_forecast.serve --kind lr ...)
+from joblib import dump
+dump(lr_model, os.path.join(data_dir, 'linear_regression_model.joblib'))
 
 # Predicting on the test set
 y_pred = lr_model.predict(X_test)
@@ -400,8 +391,8 @@ y_pred = lr_model.predict(X_test)
 sd = math.sqrt(mean_squared_error(y_test, y_pred))
 print("RMS Error:", sd)
 
-def custom_accuracy(y_true, y_pred, threshold=5):
-    return np.mean(np.abs(y_true - y_pred) <= threshold)
+# Share of predictions within 5 minutes of the actual delay (used for every model)
+from flight_forecast.metrics import custom_accuracy
 
 print("Accuracy:", custom_accuracy(y_test,y_pred,5))
 
@@ -416,30 +407,26 @@ print("Accuracy:", custom_accuracy(y_test,y_pred,5))
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Plot Actual vs Predicted (EDA #1)
-plt.figure(figsize=(10, 6))
-plt.scatter(y_test, y_pred, alpha=0.3)
-plt.plot([y.min(), y.max()], [y.min(), y.max()], 'k--')
-plt.xlabel('Actual')
-plt.ylabel('Predicted')
-plt.title('Actual vs. Predicted')
+# Plot Actual vs Predicted (EDA #1), as the density of test flights per bin
+fig, ax = plt.subplots(figsize=(10, 6))
+plotting.plot_predictions(ax, y_test, y_pred)
+ax.set_xlabel('Actual')
+ax.set_ylabel('Predicted')
+ax.set_title('Actual vs. Predicted')
 plt.show()
 
 # Plot Actual Difference vs. Predicted Difference (EDA #2)
-
-difference = y_test - y_pred
-plt.figure(figsize=(10, 6))
-plt.scatter(y_pred, difference, alpha=0.3)
-plt.hlines(y=0, xmin = y_pred.min(), xmax = y_pred.max(), colors = 'red', linestyles = '--')
-plt.xlabel('Predicted')
-plt.ylabel('Actual Difference')
-plt.title('Actual Difference vs. Predicted')
+fig, ax = plt.subplots(figsize=(10, 6))
+plotting.plot_residuals(ax, y_test, y_pred)
+ax.set_xlabel('Predicted')
+ax.set_ylabel('Actual Difference')
+ax.set_title('Actual Difference vs. Predicted')
 plt.show()
 
 # Create a bar chart of feature importances(EDA #3)
 
 feature_importance = pd.DataFrame({
-    'Feature': X.columns,
+    'Feature': columns,
     'Coefficient': lr_model.coef_
 }).sort_values(by='Coefficient', ascending=True)
 
@@ -464,142 +451,80 @@ plt.show()
 """
 
 import torch
-from torch.utils.data import DataLoader, TensorDataset
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 
-# Select top 10 features from df (without redundancy)
-columns = ['ArrivalDelayGroups', 'DepDelay', 'TaxiOut', 'DepTime', 'WheelsOff', 'TaxiIn', 'CRSDepTime', 'CRSArrTime', 'Marketing_Airline_Network', 'IATA_Code_Marketing_Airline']
-
-# Selecting features and target variable
-X = df[columns]
-y = np.array(df['ArrDelay'])
-
-# Splitting the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Scaling the features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+# Use the same split, scaling and PCA as the linear regression
+feature_pipeline = FeaturePipeline.load(feature_dir)
 
 # Convert arrays to PyTorch tensors
-X_train = torch.tensor(X_train, dtype = torch.float32)
-X_test = torch.tensor(X_test, dtype = torch.float32)
-y_train = torch.tensor(y_train, dtype = torch.float32).view(-1, 1)
-y_test = torch.tensor(y_test, dtype = torch.float32).view(-1, 1)
-
-# Instantiate and Fit PCA
-pca = PCA()
-X2 = pca.fit(X_train)
-
-# Save the explained variance ratios into variable called "explained_variance_ratios"
-explained_variance_ratios = pca.explained_variance_ratio_
-
-# Save the cumulative explained variance ratios into variable called "cum_evr"
-cum_evr = np.cumsum(explained_variance_ratios)
-
-# Find optimal num components to use (n) by plotting explained variance ratio
-
-x_ticks = np.arange(len(cum_evr)) + 1
-
-plt.plot(size = [8, 6])
-sns.lineplot(x = x_ticks, y = cum_evr)
-sns.lineplot(x = x_ticks, y = 0.8 * np.ones(len(cum_evr)))
-plt.xlabel('Number of Components')
-plt.ylabel('Cumulative Explained Variance')
-plt.title('Cumulative Explained Variance vs. Number of PCA Components')
-
-# 1. Refit and transform on training with parameter n (as deduced from the last step)
-n = 4
-pca = PCA(n_components = n)
-X_train = torch.tensor(pca.fit_transform(X_train),dtype = torch.float32)
-
-# 2. Transform on Testing Set
-X_test = torch.tensor(pca.transform(X_test),dtype = torch.float32)
+X_train = torch.tensor(feature_pipeline.X_train_pca, dtype = torch.float32)
+X_test = torch.tensor(feature_pipeline.X_test_pca, dtype = torch.float32)
+y_train = torch.tensor(feature_pipeline.y_train, dtype = torch.float32).view(-1, 1)
+y_test = torch.tensor(feature_pipeline.y_test, dtype = torch.float32).view(-1, 1)
 
-# Create DataLoader for batch processing
-train_dataset = TensorDataset(X_train, y_train)
-train_loader = DataLoader(dataset=train_dataset, batch_size=20, shuffle=True)
-
-import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-
-class NeuralNet(nn.Module):
-    def __init__(self):
-        super(NeuralNet, self).__init__()
-        self.layer1 = nn.Linear(X_train.shape[1], 128)
-        self.relu1 = nn.ReLU()
-        self.layer2 = nn.Linear(128, 64)
-        self.relu2 = nn.ReLU()
-        self.layer3 = nn.Linear(64, 32)
-        self.relu3 = nn.ReLU()
-        self.layer4 = nn.Linear(32, 16)
-        self.relu4 = nn.ReLU()
-        self.layer5 = nn.Linear(16, 1)
-
-    def forward(self, x):
-        x = self.layer1(x)
-        x = self.relu1(x)
-        x = self.layer2(x)
-        x = self.relu2(x)
-        x = self.layer3(x)
-        x = self.relu3(x)
-        x = self.layer4(x)
-        x = self.relu4(x)
-        x = self.layer5(x)
-        return x
 
-# Initialize the model
-model = NeuralNet()
+# NeuralNet: 5 fully connected layers (128, 64, 32, 16, 1 units) with ReLUs
+from flight_forecast.nn import NeuralNet, BatchIterator, Evaluator, EarlyStopping, holdout, scaled_lr, train_epoch, warmup
 
-def custom_accuracy(y_true, y_pred, threshold=5):
-    with torch.no_grad():
-        accurate = torch.abs(y_true - y_pred) <= threshold
-        return torch.mean(accurate.float())
+# Initialize the model
+model = NeuralNet(X_train.shape[1])
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 model = model.to(device)
-optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+X_train, y_train = X_train.to(device), y_train.to(device)
+X_test, y_test = X_test.to(device), y_test.to(device)
+
+# Hold out a fixed validation sample of the training rows for early stopping (the test set stays untouched)
+X_fit, y_fit, X_val, y_val = holdout(X_train, y_train, size = 50000)
+
+# Large batches sliced out of the shuffled training set. The learning rate stays at 0.01 (tuned at batch
+# size 20): scaling it with the batch size (lr_rule = 'sqrt' or 'linear') needs warmup_epochs to ramp up,
+# and even then did not beat 0.01 here
+batch_size = 1024
+lr_rule = None
+warmup_epochs = 0
+train_batches = BatchIterator(X_fit, y_fit, batch_size = batch_size, generator = torch.Generator().manual_seed(42))
+optimizer = torch.optim.Adam(model.parameters(), lr=scaled_lr(0.01, batch_size, rule = lr_rule))
+scheduler = warmup(optimizer, warmup_epochs * len(train_batches)) if warmup_epochs else None
 criterion = nn.MSELoss()
+
+# Score the validation sample every eval_every epochs and stop once it has not improved for `patience` evaluations
+eval_every = 1
+evaluator = Evaluator(X_val, y_val, criterion, every = eval_every, threshold = 5)
+early_stopping = EarlyStopping(patience = 5, min_delta = 0.01)
 trainAccList = []
-testAccList = []
+valAccList = []
 # Training the model
 num_epochs = 25
 for epoch in range(num_epochs):
-    model.train()  # Set model to training mode
-    for inputs, labels in train_loader:
-        inputs, labels = inputs.to(device), labels.to(device)
-        # Forward pass
-        outputs = model(inputs)
-        loss = criterion(outputs, labels)
-
-        # Backward and optimize
-        optimizer.zero_grad()
-        loss.backward()
-        optimizer.step()
-
-    # Evaluate the model after each epoch
-    model.eval()
-    with torch.no_grad():
-        predictions = model(X_train)
-        train_loss = criterion(predictions, y_train)
-        train_acc = custom_accuracy(y_train, predictions,5)
-
-        test_predictions = model(X_test)
-        test_loss = criterion(test_predictions, y_test)
-        test_acc = custom_accuracy(y_test, test_predictions,5)
-    trainAccList.append(train_acc.item())
-    testAccList.append(test_acc.item())
-    print(f'Epoch [{epoch+1}/{num_epochs}], Train Loss: {train_loss.item():.4f}, Train Acc: {train_acc.item():.4f}, Test Loss: {test_loss.item():.4f}, Test Acc: {test_acc.item():.4f}')
-
-torch.save(model.state_dict(), "/content/drive/Shareddrives/CIS 5450 Project (VPN)/best_neural_network_model")
-
-loaded_nn = NeuralNet()
-loaded_nn.load_state_dict(torch.load("/content/drive/Shareddrives/CIS 5450 Project (VPN)/best_neural_network_model"))
+    # Training loss and accuracy are averaged over the epoch's batches
+    with profiler.stage('train_nn_epoch', inputs = [X_fit, y_fit], epoch = epoch):
+        train_loss, train_acc = train_epoch(model, optimizer, criterion, train_batches, threshold = 5, scheduler = scheduler)
+    trainAccList.append(train_acc)
+    if not evaluator.due(epoch):
+        print(f'Epoch [{epoch+1}/{num_epochs}], Train Loss: {train_loss:.4f}, Train Acc: {train_acc:.4f}')
+        continue
+
+    val_loss, val_acc = evaluator.evaluate(model)
+    valAccList.append(val_acc)
+    print(f'Epoch [{epoch+1}/{num_epochs}], Train Loss: {train_loss:.4f}, Train Acc: {train_acc:.4f}, Val Loss: {val_loss:.4f}, Val Acc: {val_acc:.4f}')
+    if early_stopping.step(val_loss, model, epoch):
+        print(f'Stopping early, best validation loss {early_stopping.best_loss:.4f} after epoch {early_stopping.best_epoch+1}')
+        break
+
+# Keep the weights of the best epoch, not the last one
+early_stopping.restore(model)
+torch.save(model.state_dict(), os.path.join(data_dir, 'best_neural_network_model'))
+
+loaded_nn = NeuralNet(X_train.shape[1])
+loaded_nn.load_state_dict(torch.load(os.path.join(data_dir, 'best_neural_network_model')))
+
+# Reduced-precision copies for CPU serving; keep one only if its RMSE matches the float model
+from flight_forecast import quantization
+
+nn_int8 = quantization.export(loaded_nn, os.path.join(data_dir, 'neural_network_model_int8'), dtype = 'int8')
+nn_bf16 = quantization.export(loaded_nn, os.path.join(data_dir, 'neural_network_model_bf16'), dtype = 'bfloat16')
+quantization.compare(loaded_nn, {'int8': nn_int8, 'bfloat16': nn_bf16}, X_test.cpu(), y_test.cpu(), threshold = 5)
 
 """# Random Forest
 
@@ -615,49 +540,12 @@ loaded_nn.load_state_dict(torch.load("/content/drive/Shareddrives/CIS 5450 Proje
 3.   **Bias Towards Certain Features:** If some features have a wide range of values or more categories, random forests can become biased towards these features, thinking they are more important than they actually are.
 """
 
-# Select top 10 features from df (without redundancy)
-columns = ['ArrivalDelayGroups', 'DepDelay', 'TaxiOut', 'DepTime', 'WheelsOff', 'TaxiIn', 'CRSDepTime', 'CRSArrTime', 'Marketing_Airline_Network', 'IATA_Code_Marketing_Airline']
-
-# Selecting features and target variable
-X = df[columns]
-y = df['ArrDelay']
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Scaling the features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
-
-# Instantiate and Fit PCA
-pca = PCA()
-X2 = pca.fit(X_train)
-
-# Save the explained variance ratios into variable called "explained_variance_ratios"
-explained_variance_ratios = pca.explained_variance_ratio_
-
-# Save the cumulative explained variance ratios into variable called "cum_evr"
-cum_evr = np.cumsum(explained_variance_ratios)
-
-# Find optimal num components to use (n) by plotting explained variance ratio
-
-x_ticks = np.arange(len(cum_evr)) + 1
-
-plt.plot(size = [8, 6])
-sns.lineplot(x = x_ticks, y = cum_evr)
-sns.lineplot(x = x_ticks, y = 0.8 * np.ones(len(cum_evr)))
-plt.xlabel('Number of Components')
-plt.ylabel('Cumulative Explained Variance')
-plt.title('Cumulative Explained Variance vs. Number of PCA Components')
-
-# 1. Refit and transform on training with parameter n (as deduced from the last step)
-n = 4
-pca = PCA(n_components = n)
-X_train = pca.fit_transform(X_train)
-
-# 2. Transform on Testing Set and store it as `X_test_pca`
-X_test = pca.transform(X_test)
+# Use the same split, scaling and PCA as the other models
+feature_pipeline = FeaturePipeline.load(feature_dir)
+X_train = feature_pipeline.X_train_pca
+X_test = feature_pipeline.X_test_pca
+y_train = feature_pipeline.y_train
+y_test = feature_pipeline.y_test
 
 # Define the model
 rf = RandomForestRegressor(random_state=42)
@@ -670,37 +558,72 @@ param_grid = {
     'min_samples_leaf': [1, 2, 4]
 }
 
-# Setup the grid search
-grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=3, verbose=3, n_jobs=-1)
+# Setup the search: successive halving on the number of rows, with forests that only differ in
+# n_estimators grown once with warm_start (same best_params_ / best_estimator_ as GridSearchCV)
+grid_search = HalvingForestSearch(estimator=rf, param_grid=param_grid, cv=3, factor=3, verbose=1, n_jobs=-1)
 
 # Fit the grid search to the data
-grid_search.fit(X_train, y_train)
+with profiler.stage('train_rf', inputs = [X_train, y_train]):
+    grid_search.fit(X_train, y_train)
 
 # Make predictions with the best model
 predictions = grid_search.best_estimator_.predict(X_test)
 
 # Calculate RMSE
-rmse = mean_squared_error(y_test, predictions, squared=False)
+rmse = np.sqrt(mean_squared_error(y_test, predictions))
 print(f'Root Mean Squared Error (RMSE) on test data: {rmse:.4f}')
 
 # Optional: Print best model parameters
 print("Best model parameters:", grid_search.best_params_)
 
-def custom_accuracy(y_true, y_pred, threshold=5):
-    return np.mean(np.abs(y_true - y_pred) <= threshold)
-
 accuracy = custom_accuracy(y_test, predictions, threshold=5)
 print(f'Custom Accuracy (within ±5 mins): {accuracy}')
 
 from joblib import dump
 
 # Save the best model
-dump(grid_search.best_estimator_, '/content/drive/Shareddrives/CIS 5450 Project (VPN)/best_random_forest_model.joblib')
+dump(grid_search.best_estimator_, os.path.join(data_dir, 'best_random_forest_model.joblib'))
 
 from joblib import load
 
 # Load the model from the file
-loaded_rf = load('/content/drive/Shareddrives/CIS 5450 Project (VPN)/best_random_forest_model.joblib')
+loaded_rf = load(os.path.join(data_dir, 'best_random_forest_model.joblib'))
+
+from flight_forecast.forest import export_forest
+
+# Compact export for serving: only the node arrays, memory-mapped on load (load_forest) and shared between processes
+export_forest(grid_search.best_estimator_, os.path.join(data_dir, 'best_random_forest_model'))
+
+# The saved encoder, feature pipeline and models can be served over HTTP with micro-batching, e.g.
+# python -m flight_forecast.serve --kind rf --model ".../best_random_forest_model" \
+#     --encoder ".../categorical_vocabularies.json" --pipeline ".../feature_pipeline"
+# then POST flight records to /predict and read latency percentiles and throughput from /stats
+
+"""# Gradient Boosting
+
+### Justification
+
+1.  **Fast Training:** Histogram-based gradient boosting bins every feature into at most 255 values once and then builds trees from per-bin histograms on all cores, which is much faster than growing deep random forest trees on the raw values.
+2.   **Small and Fast Model:** A few hundred shallow trees are much smaller to store and quicker to evaluate than a forest of trees up to 30 levels deep.
+
+### Limitations and Potential Biases
+1.   **Binning Resolution:** Splits can only fall between bins, so very fine differences within a bin are lost, which may cost a little accuracy.
+2.   **More Hyperparameters:** The learning rate, number of iterations and tree size interact and need tuning.
+"""
+
+from flight_forecast.boosting import BinnedGradientBoosting
+
+# Trained on the same PCA features as the random forest; the binned training matrix is cached on Drive
+hgb_model = BinnedGradientBoosting(cache_dir=os.path.join(data_dir, 'binned_features'),
+                                   max_iter=300, learning_rate=0.1, max_leaf_nodes=63, early_stopping=False)
+with profiler.stage('train_hgb', inputs = [feature_pipeline.X_train_pca, feature_pipeline.y_train]):
+    hgb_model.fit(feature_pipeline.X_train_pca, feature_pipeline.y_train)
+
+hgb_test_predictions = hgb_model.predict(feature_pipeline.X_test_pca)
+print(f'Root Mean Squared Error (RMSE) on test data: {np.sqrt(mean_squared_error(y_test, hgb_test_predictions)):.4f}')
+print(f'Custom Accuracy (within ±5 mins): {custom_accuracy(y_test, hgb_test_predictions, threshold=5)}')
+
+dump(hgb_model, os.path.join(data_dir, 'gradient_boosting_model.joblib'))
 
 """# Results"""
 
@@ -745,19 +668,16 @@ fig.update_yaxes(showgrid = True, gridwidth = 1, gridcolor = 'lightgrey')
 # Show the plot
 fig.show()
 
-# Generate predictions for linear regression
-lr_predictions = lr_model.predict(X_test)
+# Generate predictions for linear regression (trained on the scaled features)
+with profiler.stage('predict_lr', inputs = feature_pipeline.X_test_scaled) as stage:
+    lr_predictions = stage.output(lr_model.predict(feature_pipeline.X_test_scaled))
 
-# Generate predictions for random forest
-rf_predictions = loaded_rf.predict(X_test)
+# Generate predictions for random forest (trained on the PCA features)
+with profiler.stage('predict_rf', inputs = feature_pipeline.X_test_pca) as stage:
+    rf_predictions = stage.output(loaded_rf.predict(feature_pipeline.X_test_pca))
 
-# Assuming you've scaled X_train during training, apply the same scaling to X_test
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Convert X_test to a PyTorch tensor
-X_test_tensor = torch.tensor(X_test_scaled, dtype=torch.float32)
+# The neural network was trained on the same PCA features, which are already scaled
+X_test_tensor = torch.tensor(feature_pipeline.X_test_pca, dtype=torch.float32)
 
 # If using GPU
 if torch.cuda.is_available():
@@ -767,87 +687,54 @@ if torch.cuda.is_available():
 model.eval()
 
 # Get predictions
-with torch.no_grad():
-    nn_predictions = model(X_test_tensor).view(-1).cpu().numpy()
-
-# Setting up the figure and subplots
-plt.figure(figsize=(15, 5))
-
-plt.subplot(1, 3, 1)
-plt.scatter(y_test, lr_predictions, alpha=0.3, color='g')
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2)
-plt.title('Linear Regression: Predictions vs. Actual')
-plt.xlabel('Actual values')
-plt.ylabel('Predicted values')
-
-plt.subplot(1, 3, 2)
-plt.scatter(y_test, rf_predictions, alpha=0.3)
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2)
-plt.title('Random Forest: Predictions vs. Actual')
-plt.xlabel('Actual values')
-plt.ylabel('Predicted values')
-
-plt.subplot(1, 3, 3)
-plt.scatter(y_test, nn_predictions, alpha=0.3, color='r')
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2)
-plt.title('Neural Network: Predictions vs. Actual')
-plt.xlabel('Actual values')
-plt.ylabel('Predicted values')
+with torch.no_grad(), profiler.stage('predict_nn', inputs = X_test_tensor) as stage:
+    nn_predictions = stage.output(model(X_test_tensor).view(-1).cpu().numpy())
+
+# Generate predictions for gradient boosting (trained on the PCA features)
+with profiler.stage('predict_hgb', inputs = feature_pipeline.X_test_pca) as stage:
+    hgb_predictions = stage.output(hgb_model.predict(feature_pipeline.X_test_pca))
+
+# Test set predictions of every model, used by the plots and metrics below
+model_predictions = {'Linear Regression': lr_predictions, 'Random Forest': rf_predictions,
+                     'Neural Network': nn_predictions, 'Gradient Boosting': hgb_predictions}
+
+# Predictions vs. actual values: density of test flights per bin for each model
+fig, axes = plt.subplots(1, 4, figsize=(20, 5))
+for ax, (name, predictions) in zip(axes, model_predictions.items()):
+    plotting.plot_predictions(ax, y_test, predictions)
+    ax.set_title(f'{name}: Predictions vs. Actual')
 
 plt.tight_layout()
 plt.show()
 
-difference_rf = y_test - rf_predictions
-difference_nn = y_test - nn_predictions
-difference_lr = y_test - lr_predictions
-
-# Setting up the figure and subplots
-plt.figure(figsize=(15, 6))
-
-# Subplot for Linear Regression
-plt.subplot(1, 3, 1)
-plt.scatter(lr_predictions, difference_lr, alpha=0.3, color='purple')
-plt.hlines(y=0, xmin=lr_predictions.min(), xmax=lr_predictions.max(), colors='red', linestyles='--')
-plt.xlabel('Predicted Values')
-plt.ylabel('Residuals')
-plt.title('Linear Regression: Residuals vs. Predicted')
-
-# Subplot for Random Forest
-plt.subplot(1, 3, 2)
-plt.scatter(rf_predictions, difference_rf, alpha=0.3, color='blue')
-plt.hlines(y=0, xmin=rf_predictions.min(), xmax=rf_predictions.max(), colors='red', linestyles='--')
-plt.xlabel('Predicted Values')
-plt.ylabel('Residuals')
-plt.title('Random Forest: Residuals vs. Predicted')
-
-# Subplot for Neural Network
-plt.subplot(1, 3, 3)
-plt.scatter(nn_predictions, difference_nn, alpha=0.3, color='green')
-plt.hlines(y=0, xmin=nn_predictions.min(), xmax=nn_predictions.max(), colors='red', linestyles='--')
-plt.xlabel('Predicted Values')
-plt.ylabel('Residuals')
-plt.title('Neural Network: Residuals vs. Predicted')
+# Residuals vs. predicted values as heatmaps
+fig, axes = plt.subplots(1, 4, figsize=(20, 6))
+for ax, (name, predictions) in zip(axes, model_predictions.items()):
+    plotting.plot_residuals(ax, y_test, predictions)
+    ax.set_title(f'{name}: Residuals vs. Predicted')
 
 plt.tight_layout()
 plt.show()
 
-# Assuming you have `rf_predictions` and `nn_predictions` available
-mse_lr = mean_squared_error(y_test, lr_predictions)
-mse_rf = mean_squared_error(y_test, rf_predictions)
-mse_nn = mean_squared_error(y_test, nn_predictions)
-
-rmse_lr = np.sqrt(mse_lr)
-rmse_rf = np.sqrt(mse_rf)
-rmse_nn = np.sqrt(mse_nn)
+from flight_forecast.metrics import MetricsAccumulator
 
-r2_lr = r2_score(y_test, lr_predictions)
-r2_rf = r2_score(y_test, rf_predictions)
-r2_nn = r2_score(y_test, nn_predictions)
+# All metrics of all models in one pass over the test set, 100,000 rows at a time,
+# with 95% bootstrap confidence intervals
+metrics = MetricsAccumulator(thresholds = [5, 15], n_bootstrap = 200)
+for start in range(0, len(y_test), 100000):
+    metrics.update(y_test[start:start + 100000],
+                   {name: values[start:start + 100000] for name, values in model_predictions.items()})
+metrics_table = metrics.results()
+intervals = metrics.confidence_intervals(level = 0.95)
+print(metrics_table)
 
 fig = go.Figure(data=[
-    go.Bar(name='Linear Regression', x=['MSE', 'RMSE', 'R²'], y=[mse_lr, rmse_lr, r2_lr]),
-    go.Bar(name='Random Forest', x=['MSE', 'RMSE', 'R²'], y=[mse_rf, rmse_rf, r2_rf]),
-    go.Bar(name='Neural Network', x=['MSE', 'RMSE', 'R²'], y=[mse_nn, rmse_nn, r2_nn])
+    go.Bar(name=name, x=['MSE', 'RMSE', 'R²'],
+           y=[metrics_table.loc[name, 'mse'], metrics_table.loc[name, 'rmse'], metrics_table.loc[name, 'r2']],
+           error_y=dict(type='data', symmetric=False,
+                        array=[intervals.loc[name, (metric, 'upper')] - metrics_table.loc[name, metric] for metric in ['mse', 'rmse', 'r2']],
+                        arrayminus=[metrics_table.loc[name, metric] - intervals.loc[name, (metric, 'lower')] for metric in ['mse', 'rmse', 'r2']]))
+    for name in model_predictions
 ])
 
 # Change the bar mode and update the layout
@@ -862,6 +749,12 @@ fig.update_layout(
 # Show the figure
 fig.show()
 
+# Where the time and memory went: one row per step, saved as JSON (compare runs with
+# flight_forecast.profiling.diff) and as a trace to open in chrome://tracing or https://ui.perfetto.dev
+print(profiler.summary()[['name', 'wall_s', 'cpu_s', 'peak_rss_delta', 'rows_in', 'rows_out']])
+profiler.save(os.path.join(data_dir, 'profile.json'))
+profiler.chrome_trace(os.path.join(data_dir, 'profile.trace.json'))
+
 """# Conclusion and Discussion
 
 ### Interpretability
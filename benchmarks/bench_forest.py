@@ -0,0 +1,75 @@
+"""Rows per second of the random forest predictors.
+
+Fits a ``RandomForestRegressor`` on synthetic PCA-like features, exports it
+with ``export_forest`` and times ``RandomForestRegressor.predict`` against
+``CompactForest.predict`` on the same rows, checking that the predictions are
+identical. Run from the repository root:
+
+    python benchmarks/bench_forest.py --rows 200000 --trees 100 --max-depth 30
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from flight_forecast.forest import export_forest, load_forest  # noqa: E402
+
+
+def synthetic(n_rows, n_features, random_state):
+    rng = np.random.default_rng(random_state)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    y = 3 * X[:, 0] + 5 * np.sin(2 * X[:, 1]) + X[:, 2] * X[:, 3] + rng.normal(size=n_rows)
+    return X, y.astype(np.float32)
+
+
+def best_time(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--train-rows', type=int, default=100_000)
+    parser.add_argument('--rows', type=int, default=200_000, help='rows to predict')
+    parser.add_argument('--features', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--random-state', type=int, default=42)
+    args = parser.parse_args()
+
+    X_train, y_train = synthetic(args.train_rows, args.features, args.random_state)
+    X, _ = synthetic(args.rows, args.features, args.random_state + 1)
+    forest = RandomForestRegressor(n_estimators=args.trees, max_depth=args.max_depth,
+                                   random_state=args.random_state, n_jobs=-1).fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_forest(forest, directory)
+        compact = load_forest(directory)
+
+        forest.set_params(n_jobs=1)
+        results = {'sklearn, 1 thread': best_time(lambda: forest.predict(X), args.repeats)}
+        forest.set_params(n_jobs=-1)
+        results['sklearn, all threads'] = best_time(lambda: forest.predict(X), args.repeats)
+        results['compact, 1 thread'] = best_time(lambda: compact.predict(X, n_jobs=1), args.repeats)
+        results['compact, all threads'] = best_time(lambda: compact.predict(X), args.repeats)
+
+    expected = results['sklearn, 1 thread'][1]
+    print(f'{args.trees} trees, max depth {args.max_depth}, {args.rows} rows, {os.cpu_count()} CPUs')
+    for name, (seconds, predictions) in results.items():
+        identical = 'identical' if np.array_equal(predictions, expected) else 'DIFFERENT'
+        print(f'{name:22s} {args.rows / seconds:12,.0f} rows/s  {seconds:8.3f} s  {identical}')
+
+
+if __name__ == '__main__':
+    main()
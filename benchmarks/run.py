@@ -0,0 +1,197 @@
+"""Time every stage of the pipeline on synthetic data and write the timings as JSON.
+
+Generates (or reuses) a synthetic Combined_Flights_2022 dataset with
+``benchmarks/synthetic.py`` and runs the notebook's stages on it in order,
+without network access or Google Drive:
+
+    ingest_csv        chunked CSV load, airline merge, PA / cancelled / diverted filter, dropna
+    convert_parquet   CSV to the partitioned Parquet dataset
+    load_sample       Parquet load of all flights with dropna and reservoir sampling
+    outliers          quantile outlier filter
+    pa_filter         FlightIndex slice of the PA flights, minus cancelled / diverted
+    encode            categorical vocabularies and boolean indicators
+    correlation       correlations with ArrDelay and the top 20 features
+    features          fill, split, scaling and PCA (FeaturePipeline)
+    train_lr / train_nn / train_rf
+    predict_lr / predict_nn / predict_rf / predict_rf_compact
+
+Each stage is measured with ``flight_forecast.profiling.Profiler``: wall and
+CPU time, peak RSS and the rows and bytes going in and out. The records are
+written as JSON (and as a Chrome trace with ``--trace``); with
+``--baseline`` the previous results file is compared stage by stage, so a
+regression shows up as a ratio above 1. Run from the repository root:
+
+    python benchmarks/run.py --rows 1000000 --out benchmarks/results.json
+"""
+
+import argparse
+import datetime
+import os
+import platform
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import synthetic  # noqa: E402
+
+STAGES = ['ingest_csv', 'convert_parquet', 'load_sample', 'outliers', 'pa_filter', 'encode',
+          'correlation', 'features', 'train_lr', 'train_nn', 'train_rf',
+          'predict_lr', 'predict_nn', 'predict_rf', 'predict_rf_compact']
+
+
+def run(args):
+    import numpy as np
+    import torch
+    import torch.nn as nn
+    from sklearn.ensemble import RandomForestRegressor
+
+    from flight_forecast.correlation import CorrelationAccumulator
+    from flight_forecast.encoding import CategoricalEncoder, encode_bools
+    from flight_forecast.features import FeaturePipeline
+    from flight_forecast.forest import export_forest, load_forest
+    from flight_forecast.ingest import load_flights
+    from flight_forecast.linear import StreamingLinearRegression
+    from flight_forecast.nn import BatchIterator, NeuralNet, scaled_lr, train_epoch
+    from flight_forecast.outliers import OutlierFilter
+    from flight_forecast.profiling import Profiler
+    from flight_forecast.slicing import FlightIndex
+    from flight_forecast.store import convert_to_parquet, load_parquet
+
+    flights_path = synthetic.generate(args.data_dir, args.rows, random_state=args.random_state)
+    airlines_path = os.path.join(args.data_dir, synthetic.AIRLINES_FILE)
+    parquet_dir = os.path.join(args.data_dir, 'parquet')
+    work_dir = os.path.join(args.data_dir, 'work')
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    profiler = Profiler(verbose=True)
+    with profiler.stage('ingest_csv') as stage:
+        stage.rows_in = args.rows
+        df = stage.output(load_flights(flights_path, airlines_path, states=['PA']))
+    del df
+
+    with profiler.stage('convert_parquet') as stage:
+        stage.rows_in = args.rows
+        shutil.rmtree(parquet_dir, ignore_errors=True)
+        convert_to_parquet(flights_path, airlines_path, parquet_dir)
+
+    with profiler.stage('load_sample') as stage:
+        df = load_parquet(parquet_dir, dropna=True, sample_size=args.sample_size, random_state=args.random_state)
+        df = stage.output(df.drop(columns=['ArrDel15', 'DepDel15']))
+
+    with profiler.stage('outliers', inputs=df) as stage:
+        df = stage.output(OutlierFilter().fit_transform(df))
+
+    with profiler.stage('pa_filter', inputs=df) as stage:
+        df = stage.output(FlightIndex(df).slice(states=['PA'], drop_cancelled=True, drop_diverted=True))
+
+    with profiler.stage('encode', inputs=df) as stage:
+        encoder = CategoricalEncoder()
+        df = encoder.fit_transform(df)
+        df = stage.output(encode_bools(df))
+
+    with profiler.stage('correlation', inputs=df) as stage:
+        accumulator = CorrelationAccumulator('ArrDelay')
+        accumulator.update(df)
+        stage.output(accumulator.top_k(20, exclude=['ArrDelayMinutes']))
+
+    with profiler.stage('features', inputs=df) as stage:
+        pipeline = FeaturePipeline().fit(df)
+        stage.output([pipeline.X_train_scaled, pipeline.X_test_scaled])
+    del df
+
+    X_train, X_test = pipeline.X_train_pca, pipeline.X_test_pca
+    y_train = pipeline.y_train
+
+    with profiler.stage('train_lr', inputs=[pipeline.X_train_scaled, y_train]):
+        lr = StreamingLinearRegression().fit(pipeline.X_train_scaled, y_train)
+
+    with profiler.stage('train_nn', inputs=[X_train, y_train]) as stage:
+        torch.manual_seed(args.random_state)
+        model = NeuralNet(X_train.shape[1])
+        optimizer = torch.optim.Adam(model.parameters(), lr=scaled_lr(0.01, 1024, rule=None))
+        batches = BatchIterator(torch.from_numpy(np.array(X_train)),
+                                torch.from_numpy(np.array(y_train)).view(-1, 1), batch_size=1024)
+        for _ in range(args.nn_epochs):
+            stage.metadata['train_loss'], _ = train_epoch(model, optimizer, nn.MSELoss(), batches)
+
+    with profiler.stage('train_rf', inputs=[X_train, y_train]):
+        forest = RandomForestRegressor(n_estimators=args.rf_trees, max_depth=args.rf_max_depth,
+                                       random_state=args.random_state, n_jobs=-1).fit(X_train, y_train)
+        export_forest(forest, os.path.join(work_dir, 'forest'))
+
+    with profiler.stage('predict_lr', inputs=pipeline.X_test_scaled) as stage:
+        stage.output(lr.predict(pipeline.X_test_scaled))
+
+    with profiler.stage('predict_nn', inputs=X_test) as stage:
+        model.eval()
+        with torch.no_grad():
+            stage.output(model(torch.from_numpy(np.array(X_test))))
+
+    with profiler.stage('predict_rf', inputs=X_test) as stage:
+        stage.output(forest.predict(X_test))
+
+    with profiler.stage('predict_rf_compact', inputs=X_test) as stage:
+        stage.output(load_forest(os.path.join(work_dir, 'forest')).predict(X_test))
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return profiler
+
+
+def environment():
+    import numpy
+    import pandas
+    import sklearn
+    import torch
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'torch': torch.__version__,
+    }
+
+
+def compare(profiler, baseline_path):
+    """Print each stage's time and peak memory relative to a previous results file."""
+    import pandas as pd
+
+    from flight_forecast.profiling import diff
+
+    table = diff(baseline_path, profiler)
+    with pd.option_context('display.width', 200, 'display.max_columns', None,
+                           'display.float_format', '{:.3f}'.format):
+        print()
+        print(table[['wall_s_before', 'wall_s_after', 'wall_s_ratio', 'cpu_s_ratio', 'peak_rss_delta_ratio']])
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Time each pipeline stage on synthetic flights.')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='synthetic rows (1M to 50M)')
+    parser.add_argument('--data-dir', default=os.path.join(here, 'data'))
+    parser.add_argument('--out', default=os.path.join(here, 'results.json'))
+    parser.add_argument('--trace', help='also write a Chrome trace (chrome://tracing, Perfetto) here')
+    parser.add_argument('--baseline', help='previous results file to compare against')
+    parser.add_argument('--sample-size', type=int, default=1_500_000)
+    parser.add_argument('--nn-epochs', type=int, default=3)
+    parser.add_argument('--rf-trees', type=int, default=20)
+    parser.add_argument('--rf-max-depth', type=int, default=20)
+    parser.add_argument('--random-state', type=int, default=42)
+    args = parser.parse_args()
+
+    profiler = run(args)
+    profiler.save(args.out, environment=environment(), config=vars(args))
+    print(f'Wrote {args.out}')
+    if args.trace:
+        profiler.chrome_trace(args.trace)
+    if args.baseline:
+        compare(profiler, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
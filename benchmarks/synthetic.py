@@ -0,0 +1,244 @@
+"""Synthetic Combined_Flights_2022.csv and Airlines.csv for offline benchmarks.
+
+The files have every column of ``FLIGHTS_SCHEMA`` with plausible values:
+real carrier names and codes, airports grouped by state (Pennsylvania among
+the busier ones), departure and arrival delays that follow each other,
+about 2% cancelled and 0.3% diverted flights with the usual missing times.
+Rows are generated and appended ``chunksize`` at a time, so any size (1M to
+50M rows and more) is written in bounded memory. Run from the repository root:
+
+    python benchmarks/synthetic.py --rows 1000000 --out benchmarks/data
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from flight_forecast.ingest import FLIGHTS_SCHEMA  # noqa: E402
+
+FLIGHTS_FILE = 'Combined_Flights_2022.csv'
+AIRLINES_FILE = 'Airlines.csv'
+
+# (code, name) of the carriers in the 2022 data
+AIRLINES = [
+    ('9E', 'Endeavor Air Inc.'), ('AA', 'American Airlines Inc.'), ('AS', 'Alaska Airlines Inc.'),
+    ('B6', 'JetBlue Airways'), ('C5', 'Commutair Aka Champlain Enterprises, Inc.'),
+    ('DL', 'Delta Air Lines Inc.'), ('F9', 'Frontier Airlines Inc.'), ('G4', 'Allegiant Air'),
+    ('G7', 'GoJet Airlines, LLC d/b/a United Express'), ('HA', 'Hawaiian Airlines Inc.'),
+    ('MQ', 'Envoy Air'), ('NK', 'Spirit Air Lines'), ('OH', 'Comair Inc.'),
+    ('OO', 'SkyWest Airlines Inc.'), ('PT', 'Piedmont Airlines'), ('QX', 'Horizon Air'),
+    ('UA', 'United Air Lines Inc.'), ('WN', 'Southwest Airlines Co.'), ('YV', 'Mesa Airlines Inc.'),
+    ('YX', 'Republic Airlines'), ('ZW', 'Air Wisconsin Airlines Corp'),
+]
+# Marketing carriers the regional airlines fly for
+MARKETING = ['DL', 'AA', 'AS', 'B6', 'UA', 'DL', 'F9', 'G4', 'UA', 'HA',
+             'AA', 'NK', 'AA', 'UA', 'AA', 'AS', 'UA', 'WN', 'UA', 'AA', 'UA']
+
+# (state, name, FIPS, world area code, relative traffic)
+STATES = [
+    ('CA', 'California', 6, 91, 12), ('TX', 'Texas', 48, 74, 11), ('FL', 'Florida', 12, 33, 9),
+    ('IL', 'Illinois', 17, 41, 6), ('GA', 'Georgia', 13, 34, 5), ('NY', 'New York', 36, 22, 6),
+    ('CO', 'Colorado', 8, 82, 4), ('NC', 'North Carolina', 37, 36, 4), ('AZ', 'Arizona', 4, 81, 3),
+    ('NV', 'Nevada', 32, 85, 3), ('WA', 'Washington', 53, 93, 3), ('PA', 'Pennsylvania', 42, 23, 3),
+    ('VA', 'Virginia', 51, 38, 3), ('MI', 'Michigan', 26, 43, 3), ('MN', 'Minnesota', 27, 63, 2),
+    ('MA', 'Massachusetts', 25, 13, 2), ('NJ', 'New Jersey', 34, 21, 2), ('TN', 'Tennessee', 47, 54, 2),
+    ('UT', 'Utah', 49, 87, 2), ('MO', 'Missouri', 29, 64, 2), ('OH', 'Ohio', 39, 44, 2),
+    ('MD', 'Maryland', 24, 35, 2), ('LA', 'Louisiana', 22, 72, 1), ('OR', 'Oregon', 41, 92, 1),
+    ('HI', 'Hawaii', 15, 2, 1), ('SC', 'South Carolina', 45, 37, 1), ('WI', 'Wisconsin', 55, 45, 1),
+    ('IN', 'Indiana', 18, 42, 1), ('KY', 'Kentucky', 21, 52, 1), ('AK', 'Alaska', 2, 1, 1),
+]
+AIRPORTS_PER_STATE = 6
+
+
+def airlines():
+    """The Airlines.csv table."""
+    return pd.DataFrame({'Code': [code for code, _ in AIRLINES], 'Description': [name for _, name in AIRLINES]})
+
+
+def airports(rng):
+    """One row per synthetic airport: code, numeric ids, city and state columns."""
+    rows = []
+    for s, (state, name, fips, wac, traffic) in enumerate(STATES):
+        for a in range(AIRPORTS_PER_STATE):
+            index = s * AIRPORTS_PER_STATE + a
+            rows.append({
+                'code': state[0] + chr(ord('A') + a) + state[1],
+                'airport_id': 10_000 + index,
+                'seq_id': (10_000 + index) * 100 + 1,
+                'market_id': 30_000 + index,
+                'city': f'City {index}, {state}',
+                'state': state, 'state_name': name, 'fips': fips, 'wac': wac,
+                # A few hubs per state take most of the traffic
+                'weight': traffic / (a + 1),
+            })
+    table = pd.DataFrame(rows)
+    table['weight'] /= table['weight'].sum()
+    return table
+
+
+def flights(n_rows, rng, table):
+    """One chunk of ``n_rows`` synthetic flights with the FLIGHTS_SCHEMA columns."""
+    origin = table.iloc[rng.choice(len(table), n_rows, p=table['weight'])].reset_index(drop=True)
+    dest = table.iloc[rng.choice(len(table), n_rows, p=table['weight'])].reset_index(drop=True)
+    carrier = rng.integers(0, len(AIRLINES), n_rows)
+    codes = np.array([code for code, _ in AIRLINES])
+    names = np.array([name for _, name in AIRLINES])
+    marketing = np.array(MARKETING)[carrier]
+
+    month = rng.integers(1, 13, n_rows)
+    day = rng.integers(1, 29, n_rows)
+    dates = pd.to_datetime({'year': 2022, 'month': month, 'day': day})
+
+    distance = rng.gamma(2.0, 400, n_rows).clip(30, 5000).round()
+    air_time = (distance / 7.5 + rng.normal(15, 8, n_rows)).clip(15).round()
+    taxi_out = rng.gamma(3.0, 5.5, n_rows).round()
+    taxi_in = rng.gamma(2.0, 4.0, n_rows).round()
+    crs_elapsed = (air_time + 30 + rng.normal(0, 5, n_rows)).round()
+
+    # Departure delays are mostly small with a long right tail; arrival delay follows
+    dep_delay = np.where(rng.random(n_rows) < 0.7, rng.normal(-4, 5, n_rows),
+                         rng.exponential(45, n_rows)).round()
+    arr_delay = (dep_delay + taxi_out - 16 + rng.normal(0, 8, n_rows)).round()
+
+    crs_dep_minutes = rng.integers(5 * 60, 23 * 60, n_rows)
+    crs_arr_minutes = (crs_dep_minutes + crs_elapsed) % 1440
+    dep_minutes = (crs_dep_minutes + dep_delay) % 1440
+    arr_minutes = (crs_arr_minutes + arr_delay) % 1440
+    wheels_off = (dep_minutes + taxi_out) % 1440
+    wheels_on = (arr_minutes - taxi_in) % 1440
+
+    cancelled = rng.random(n_rows) < 0.02
+    diverted = ~cancelled & (rng.random(n_rows) < 0.003)
+
+    df = pd.DataFrame({
+        'FlightDate': dates.dt.strftime('%Y-%m-%d'),
+        'Airline': names[carrier],
+        'Origin': origin['code'],
+        'Dest': dest['code'],
+        'Cancelled': cancelled,
+        'Diverted': diverted,
+        'CRSDepTime': _hhmm(crs_dep_minutes),
+        'DepTime': _hhmm(dep_minutes).astype(np.float64),
+        'DepDelayMinutes': np.maximum(dep_delay, 0),
+        'DepDelay': dep_delay,
+        'ArrTime': _hhmm(arr_minutes).astype(np.float64),
+        'ArrDelayMinutes': np.maximum(arr_delay, 0),
+        'AirTime': air_time,
+        'CRSElapsedTime': crs_elapsed,
+        'ActualElapsedTime': air_time + taxi_out + taxi_in,
+        'Distance': distance,
+        'Year': 2022,
+        'Quarter': (month - 1) // 3 + 1,
+        'Month': month,
+        'DayofMonth': day,
+        'DayOfWeek': dates.dt.dayofweek.to_numpy() + 1,
+        'Marketing_Airline_Network': marketing,
+        'Operated_or_Branded_Code_Share_Partners': np.where(marketing == codes[carrier], marketing,
+                                                            np.char.add(marketing, '_CODESHARE')),
+        'DOT_ID_Marketing_Airline': 19_000 + np.searchsorted(np.unique(codes), marketing),
+        'IATA_Code_Marketing_Airline': marketing,
+        'Flight_Number_Marketing_Airline': rng.integers(1, 7000, n_rows),
+        'Operating_Airline': codes[carrier],
+        'DOT_ID_Operating_Airline': 19_000 + np.searchsorted(np.unique(codes), codes[carrier]),
+        'IATA_Code_Operating_Airline': codes[carrier],
+        'Tail_Number': np.char.add('N', rng.integers(100, 999, n_rows).astype(str)),
+        'Flight_Number_Operating_Airline': rng.integers(1, 7000, n_rows),
+        'OriginAirportID': origin['airport_id'],
+        'OriginAirportSeqID': origin['seq_id'],
+        'OriginCityMarketID': origin['market_id'],
+        'OriginCityName': origin['city'],
+        'OriginState': origin['state'],
+        'OriginStateFips': origin['fips'],
+        'OriginStateName': origin['state_name'],
+        'OriginWac': origin['wac'],
+        'DestAirportID': dest['airport_id'],
+        'DestAirportSeqID': dest['seq_id'],
+        'DestCityMarketID': dest['market_id'],
+        'DestCityName': dest['city'],
+        'DestState': dest['state'],
+        'DestStateFips': dest['fips'],
+        'DestStateName': dest['state_name'],
+        'DestWac': dest['wac'],
+        'DepDel15': (dep_delay >= 15).astype(np.float64),
+        'DepartureDelayGroups': np.clip(np.floor(dep_delay / 15), -2, 12),
+        'DepTimeBlk': _time_block(crs_dep_minutes),
+        'TaxiOut': taxi_out,
+        'WheelsOff': _hhmm(wheels_off).astype(np.float64),
+        'WheelsOn': _hhmm(wheels_on).astype(np.float64),
+        'TaxiIn': taxi_in,
+        'CRSArrTime': _hhmm(crs_arr_minutes),
+        'ArrDelay': arr_delay,
+        'ArrDel15': (arr_delay >= 15).astype(np.float64),
+        'ArrivalDelayGroups': np.clip(np.floor(arr_delay / 15), -2, 12),
+        'ArrTimeBlk': _time_block(crs_arr_minutes),
+        'DistanceGroup': np.minimum(distance // 250 + 1, 11).astype(np.int64),
+        'DivAirportLandings': diverted.astype(np.float64),
+    })
+
+    # Cancelled flights never left; diverted ones never arrived where planned
+    df.loc[cancelled, ['DepTime', 'DepDelayMinutes', 'DepDelay', 'TaxiOut', 'WheelsOff', 'DepDel15',
+                       'DepartureDelayGroups']] = np.nan
+    no_arrival = cancelled | diverted
+    df.loc[no_arrival, ['ArrTime', 'ArrDelayMinutes', 'AirTime', 'ActualElapsedTime', 'WheelsOn',
+                        'TaxiIn', 'ArrDelay', 'ArrDel15', 'ArrivalDelayGroups']] = np.nan
+    return df[list(FLIGHTS_SCHEMA)]
+
+
+def generate(out_dir, n_rows, chunksize=1_000_000, random_state=42, verbose=True):
+    """Write ``n_rows`` flights and the airline table to ``out_dir``; returns the flights path.
+
+    A ``synthetic.json`` next to the files records the row count and seed, so
+    an existing dataset with the same parameters is reused.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    flights_path = os.path.join(out_dir, FLIGHTS_FILE)
+    meta_path = os.path.join(out_dir, 'synthetic.json')
+    meta = {'rows': n_rows, 'random_state': random_state}
+    if os.path.exists(flights_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return flights_path
+
+    rng = np.random.default_rng(random_state)
+    table = airports(rng)
+    airlines().to_csv(os.path.join(out_dir, AIRLINES_FILE), index=False)
+    start = time.perf_counter()
+    for offset in range(0, n_rows, chunksize):
+        chunk = flights(min(chunksize, n_rows - offset), rng, table)
+        chunk.to_csv(flights_path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+        if verbose:
+            print(f'{offset + len(chunk):,} / {n_rows:,} rows ({time.perf_counter() - start:.0f} s)')
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return flights_path
+
+
+def _hhmm(minutes):
+    minutes = np.asarray(minutes).astype(np.int64) % 1440
+    return minutes // 60 * 100 + minutes % 60
+
+
+def _time_block(minutes):
+    hour = (np.asarray(minutes).astype(np.int64) % 1440) // 60
+    blocks = np.array(['0001-0559'] * 6 + [f'{h:02d}00-{h:02d}59' for h in range(6, 24)])
+    return blocks[hour]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic Combined_Flights_2022 dataset.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--random-state', type=int, default=42)
+    args = parser.parse_args()
+    generate(args.out, args.rows, args.chunksize, args.random_state)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""Helpers for the Flight-Forecast pipeline (CIS 5450 Final Project).
+
+The notebook in ``Flight-Forecast.py`` walks through the analysis; the modules
+in this package hold the pieces of it that need to scale to the full dataset.
+"""
@@ -0,0 +1,6 @@
+"""``python -m flight_forecast``: see ``flight_forecast.cli``."""
+
+from flight_forecast.cli import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""Content-addressed cache of pipeline stage results, with LRU eviction.
+
+Changing a later cell (the PCA variance, the random forest grid) meant
+rerunning the load, outlier removal, filtering and encoding before it, since
+nothing remembered their results. ``StageCache.call`` runs a stage function
+once per distinct input and stores what it returns on disk:
+
+    cache = StageCache('stage_cache', max_bytes=20 * 2 ** 30)
+    df = cache.call('load_sample', load_parquet, parquet_dir, dropna=True, sample_size=1500000)
+    df = cache.call('outliers', outlier_filter.fit_transform, df)
+
+The key is the SHA-256 of the stage name, the function (its qualified name
+and bytecode, and the parameters of the object a method is bound to) and a
+fingerprint of every argument: the raw column buffers of DataFrames and
+arrays, the sizes and modification times of files and directories named by
+path, and the values of everything else. Rerunning with the same inputs
+loads the stored result; changing any of them (or the stage function)
+gives a new key. Changes to functions a stage calls are not seen, so bump
+the stage name (``'encode:v2'``) after editing them.
+
+DataFrames are stored as Feather (with joblib if they have sparse columns,
+which Feather can't hold), arrays as ``.npy``, tuples / lists / dicts of them
+item by item and other objects with joblib. Entries are written to a
+temporary directory and renamed into place, so an interrupted run never
+leaves a partial entry; ``evict`` deletes the temporary directories that
+crashed runs left behind. Whenever the cache grows past ``max_bytes``, the
+least recently used entries are deleted.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# Metadata file of each entry; its modification time is the entry's last use
+ENTRY_FILE = 'entry.json'
+
+# Temporary entry directories of other processes untouched for this long are from crashed runs
+STALE_TMP_SECONDS = 3600
+
+
+def fingerprint(value, digest=None):
+    """Feed ``value`` into the hash ``digest`` (a new SHA-256 if None) and return the hash."""
+    digest = digest if digest is not None else hashlib.sha256()
+    update = digest.update
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        update(repr((type(value).__name__, value)).encode())
+    elif isinstance(value, str):
+        update(b'str')
+        update(value.encode())
+        # Paths of inputs (the CSV, the Parquet dataset) stand for their files
+        if os.path.exists(value):
+            update(_path_signature(value).encode())
+    elif isinstance(value, bytes):
+        update(b'bytes')
+        update(value)
+    elif isinstance(value, pd.DataFrame):
+        update(b'DataFrame')
+        _index_fingerprint(value.index, digest)
+        for i, col in enumerate(value.columns):
+            update(repr(col).encode())
+            _array_fingerprint(value.iloc[:, i].array, digest)
+    elif isinstance(value, pd.Series):
+        update(b'Series')
+        update(repr(value.name).encode())
+        _index_fingerprint(value.index, digest)
+        _array_fingerprint(value.array, digest)
+    elif isinstance(value, np.ndarray):
+        _array_fingerprint(value, digest)
+    elif isinstance(value, (list, tuple)):
+        update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            fingerprint(item, digest)
+    elif isinstance(value, dict):
+        update(f'dict{len(value)}'.encode())
+        for key in sorted(value, key=repr):
+            fingerprint(key, digest)
+            fingerprint(value[key], digest)
+    elif hasattr(value, '__code__') or hasattr(value, '__func__'):
+        _function_fingerprint(value, digest)
+    elif hasattr(value, '__dict__'):
+        # Estimators and the pipeline's classes: their class and (unfitted) parameters
+        update(f'{type(value).__module__}.{type(value).__qualname__}'.encode())
+        fingerprint(_params(value), digest)
+    else:
+        update(pickle.dumps(value, protocol=4))
+    return digest
+
+
+def _params(obj):
+    if hasattr(obj, 'get_params'):
+        return obj.get_params(deep=False)
+    # Fitted state ends with an underscore (scaler_, vocabularies_), parameters don't
+    return {key: value for key, value in vars(obj).items() if not key.endswith('_')}
+
+
+def _function_fingerprint(fn, digest):
+    if hasattr(fn, '__func__'):  # bound method
+        fingerprint(fn.__self__, digest)
+        fn = fn.__func__
+    digest.update(f'{getattr(fn, "__module__", None)}.{getattr(fn, "__qualname__", repr(fn))}'.encode())
+    code = getattr(fn, '__code__', None)
+    if code is None:  # builtins
+        return
+    _code_fingerprint(code, digest)
+    fingerprint(fn.__defaults__, digest)
+    fingerprint(fn.__kwdefaults__, digest)
+    for cell in fn.__closure__ or ():
+        fingerprint(cell.cell_contents, digest)
+
+
+def _code_fingerprint(code, digest):
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        # Nested functions and comprehensions; their repr holds a memory address
+        if hasattr(const, 'co_code'):
+            _code_fingerprint(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def _index_fingerprint(index, digest):
+    if isinstance(index, pd.RangeIndex):
+        digest.update(repr(('RangeIndex', index.start, index.stop, index.step)).encode())
+    else:
+        _array_fingerprint(index.array, digest)
+
+
+def _array_fingerprint(values, digest):
+    """Hash the dtype, shape and raw buffer of an array (the codes and categories of a categorical)."""
+    if isinstance(values, pd.Categorical):
+        _array_fingerprint(np.asarray(values.categories), digest)
+        values = values.codes
+    digest.update(str(values.dtype).encode())
+    values = np.asarray(values)
+    if values.dtype == object:
+        # Strings (and nullable extension types): pandas' vectorized hash of the values
+        values = pd.util.hash_array(values)
+    digest.update(repr(values.shape).encode())
+    digest.update(np.ascontiguousarray(values).data)
+
+
+def _path_signature(path):
+    """Sizes and modification times of a file or of every file under a directory."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return f'{stat.st_size}:{stat.st_mtime_ns}'
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            entries.append(f'{os.path.relpath(os.path.join(root, name), path)}:{stat.st_size}:{stat.st_mtime_ns}')
+    return '\n'.join(entries)
+
+
+class StageCache:
+    """Stage results on disk under ``directory``, keyed by their inputs; see the module docstring.
+
+    ``max_bytes`` is the disk budget (None for no limit). With
+    ``mmap_mode='r'`` cached arrays are memory-mapped instead of read. A
+    disabled cache runs every stage. ``hits`` and ``misses`` count the calls of this instance.
+    """
+
+    def __init__(self, directory, max_bytes=10 * 2 ** 30, mmap_mode=None, enabled=True, verbose=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self.enabled = enabled
+        self.verbose = verbose
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # A smaller budget than last time applies right away
+        if enabled:
+            self.evict()
+
+    def key(self, stage, fn, *args, **kwargs):
+        """Hex SHA-256 of the stage name, the function and its arguments."""
+        digest = hashlib.sha256(stage.encode())
+        _function_fingerprint(fn, digest)
+        fingerprint(args, digest)
+        fingerprint(kwargs, digest)
+        return digest.hexdigest()
+
+    def call(self, stage, fn, *args, **kwargs):
+        """``fn(*args, **kwargs)``, loaded from the cache if this stage already ran on the same inputs."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        key = self.key(stage, fn, *args, **kwargs)
+        entry = os.path.join(self.directory, key)
+        if os.path.exists(os.path.join(entry, ENTRY_FILE)):
+            value = self._load_entry(entry)
+            self.hits += 1
+            self._log(f'{stage}: loaded {key[:12]} in {time.perf_counter() - start:.2f} s')
+            return value
+
+        self.misses += 1
+        value = fn(*args, **kwargs)
+        size = self._store_entry(entry, stage, value)
+        self._log(f'{stage}: stored {key[:12]} ({size / 2 ** 20:,.1f} MB)')
+        self.evict()
+        return value
+
+    def entries(self):
+        """DataFrame of the cached entries, most recently used first."""
+        rows = []
+        for key in os.listdir(self.directory):
+            if '.tmp-' in key:
+                continue  # still being written, or left by a crashed run (see evict)
+            meta_path = os.path.join(self.directory, key, ENTRY_FILE)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                last_used = os.stat(meta_path).st_mtime
+            except (OSError, ValueError):
+                continue
+            rows.append({'key': key, 'stage': meta['stage'], 'bytes': meta['bytes'],
+                         'created': meta['created'], 'last_used': last_used})
+        frame = pd.DataFrame(rows, columns=['key', 'stage', 'bytes', 'created', 'last_used'])
+        return frame.sort_values('last_used', ascending=False, ignore_index=True)
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits in ``max_bytes``; returns their keys.
+
+        Leftover temporary directories (``<key>.tmp-<pid>``) of crashed runs
+        are deleted too.
+        """
+        self._remove_stale_tmp()
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return []
+        entries = self.entries()
+        # Keep the most recent entries that fit in the budget together
+        keep = entries['bytes'].cumsum() <= max_bytes
+        evicted = list(entries.loc[~keep, 'key'])
+        for key in evicted:
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            self._log(f'evicted {key[:12]}')
+        return evicted
+
+    def clear(self):
+        return self.evict(0)
+
+    def _remove_stale_tmp(self):
+        now = time.time()
+        for name in os.listdir(self.directory):
+            key, _, pid = name.partition('.tmp-')
+            if not pid or pid == str(os.getpid()):
+                continue
+            tmp = os.path.join(self.directory, name)
+            try:
+                if now - os.stat(tmp).st_mtime < STALE_TMP_SECONDS:
+                    continue  # probably another process still writing it
+            except OSError:
+                continue
+            shutil.rmtree(tmp, ignore_errors=True)
+            self._log(f'removed unfinished {key[:12]} of process {pid}')
+
+    def _log(self, message):
+        if self.verbose:
+            print(f'[cache] {message}')
+
+    def _store_entry(self, entry, stage, value):
+        tmp = f'{entry}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            layout = _store(tmp, 'value', value)
+            size = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, files in os.walk(tmp) for name in files)
+            with open(os.path.join(tmp, ENTRY_FILE), 'w') as f:
+                json.dump({'stage': stage, 'created': time.time(), 'bytes': size, 'layout': layout}, f)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Stored meanwhile by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+        return size
+
+    def _load_entry(self, entry):
+        meta_path = os.path.join(entry, ENTRY_FILE)
+        with open(meta_path) as f:
+            layout = json.load(f)['layout']
+        # Mark as recently used for the LRU order
+        os.utime(meta_path)
+        return _load(entry, layout, self.mmap_mode)
+
+
+def _store(directory, name, value):
+    """Write ``value`` under ``directory``; returns the layout ``_load`` reads it back with."""
+    path = os.path.join(directory, name)
+    if (isinstance(value, pd.DataFrame) and all(isinstance(col, str) for col in value.columns)
+            and not any(isinstance(dtype, pd.SparseDtype) for dtype in value.dtypes)):
+        # Feather has no index, so any other than 0, 1, 2, ... is stored as columns
+        index = names = None
+        if not (isinstance(value.index, pd.RangeIndex) and value.index.start == 0 and value.index.step == 1):
+            index = [f'__index_{i}__' for i in range(value.index.nlevels)]
+            names = list(value.index.names)
+            value = value.rename_axis(index).reset_index()
+        value.to_feather(f'{path}.feather')
+        return {'kind': 'frame', 'name': name, 'index': index, 'index_names': names}
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        np.save(f'{path}.npy', value)
+        return {'kind': 'array', 'name': name}
+    if isinstance(value, (list, tuple)):
+        return {'kind': type(value).__name__,
+                'items': [_store(directory, f'{name}.{i}', item) for i, item in enumerate(value)]}
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {'kind': 'dict', 'items': {key: _store(directory, f'{name}.{i}', item)
+                                          for i, (key, item) in enumerate(value.items())}}
+    from joblib import dump
+    dump(value, f'{path}.joblib')
+    return {'kind': 'object', 'name': name}
+
+
+def _load(directory, layout, mmap_mode=None):
+    kind = layout['kind']
+    if kind in ('list', 'tuple'):
+        items = [_load(directory, item, mmap_mode) for item in layout['items']]
+        return tuple(items) if kind == 'tuple' else items
+    if kind == 'dict':
+        return {key: _load(directory, item, mmap_mode) for key, item in layout['items'].items()}
+    path = os.path.join(directory, layout['name'])
+    if kind == 'frame':
+        frame = pd.read_feather(f'{path}.feather')
+        if layout['index']:
+            frame = frame.set_index(layout['index'])
+            frame.index.names = layout['index_names']
+        return frame
+    if kind == 'array':
+        return np.load(f'{path}.npy', mmap_mode=mmap_mode)
+    from joblib import load
+    return load(f'{path}.joblib')
@@ -0,0 +1,395 @@
+"""Command-line entry point: run the notebook's stages outside Colab.
+
+``Flight-Forecast.py`` imports plotly, seaborn, matplotlib, torch, IPython and
+``google.colab`` up front and reads everything from a mounted Google Drive,
+so even a prediction pays seconds of imports and only runs on Colab. The
+stages are here as subcommands that read and write plain local files:
+
+    python -m flight_forecast ingest                # CSV -> Parquet -> cleaned, encoded features
+    python -m flight_forecast train --model rf      # or lr, nn, hgb
+    python -m flight_forecast predict --model rf --input flights.csv --output predictions.csv
+    python -m flight_forecast report --plots        # metrics of every trained model
+
+Every file lives in the data directory (``--data-dir``, else the
+``FLIGHT_FORECAST_DATA_DIR`` environment variable, else the current
+directory) under the names the notebook uses on Drive; the flight and airline
+CSVs can be given separately. Each command imports only the modules it
+needs when it runs, so ``predict`` with the compact random forest never
+loads torch, matplotlib or plotly. ``--profile`` records every stage with
+``flight_forecast.profiling`` and saves ``profile_<command>.json`` next to
+the data. ``ingest`` caches the result of each step in ``stage_cache``
+(``flight_forecast.cache``), so rerunning it with other PCA settings only
+refits the features.
+"""
+
+import argparse
+import os
+
+DATA_DIR_ENV = 'FLIGHT_FORECAST_DATA_DIR'
+
+# File names in the data directory, as in the notebook
+FLIGHTS_FILE = 'Combined_Flights_2022.csv'
+AIRLINES_FILE = 'Airlines.csv'
+PARQUET_DIR = 'Combined_Flights_2022_parquet'
+ENCODER_FILE = 'categorical_vocabularies.json'
+FEATURES_DIR = 'feature_pipeline'
+MODEL_FILES = {
+    'lr': 'linear_regression_model.joblib',
+    'nn': 'best_neural_network_model',
+    'rf': 'best_random_forest_model.joblib',
+    'hgb': 'gradient_boosting_model.joblib',
+}
+# export_forest directory of the random forest, preferred for predictions
+COMPACT_FOREST_DIR = 'best_random_forest_model'
+BINNED_DIR = 'binned_features'
+CACHE_DIR = 'stage_cache'
+
+MODEL_NAMES = {'lr': 'Linear Regression', 'nn': 'Neural Network', 'rf': 'Random Forest',
+               'hgb': 'Gradient Boosting'}
+
+# The notebook's random forest grid
+RF_PARAM_GRID = {
+    'n_estimators': [10, 50, 100],
+    'max_depth': [10, 20, 30],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+}
+
+
+def path(args, name):
+    return os.path.join(args.data_dir, name)
+
+
+def model_path(args, kind):
+    """Saved model of ``kind``; the compact export for the random forest when there is one."""
+    if kind == 'rf' and os.path.isdir(path(args, COMPACT_FOREST_DIR)):
+        return path(args, COMPACT_FOREST_DIR)
+    return path(args, MODEL_FILES[kind])
+
+
+def ingest(args, profiler):
+    """Load, clean and encode the flights and fit the shared feature pipeline."""
+    from flight_forecast.cache import StageCache
+    from flight_forecast.features import FeaturePipeline
+    from flight_forecast.outliers import OutlierFilter
+    from flight_forecast.store import convert_to_parquet, load_parquet
+
+    cache = StageCache(path(args, CACHE_DIR), max_bytes=args.cache_budget * 2 ** 30, enabled=args.cache)
+
+    parquet_dir = path(args, PARQUET_DIR)
+    if args.rebuild or not os.path.exists(parquet_dir):
+        with profiler.stage('convert_parquet'):
+            convert_to_parquet(args.flights or path(args, FLIGHTS_FILE),
+                               args.airlines or path(args, AIRLINES_FILE), parquet_dir)
+
+    with profiler.stage('load_sample') as stage:
+        # The sample and the outlier bounds cover all flights, as in the notebook; the state,
+        # cancelled and diverted filters come after them
+        df = cache.call('load_sample', load_parquet, parquet_dir, dropna=True, sample_size=args.sample_size,
+                        random_state=args.random_state)
+        df = stage.output(df.drop(columns=['ArrDel15', 'DepDel15']))
+
+    with profiler.stage('outliers', inputs=df) as stage:
+        df = stage.output(cache.call('outliers', OutlierFilter(lower=0.01, upper=0.99, k=1.5).fit_transform, df))
+
+    with profiler.stage('state_filter', inputs=df) as stage:
+        df = stage.output(cache.call('state_filter', _filter_states, df, args.states))
+
+    with profiler.stage('encode', inputs=df) as stage:
+        df, encoder = cache.call('encode', _encode, df)
+        stage.output(df)
+        encoder.save(path(args, ENCODER_FILE))
+
+    with profiler.stage('features', inputs=df) as stage:
+        pipeline = cache.call('features', FeaturePipeline(variance=args.variance, random_state=args.random_state).fit, df)
+        stage.output([pipeline.X_train_pca, pipeline.X_test_pca])
+        pipeline.save(path(args, FEATURES_DIR))
+    print(f'{len(df)} flights, {pipeline.reducer_.n_components_} principal components; '
+          f'saved to {path(args, FEATURES_DIR)}')
+
+
+def _filter_states(df, states):
+    from flight_forecast.slicing import FlightIndex
+    return FlightIndex(df).slice(states=states, drop_cancelled=True, drop_diverted=True)
+
+
+def _encode(df):
+    from flight_forecast.encoding import CategoricalEncoder, encode_bools
+
+    encoder = CategoricalEncoder()
+    return encode_bools(encoder.fit_transform(df)), encoder
+
+
+def train(args, profiler):
+    """Train one model on the saved feature pipeline and save it."""
+    from joblib import dump
+
+    from flight_forecast.features import FeaturePipeline
+    from flight_forecast.metrics import custom_accuracy
+
+    pipeline = FeaturePipeline.load(path(args, FEATURES_DIR))
+    # The linear regression takes the scaled features, the other models the principal components
+    if args.model == 'lr':
+        X_train, X_test = pipeline.X_train_scaled, pipeline.X_test_scaled
+    else:
+        X_train, X_test = pipeline.X_train_pca, pipeline.X_test_pca
+    y_train, y_test = pipeline.y_train, pipeline.y_test
+
+    with profiler.stage(f'train_{args.model}', inputs=[X_train, y_train]):
+        if args.model == 'lr':
+            from flight_forecast.linear import StreamingLinearRegression
+
+            model = StreamingLinearRegression().fit(X_train, y_train, chunksize=100_000)
+            dump(model, path(args, MODEL_FILES['lr']))
+        elif args.model == 'nn':
+            import torch
+
+            model = _train_nn(args, X_train, y_train)
+            torch.save(model.state_dict(), path(args, MODEL_FILES['nn']))
+        elif args.model == 'rf':
+            model = _train_rf(args, X_train, y_train)
+            from flight_forecast.forest import export_forest
+
+            dump(model, path(args, MODEL_FILES['rf']))
+            export_forest(model, path(args, COMPACT_FOREST_DIR))
+        else:
+            from flight_forecast.boosting import BinnedGradientBoosting
+
+            model = BinnedGradientBoosting(cache_dir=path(args, BINNED_DIR), max_iter=300, learning_rate=0.1,
+                                           max_leaf_nodes=63, early_stopping=False,
+                                           random_state=args.random_state).fit(X_train, y_train)
+            dump(model, path(args, MODEL_FILES['hgb']))
+
+    with profiler.stage(f'predict_{args.model}', inputs=X_test) as stage:
+        predictions = stage.output(_predict(args.model, model, X_test))
+    rmse = float(((predictions - y_test) ** 2).mean() ** 0.5)
+    print(f'{MODEL_NAMES[args.model]}: test RMSE {rmse:.4f}, '
+          f'accuracy (within ±5 mins) {custom_accuracy(y_test, predictions, 5):.4f}')
+
+
+def _train_nn(args, X_train, y_train):
+    """The notebook's training loop: Adam, a held-out validation sample and early stopping."""
+    import torch
+    import torch.nn as nn
+
+    from flight_forecast.nn import (BatchIterator, EarlyStopping, Evaluator, NeuralNet, holdout, scaled_lr, train_epoch,
+                                   warmup)
+
+    torch.manual_seed(args.random_state)
+    # Copies of the read-only memory maps
+    X_train = torch.tensor(X_train, dtype=torch.float32)
+    y_train = torch.tensor(y_train, dtype=torch.float32).view(-1, 1)
+    X_fit, y_fit, X_val, y_val = holdout(X_train, y_train, size=min(50_000, len(X_train) // 5))
+
+    model = NeuralNet(X_train.shape[1])
+    batches = BatchIterator(X_fit, y_fit, batch_size=args.batch_size,
+                            generator=torch.Generator().manual_seed(args.random_state))
+    rule = None if args.lr_rule == 'none' else args.lr_rule
+    optimizer = torch.optim.Adam(model.parameters(), lr=scaled_lr(args.lr, args.batch_size, rule=rule))
+    scheduler = warmup(optimizer, args.warmup_epochs * len(batches)) if args.warmup_epochs else None
+    criterion = nn.MSELoss()
+    evaluator = Evaluator(X_val, y_val, criterion, threshold=5)
+    early_stopping = EarlyStopping(patience=args.patience, min_delta=0.01)
+    for epoch in range(args.epochs):
+        train_loss, train_acc = train_epoch(model, optimizer, criterion, batches, threshold=5,
+                                                scheduler=scheduler)
+        val_loss, val_acc = evaluator.evaluate(model)
+        print(f'Epoch [{epoch+1}/{args.epochs}], Train Loss: {train_loss:.4f}, Train Acc: {train_acc:.4f}, '
+              f'Val Loss: {val_loss:.4f}, Val Acc: {val_acc:.4f}')
+        if early_stopping.step(val_loss, model, epoch):
+            print(f'Stopping early, best validation loss {early_stopping.best_loss:.4f} '
+                  f'after epoch {early_stopping.best_epoch+1}')
+            break
+    early_stopping.restore(model)
+    model.eval()
+    return model
+
+
+def _train_rf(args, X_train, y_train):
+    from sklearn.ensemble import RandomForestRegressor
+
+    rf = RandomForestRegressor(random_state=args.random_state, n_jobs=args.n_jobs)
+    if not args.search:
+        return rf.set_params(n_estimators=args.n_estimators, max_depth=args.max_depth).fit(X_train, y_train)
+
+    from flight_forecast.search import HalvingForestSearch
+
+    search = HalvingForestSearch(estimator=rf, param_grid=RF_PARAM_GRID, cv=3, factor=3, verbose=1,
+                                 n_jobs=args.n_jobs, random_state=args.random_state)
+    search.fit(X_train, y_train)
+    print('Best model parameters:', search.best_params_)
+    return search.best_estimator_
+
+
+def _predict(kind, model, X):
+    import numpy as np
+
+    if kind == 'nn':
+        from flight_forecast.quantization import predict
+        # torch wants a writable array, not the read-only memory map
+        return predict(model, np.array(X, dtype=np.float32)).numpy().ravel()
+    return np.asarray(model.predict(X), dtype=np.float64).ravel()
+
+
+def predict(args, profiler):
+    """Predict the arrival delays of the flights in a CSV, Parquet or JSON file."""
+    import pandas as pd
+
+    from flight_forecast.serve import Predictor
+
+    with profiler.stage('load_model'):
+        predictor = Predictor.load(args.model, args.model_path or model_path(args, args.model),
+                                   path(args, ENCODER_FILE), path(args, FEATURES_DIR))
+
+    with profiler.stage('read_input') as stage:
+        if args.input.endswith('.parquet'):
+            df = pd.read_parquet(args.input)
+        elif args.input.endswith('.json'):
+            df = pd.read_json(args.input, orient='records')
+        else:
+            df = pd.read_csv(args.input)
+        stage.output(df)
+
+    with profiler.stage(f'predict_{args.model}', inputs=df) as stage:
+        df['PredictedArrDelay'] = stage.output(predictor.predict_frame(df))
+
+    columns = [col for col in args.keep if col in df.columns] + ['PredictedArrDelay']
+    if args.output:
+        df[columns].to_csv(args.output, index=False)
+        print(f'Wrote {len(df)} predictions to {args.output}')
+    else:
+        print(df[columns].to_csv(index=False), end='')
+
+
+def report(args, profiler):
+    """Test-set metrics (and plots) of every trained model."""
+    from flight_forecast.features import FeaturePipeline
+    from flight_forecast.metrics import evaluate
+
+    pipeline = FeaturePipeline.load(path(args, FEATURES_DIR))
+    predictions = {}
+    for kind in args.models or list(MODEL_FILES):
+        if not os.path.exists(model_path(args, kind)):
+            continue
+        X_test = pipeline.X_test_scaled if kind == 'lr' else pipeline.X_test_pca
+        with profiler.stage(f'predict_{kind}', inputs=X_test) as stage:
+            predictions[MODEL_NAMES[kind]] = stage.output(_predict(kind, _load_model(args, kind, pipeline), X_test))
+    if not predictions:
+        raise SystemExit(f'No trained models in {args.data_dir}; run "train" first')
+
+    with profiler.stage('metrics', inputs=pipeline.y_test):
+        if args.bootstrap:
+            results, intervals = evaluate(pipeline.y_test, predictions, thresholds=[5, 15],
+                                          n_bootstrap=args.bootstrap, random_state=args.random_state)
+            intervals.columns = [f'{metric}_{bound}' for metric, bound in intervals.columns]
+            results = results.join(intervals)
+        else:
+            results = evaluate(pipeline.y_test, predictions, thresholds=[5, 15])
+    print(results.to_string(float_format='{:.4f}'.format))
+    results.to_csv(path(args, 'report.csv'), index_label='model')
+
+    if args.plots:
+        with profiler.stage('plots'):
+            _plot(args, pipeline.y_test, predictions)
+
+
+def _load_model(args, kind, pipeline):
+    if kind == 'nn':
+        import torch
+
+        from flight_forecast.nn import NeuralNet
+
+        model = NeuralNet(pipeline.reducer_.n_components_)
+        model.load_state_dict(torch.load(model_path(args, 'nn')))
+        return model.eval()
+    if kind == 'rf' and os.path.isdir(model_path(args, 'rf')):
+        from flight_forecast.forest import load_forest
+        return load_forest(model_path(args, 'rf'))
+    from joblib import load
+    return load(model_path(args, kind))
+
+
+def _plot(args, y_test, predictions):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from flight_forecast import plotting
+
+    for name, plot in (('predictions', plotting.plot_predictions), ('residuals', plotting.plot_residuals)):
+        fig, axes = plt.subplots(1, len(predictions), figsize=(5 * len(predictions), 5), squeeze=False)
+        for ax, (model, values) in zip(axes[0], predictions.items()):
+            plot(ax, y_test, values)
+            ax.set_title(model)
+        fig.tight_layout()
+        fig.savefig(path(args, f'report_{name}.png'))
+        plt.close(fig)
+    print(f'Wrote report_predictions.png and report_residuals.png to {args.data_dir}')
+
+
+COMMANDS = {'ingest': ingest, 'train': train, 'predict': predict, 'report': report}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m flight_forecast',
+                                     description='Flight arrival delay pipeline.')
+    parser.add_argument('--data-dir', default=os.environ.get(DATA_DIR_ENV, '.'),
+                        help=f'where the data and models are read and written (default ${DATA_DIR_ENV} or .)')
+    parser.add_argument('--random-state', type=int, default=42)
+    parser.add_argument('--profile', action='store_true',
+                        help='record time and memory per stage in profile_<command>.json')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='load, clean and encode flights; fit the features')
+    ingest_parser.add_argument('--flights', help=f'flights CSV (default <data-dir>/{FLIGHTS_FILE})')
+    ingest_parser.add_argument('--airlines', help=f'airlines CSV (default <data-dir>/{AIRLINES_FILE})')
+    ingest_parser.add_argument('--rebuild', action='store_true', help='convert the CSV again')
+    ingest_parser.add_argument('--states', nargs='+', default=['PA'])
+    ingest_parser.add_argument('--sample-size', type=int, default=1_500_000)
+    ingest_parser.add_argument('--variance', type=float, default=0.8, help='PCA explained variance to keep')
+    ingest_parser.add_argument('--no-cache', dest='cache', action='store_false',
+                               help=f'rerun every step instead of reusing <data-dir>/{CACHE_DIR}')
+    ingest_parser.add_argument('--cache-budget', type=float, default=10, help='stage cache size limit in GB')
+
+    train_parser = commands.add_parser('train', help='train and save a model')
+    train_parser.add_argument('--model', choices=list(MODEL_FILES), required=True)
+    train_parser.add_argument('--n-jobs', type=int, default=-1)
+    train_parser.add_argument('--no-search', dest='search', action='store_false',
+                              help='rf: fit one forest instead of searching the notebook grid')
+    train_parser.add_argument('--n-estimators', type=int, default=100)
+    train_parser.add_argument('--max-depth', type=int, default=20)
+    train_parser.add_argument('--epochs', type=int, default=25)
+    train_parser.add_argument('--batch-size', type=int, default=1024)
+    train_parser.add_argument('--patience', type=int, default=5)
+    train_parser.add_argument('--lr', type=float, default=0.01, help='network learning rate at batch size 20')
+    train_parser.add_argument('--lr-rule', choices=['none', 'sqrt', 'linear'], default='none',
+                              help='scale --lr from batch size 20 to --batch-size')
+    train_parser.add_argument('--warmup-epochs', type=int, default=0,
+                              help='ramp the learning rate up over this many epochs')
+
+    predict_parser = commands.add_parser('predict', help='predict arrival delays of new flights')
+    predict_parser.add_argument('--model', choices=list(MODEL_FILES), default='rf')
+    predict_parser.add_argument('--model-path', help='saved model (default: the one in the data dir)')
+    predict_parser.add_argument('--input', required=True, help='flights as CSV, Parquet or JSON records')
+    predict_parser.add_argument('--output', help='CSV to write (default stdout)')
+    predict_parser.add_argument('--keep', nargs='*', default=['FlightDate', 'Airline', 'Origin', 'Dest'],
+                                help='input columns copied to the output')
+
+    report_parser = commands.add_parser('report', help='compare the trained models on the test set')
+    report_parser.add_argument('--models', nargs='+', choices=list(MODEL_FILES))
+    report_parser.add_argument('--bootstrap', type=int, default=200,
+                               help='bootstrap replicates for 95%% confidence intervals (0 for none)')
+    report_parser.add_argument('--plots', action='store_true', help='save prediction and residual plots')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    from flight_forecast.profiling import Profiler
+
+    profiler = Profiler(verbose=True, enabled=args.profile)
+    COMMANDS[args.command](args, profiler)
+    if args.profile:
+        profiler.save(path(args, f'profile_{args.command}.json'), argv=vars(args))
@@ -0,0 +1,82 @@
+"""Correlations of every feature with one or a few target columns.
+
+``df.corr()`` computes every column pair only for us to read the ``ArrDelay``
+column. ``CorrelationAccumulator`` computes just the feature-vs-target
+correlations, with a handful of matrix products per chunk. It keeps only the
+sums needed for Pearson's r, so it can be updated chunk by chunk over data
+that never fits in memory at once, and gives the same numbers as
+``df.corr()`` (pairwise-complete, so nulls are skipped per pair).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CorrelationAccumulator:
+    """Running Pearson correlations of ``columns`` against ``targets``.
+
+    ``columns=None`` uses every numeric or boolean column of the first chunk,
+    targets included (their self-correlation is 1).
+    """
+
+    def __init__(self, targets='ArrDelay', columns=None):
+        self.targets = [targets] if isinstance(targets, str) else list(targets)
+        self.columns = columns
+
+    def update(self, df):
+        """Add the rows of ``df`` to the running sums."""
+        if not hasattr(self, 'n_'):
+            self.columns_ = (list(self.columns) if self.columns is not None else
+                             df.select_dtypes(include=['number', 'bool']).columns.tolist())
+            shape = (len(self.columns_), len(self.targets))
+            self.n_, self._sx, self._sy = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+            self._sxx, self._syy, self._sxy = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+            # Sums are taken around the first chunk's means to keep them well conditioned
+            with np.errstate(all='ignore'):
+                self._shift_x = np.nan_to_num(np.nanmean(_values(df, self.columns_), axis=0))
+                self._shift_y = np.nan_to_num(np.nanmean(_values(df, self.targets), axis=0))
+
+        x = _values(df, self.columns_) - self._shift_x
+        y = _values(df, self.targets) - self._shift_y
+        x_valid, y_valid = ~np.isnan(x), ~np.isnan(y)
+        x, y = np.where(x_valid, x, 0), np.where(y_valid, y, 0)
+        x_valid, y_valid = x_valid.astype(np.float64), y_valid.astype(np.float64)
+
+        # Each sum only counts rows where both the feature and the target are present
+        self.n_ += x_valid.T @ y_valid
+        self._sx += x.T @ y_valid
+        self._sy += x_valid.T @ y
+        self._sxx += (x * x).T @ y_valid
+        self._syy += x_valid.T @ (y * y)
+        self._sxy += x.T @ y
+        return self
+
+    def correlations(self):
+        """DataFrame of correlations, one row per feature and one column per target."""
+        with np.errstate(all='ignore'):
+            cov = self._sxy - self._sx * self._sy / self.n_
+            var_x = self._sxx - self._sx ** 2 / self.n_
+            var_y = self._syy - self._sy ** 2 / self.n_
+            r = cov / np.sqrt(var_x * var_y)
+        return pd.DataFrame(np.clip(r, -1, 1), index=self.columns_, columns=self.targets)
+
+    def top_k(self, k=10, target=None, exclude=()):
+        """The ``k`` features most correlated with ``target`` (by absolute value).
+
+        ``target`` defaults to the first target. The targets themselves and the
+        ``exclude`` columns are left out; features without a correlation (e.g.
+        constant columns) are skipped.
+        """
+        target = self.targets[0] if target is None else target
+        r = self.correlations()[target]
+        r = r.drop(self.targets + list(exclude), errors='ignore').dropna()
+        return r.loc[r.abs().sort_values(ascending=False).index[:k]]
+
+
+def target_correlations(df, targets='ArrDelay', columns=None):
+    """Correlations of the columns of ``df`` with ``targets`` in one pass."""
+    return CorrelationAccumulator(targets, columns).update(df).correlations()
+
+
+def _values(df, columns):
+    return df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
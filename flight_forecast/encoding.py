@@ -0,0 +1,120 @@
+"""Integer encoding of the text and boolean columns.
+
+Every text (object or categorical) column is mapped to positions in a sorted
+vocabulary. Sorting makes the codes independent of row order, and saving the
+vocabularies next to the models lets new flights be encoded the same way at
+prediction time. Values missing from a vocabulary get the ``UNKNOWN`` code.
+
+Boolean columns are one-hot encoded by ``encode_bools`` into one-byte (or
+sparse) indicator columns in place, rather than a float64 matrix joined back
+onto the frame.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+# Code for values that are not in a column's vocabulary (including nulls)
+UNKNOWN = -1
+
+
+class CategoricalEncoder:
+    """Encode text columns as int16 / int32 codes against fitted vocabularies.
+
+    ``columns=None`` encodes every object, string or categorical column of the
+    frame passed to ``fit``.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = columns
+
+    def fit(self, df):
+        columns = self.columns
+        if columns is None:
+            columns = [col for col in df.columns if _is_text(df[col])]
+        self.vocabularies_ = {}
+        for col in columns:
+            values = df[col].dropna().unique()
+            self.vocabularies_[col] = sorted(str(value) for value in values)
+        return self
+
+    def transform(self, df):
+        """Return a copy of ``df`` with its vocabulary columns replaced by codes."""
+        df = df.copy(deep=False)
+        for col in self.vocabularies_:
+            if col in df.columns:
+                df[col] = self.encode(col, df[col])
+        return df
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def encode(self, col, values):
+        """Codes of ``values`` in the vocabulary of ``col``, as a NumPy array.
+
+        Only the distinct values are looked up; every row is then encoded with
+        one array take, so the cost per row is independent of the vocabulary.
+        """
+        vocabulary = pd.Index(self.vocabularies_[col])
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        # Row code -1 (null) picks the UNKNOWN appended at the end
+        lookup = np.append(vocabulary.get_indexer(uniques.astype(str)), UNKNOWN)
+        return lookup[codes].astype(_code_dtype(len(vocabulary)))
+
+    def decode(self, col, codes):
+        """Original values for ``codes`` of ``col`` (``None`` for UNKNOWN)."""
+        vocabulary = np.array(self.vocabularies_[col] + [None], dtype=object)
+        return vocabulary[np.asarray(codes)]
+
+    def save(self, path):
+        """Write the vocabularies to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.vocabularies_, f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an encoder saved with ``save``."""
+        with open(path) as f:
+            vocabularies = json.load(f)
+        encoder = cls(columns=list(vocabularies))
+        encoder.vocabularies_ = vocabularies
+        return encoder
+
+
+def encode_bools(df, columns=None, sparse=False):
+    """One-hot encode boolean columns like ``OneHotEncoder(drop='first')``.
+
+    Each column with both values is replaced by a uint8 ``<col>_True`` column
+    at the end of the frame; a column holding a single value carries no
+    information and is dropped, as the dropped first category would leave it
+    empty. The uint8 column is a view of the bool data, so nothing is copied.
+    With ``sparse=True`` the indicators are stored as pandas sparse arrays,
+    which only keep the positions of the ones.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include='bool').columns.tolist()
+    df = df.copy(deep=False)
+    for col in columns:
+        values = df.pop(col).to_numpy(dtype=bool)
+        if values.all() or not values.any():
+            continue
+        indicator = values.view(np.uint8)
+        if sparse:
+            indicator = pd.arrays.SparseArray(indicator, fill_value=0)
+        df[f'{col}_True'] = indicator
+    return df
+
+
+def _is_text(series):
+    return (isinstance(series.dtype, pd.CategoricalDtype)
+            or pd.api.types.is_object_dtype(series.dtype)
+            or pd.api.types.is_string_dtype(series.dtype))
+
+
+def _code_dtype(size):
+    return np.int16 if size < np.iinfo(np.int16).max else np.int32
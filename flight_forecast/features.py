@@ -0,0 +1,106 @@
+"""The feature preparation shared by the linear regression, NN and random forest.
+
+Every model section of the notebook used to redo the same steps: select the
+top 10 features, split 80/20, fit a ``StandardScaler`` and fit a PCA.
+``FeaturePipeline`` fits them once (the PCA through ``Reducer``, which picks
+the number of components itself), saves the fitted state, and caches the
+prepared train/test matrices as float32 ``.npy`` files that later runs (and
+other processes) memory-map instead of recomputing.
+"""
+
+import os
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from flight_forecast.reduction import Reducer
+
+# Top 10 features from df (without redundancy), see the feature importance section
+FEATURES = ['ArrivalDelayGroups', 'DepDelay', 'TaxiOut', 'DepTime', 'WheelsOff', 'TaxiIn',
+            'CRSDepTime', 'CRSArrTime', 'Marketing_Airline_Network', 'IATA_Code_Marketing_Airline']
+TARGET = 'ArrDelay'
+
+# Matrices cached by save() and memory-mapped by load()
+ARRAYS = ['X_train_scaled', 'X_test_scaled', 'X_train_pca', 'X_test_pca', 'y_train', 'y_test']
+
+
+class FeaturePipeline:
+    """Fill, split, scale and PCA the model features, once for every model.
+
+    After ``fit`` (or ``load``) the prepared data is available as attributes:
+    ``X_train_scaled`` / ``X_test_scaled`` (standardized features, used by the
+    linear regression), ``X_train_pca`` / ``X_test_pca`` (their leading
+    principal components, used by the NN and random forest) and ``y_train`` /
+    ``y_test``, all float32. The number of components is ``n_components`` if
+    given, else the fewest that explain ``variance`` of the training variance.
+    """
+
+    def __init__(self, features=FEATURES, target=TARGET, variance=0.8, n_components=None,
+                 test_size=0.2, random_state=42):
+        self.features = list(features)
+        self.target = target
+        self.variance = variance
+        self.n_components = n_components
+        self.test_size = test_size
+        self.random_state = random_state
+
+    def fit(self, df):
+        X = df[self.features]
+        y = df[self.target]
+
+        # Handling missing values
+        self.fill_values_ = X.mean()
+        X = X.fillna(self.fill_values_)
+        y = y.fillna(y.mean())
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=self.test_size, random_state=self.random_state)
+
+        self.scaler_ = StandardScaler().fit(X_train)
+        self.X_train_scaled = _float32(self.scaler_.transform(X_train))
+        self.X_test_scaled = _float32(self.scaler_.transform(X_test))
+
+        # One PCA fit gives both the explained variance plot and the projection
+        self.reducer_ = Reducer(self.variance, self.n_components).fit(self.X_train_scaled)
+        self.explained_variance_ratio_ = self.reducer_.explained_variance_ratio_
+        self.X_train_pca = _float32(self.reducer_.transform(self.X_train_scaled))
+        self.X_test_pca = _float32(self.reducer_.transform(self.X_test_scaled))
+
+        self.y_train = _float32(y_train)
+        self.y_test = _float32(y_test)
+        return self
+
+    def scale(self, X):
+        """Standardized features for new rows (a DataFrame with ``features``)."""
+        X = X[self.features].fillna(self.fill_values_)
+        return _float32(self.scaler_.transform(X))
+
+    def transform(self, X):
+        """Principal components for new rows (a DataFrame with ``features``)."""
+        return _float32(self.reducer_.transform(self.scale(X)))
+
+    def save(self, directory):
+        """Save the fitted state and the prepared matrices to ``directory``."""
+        from joblib import dump
+
+        os.makedirs(directory, exist_ok=True)
+        state = {key: value for key, value in vars(self).items() if key not in ARRAYS}
+        dump(state, os.path.join(directory, 'pipeline.joblib'))
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a pipeline saved with ``save``; the matrices are memory-mapped."""
+        from joblib import load
+
+        pipeline = cls.__new__(cls)
+        vars(pipeline).update(load(os.path.join(directory, 'pipeline.joblib')))
+        for name in ARRAYS:
+            setattr(pipeline, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode))
+        return pipeline
+
+
+def _float32(values):
+    return np.ascontiguousarray(values, dtype=np.float32)
@@ -0,0 +1,189 @@
+"""Chunked, schema-driven loading of the Combined_Flights CSV files.
+
+Reading ``Combined_Flights_2022.csv`` in one go with default dtypes needs
+several times the memory of the rows we actually keep. The loader here reads
+the file in chunks with an explicit schema, applies the state / cancelled /
+diverted filter and the null-dropping to every chunk, and only keeps what
+survives, so peak memory follows the size of the filtered result.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Column types for Combined_Flights_20XX.csv. Strings are read as categoricals
+# and numbers are downcast to the smallest type that holds their range.
+FLIGHTS_SCHEMA = {
+    'FlightDate': 'category',
+    'Airline': 'category',
+    'Origin': 'category',
+    'Dest': 'category',
+    'Cancelled': 'bool',
+    'Diverted': 'bool',
+    'CRSDepTime': 'int16',
+    'DepTime': 'float32',
+    'DepDelayMinutes': 'float32',
+    'DepDelay': 'float32',
+    'ArrTime': 'float32',
+    'ArrDelayMinutes': 'float32',
+    'AirTime': 'float32',
+    'CRSElapsedTime': 'float32',
+    'ActualElapsedTime': 'float32',
+    'Distance': 'float32',
+    'Year': 'int16',
+    'Quarter': 'int8',
+    'Month': 'int8',
+    'DayofMonth': 'int8',
+    'DayOfWeek': 'int8',
+    'Marketing_Airline_Network': 'category',
+    'Operated_or_Branded_Code_Share_Partners': 'category',
+    'DOT_ID_Marketing_Airline': 'int16',
+    'IATA_Code_Marketing_Airline': 'category',
+    'Flight_Number_Marketing_Airline': 'int16',
+    'Operating_Airline': 'category',
+    'DOT_ID_Operating_Airline': 'int16',
+    'IATA_Code_Operating_Airline': 'category',
+    'Tail_Number': 'category',
+    'Flight_Number_Operating_Airline': 'int16',
+    'OriginAirportID': 'int16',
+    'OriginAirportSeqID': 'int32',
+    'OriginCityMarketID': 'int32',
+    'OriginCityName': 'category',
+    'OriginState': 'category',
+    'OriginStateFips': 'int8',
+    'OriginStateName': 'category',
+    'OriginWac': 'int8',
+    'DestAirportID': 'int16',
+    'DestAirportSeqID': 'int32',
+    'DestCityMarketID': 'int32',
+    'DestCityName': 'category',
+    'DestState': 'category',
+    'DestStateFips': 'int8',
+    'DestStateName': 'category',
+    'DestWac': 'int8',
+    'DepDel15': 'float32',
+    'DepartureDelayGroups': 'float32',
+    'DepTimeBlk': 'category',
+    'TaxiOut': 'float32',
+    'WheelsOff': 'float32',
+    'WheelsOn': 'float32',
+    'TaxiIn': 'float32',
+    'CRSArrTime': 'int16',
+    'ArrDelay': 'float32',
+    'ArrDel15': 'float32',
+    'ArrivalDelayGroups': 'float32',
+    'ArrTimeBlk': 'category',
+    'DistanceGroup': 'int8',
+    'DivAirportLandings': 'float32',
+}
+
+# Column types for Airlines.csv
+AIRLINES_SCHEMA = {
+    'Code': 'category',
+    'Description': 'category',
+}
+
+
+def load_airlines(path):
+    """Read Airlines.csv, renaming ``Description`` to ``Airline`` for the join."""
+    df_airlines = pd.read_csv(path, dtype=AIRLINES_SCHEMA)
+    return df_airlines.rename(columns={'Description': 'Airline'})
+
+
+def filter_flights(df, states=None, drop_cancelled=True, drop_diverted=True):
+    """Keep flights touching ``states`` that were neither cancelled nor diverted.
+
+    This is the same predicate as the notebook's
+    ``(OriginState = 'PA' OR DestState = 'PA') AND NOT Cancelled AND NOT Diverted``
+    query. ``states=None`` keeps every state.
+    """
+    mask = pd.Series(True, index=df.index)
+    if states is not None:
+        mask &= df['OriginState'].isin(states) | df['DestState'].isin(states)
+    if drop_cancelled:
+        mask &= ~df['Cancelled']
+    if drop_diverted:
+        mask &= ~df['Diverted']
+    return df[mask]
+
+
+def iter_flights(path, airlines_path=None, states=None, drop_cancelled=True,
+                 drop_diverted=True, dropna=True, usecols=None, chunksize=500_000):
+    """Yield filtered (and optionally airline-merged) chunks of a flights CSV.
+
+    Every chunk is read with ``FLIGHTS_SCHEMA``, filtered with
+    ``filter_flights``, inner-joined with Airlines.csv when ``airlines_path`` is
+    given and stripped of rows containing nulls, so nothing that would be thrown
+    away later is kept around.
+    """
+    usecols = list(usecols) if usecols is not None else list(FLIGHTS_SCHEMA)
+    filter_cols = []
+    if states is not None:
+        filter_cols += ['OriginState', 'DestState']
+    if drop_cancelled:
+        filter_cols.append('Cancelled')
+    if drop_diverted:
+        filter_cols.append('Diverted')
+    readcols = usecols + [col for col in filter_cols if col not in usecols]
+    if airlines_path is not None and 'Airline' not in readcols:
+        readcols.append('Airline')
+    extra = [col for col in readcols if col not in usecols]
+    dtype = {col: FLIGHTS_SCHEMA[col] for col in readcols if col in FLIGHTS_SCHEMA}
+
+    df_airlines = load_airlines(airlines_path) if airlines_path is not None else None
+
+    # chunksize already bounds memory, so parse each chunk in one go instead of
+    # in low_memory pieces whose categories have to be unioned again
+    for chunk in pd.read_csv(path, usecols=readcols, dtype=dtype, chunksize=chunksize,
+                             low_memory=False):
+        chunk = filter_flights(chunk, states, drop_cancelled, drop_diverted)
+        if df_airlines is not None:
+            chunk = pd.merge(chunk, df_airlines, on='Airline', how='inner')
+        chunk = chunk.drop(columns=extra)
+        if dropna:
+            chunk = chunk.dropna()
+        yield _as_categories(chunk)
+
+
+def concat_chunks(chunks):
+    """Concatenate chunks without losing their categorical dtypes.
+
+    ``pd.concat`` falls back to ``object`` when chunks carry different category
+    sets, which would undo most of the memory savings, so the categorical
+    columns are joined with ``union_categoricals`` (one pass over all chunks,
+    categories sorted) and everything else with a single ``pd.concat``.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    columns = list(chunks[0].columns)
+    categorical = [col for col in columns if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for col in categorical:
+        df[col] = union_categoricals([chunk[col] for chunk in chunks], sort_categories=True)
+    return df[columns]
+
+
+def load_flights(path, airlines_path=None, states=None, drop_cancelled=True,
+                 drop_diverted=True, dropna=True, usecols=None, chunksize=500_000):
+    """Load a flights CSV in chunks, filtering each one before it is kept.
+
+    Takes the same arguments as ``iter_flights`` and returns a single
+    DataFrame with a fresh index.
+    """
+    return concat_chunks(iter_flights(path, airlines_path, states, drop_cancelled,
+                                      drop_diverted, dropna, usecols, chunksize))
+
+
+def _as_categories(df):
+    # Columns added by the merge come back as object; store them compactly too
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Recoding is slow; only do it when filtering left categories unused
+            codes = df[col].cat.codes.to_numpy()
+            if not np.bincount(codes[codes >= 0], minlength=len(dtype.categories)).all():
+                df[col] = df[col].cat.remove_unused_categories()
+        elif pd.api.types.is_string_dtype(dtype):
+            df[col] = df[col].astype('category')
+    return df
@@ -0,0 +1,121 @@
+"""Out-of-core linear regression from streamed sufficient statistics.
+
+``LinearRegression().fit(X_train, y_train)`` needs the whole design matrix in
+memory. The least-squares solution on standardized features only depends on
+the feature means and variances, ``X^T X`` and ``X^T y``, which can all be
+summed chunk by chunk. ``StreamingLinearRegression`` accumulates those sums and
+solves the (features x features) system once when the coefficients are first
+needed, giving the same coefficients as ``StandardScaler`` followed by
+``LinearRegression`` in bounded memory and a single pass over the data.
+"""
+
+import numpy as np
+
+from flight_forecast.features import FEATURES, TARGET
+
+
+class StreamingLinearRegression:
+    """Linear regression on standardized features, fitted with ``partial_fit``.
+
+    ``coef_`` are the coefficients of the standardized features (what the
+    notebook's coefficient plot shows) and ``mean_`` / ``scale_`` the
+    standardization, so ``predict`` takes raw features.
+    """
+
+    def __init__(self):
+        self._solution = None
+
+    def partial_fit(self, X, y):
+        """Add a chunk of rows to the running sums."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if not hasattr(self, 'n_samples_seen_'):
+            # Sums are taken around the first chunk's means to keep them well conditioned
+            self._shift_x, self._shift_y = X.mean(axis=0), y.mean()
+            self.n_samples_seen_ = 0
+            self._sx = np.zeros(X.shape[1])
+            self._sxx = np.zeros((X.shape[1], X.shape[1]))
+            self._sxy = np.zeros(X.shape[1])
+            self._sy = 0.0
+
+        X = X - self._shift_x
+        y = y - self._shift_y
+        self.n_samples_seen_ += len(X)
+        self._sx += X.sum(axis=0)
+        self._sy += y.sum()
+        self._sxx += X.T @ X
+        self._sxy += X.T @ y
+        self._solution = None
+        return self
+
+    def fit(self, X, y, chunksize=100_000):
+        """Fit on in-memory (or memory-mapped) arrays, ``chunksize`` rows at a time."""
+        if len(X) == 0:
+            raise ValueError("cannot fit a linear regression on 0 rows")
+        self.__dict__.clear()
+        self._solution = None
+        for start in range(0, len(X), chunksize):
+            self.partial_fit(X[start:start + chunksize], y[start:start + chunksize])
+        return self
+
+    def predict(self, X):
+        X = (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+        return X @ self.coef_ + self.intercept_
+
+    @property
+    def coef_(self):
+        return self._solve()[0]
+
+    @property
+    def intercept_(self):
+        return self._solve()[1]
+
+    @property
+    def mean_(self):
+        return self._solve()[2]
+
+    @property
+    def scale_(self):
+        return self._solve()[3]
+
+    def _solve(self):
+        if self._solution is not None:
+            return self._solution
+        n = getattr(self, 'n_samples_seen_', 0)
+        if not n:
+            raise ValueError("the model has not seen any rows; call fit or partial_fit first")
+        mean_x, mean_y = self._sx / n, self._sy / n
+        cov_xx = self._sxx / n - np.outer(mean_x, mean_x)
+        cov_xy = self._sxy / n - mean_x * mean_y
+
+        # StandardScaler statistics (population std, 1 for constant features)
+        scale = np.sqrt(np.clip(np.diag(cov_xx), 0, None))
+        scale[scale == 0] = 1.0
+
+        # Normal equations of the centered, standardized problem; lstsq gives the
+        # minimum-norm solution for collinear features, like LinearRegression
+        coef = np.linalg.lstsq(cov_xx / np.outer(scale, scale), cov_xy / scale, rcond=None)[0]
+        intercept = self._shift_y + mean_y
+        self._solution = (coef, intercept, self._shift_x + mean_x, scale)
+        return self._solution
+
+
+def fit_on_chunks(chunks, features=FEATURES, target=TARGET, encoder=None, transform=None):
+    """Fit a ``StreamingLinearRegression`` over DataFrame chunks in one pass.
+
+    Meant for data that never fits in memory, e.g. ``iter_flights`` over every
+    year of Combined_Flights. ``encoder`` (a fitted ``CategoricalEncoder``)
+    turns text features into codes; rows with missing values are skipped.
+    ``transform`` maps the feature columns to the model input, e.g.
+    ``FeaturePipeline.scale`` for a model that predicts on ``X_test_scaled``.
+    """
+    model = StreamingLinearRegression()
+    for chunk in chunks:
+        chunk = chunk[list(features) + [target]]
+        if encoder is not None:
+            chunk = encoder.transform(chunk)
+        chunk = chunk.dropna()
+        if len(chunk):
+            X = chunk[list(features)]
+            model.partial_fit(transform(X) if transform is not None else X, chunk[target])
+    return model
@@ -0,0 +1,99 @@
+"""Quantile-based outlier removal over every numeric column.
+
+A row is an outlier when any numeric column falls outside
+``[Q1 - k * IQR, Q3 + k * IQR]``, where Q1 / Q3 are the 1st / 99th percentiles
+of that column and ``IQR = Q3 - Q1``. This is the rule from the notebook, but
+the quantiles of all columns are computed in one call and the rows are dropped
+with a single boolean mask.
+
+For input that does not fit in memory, ``partial_fit`` estimates the quantiles
+from a fixed-size uniform sample of the rows seen so far, so the bounds can be
+fitted in one pass over the chunks and applied to each chunk in a second one.
+The quantiles are only taken when the bounds are first needed after an
+update, not once per chunk.
+"""
+
+import numpy as np
+
+from flight_forecast.sampling import Reservoir
+
+
+class OutlierFilter:
+    """Drop rows with any numeric column outside its quantile fences.
+
+    ``columns=None`` uses every numeric column (bools excluded) of the first
+    frame seen. ``sample_size`` and ``random_state`` only matter for
+    ``partial_fit``.
+    """
+
+    def __init__(self, lower=0.01, upper=0.99, k=1.5, columns=None,
+                 sample_size=200_000, random_state=42):
+        self.lower = lower
+        self.upper = upper
+        self.k = k
+        self.columns = columns
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def fit(self, df):
+        """Compute the fences from all rows of ``df``."""
+        self.columns_ = self._columns(df)
+        self.reservoir_ = None
+        self.bounds_ = self._bounds(df[self.columns_].quantile([self.lower, self.upper]))
+        return self
+
+    def partial_fit(self, df):
+        """Update the fences with one more chunk, using approximate quantiles.
+
+        The quantiles are taken over a ``Reservoir`` of ``sample_size`` rows,
+        a uniform sample of everything seen so far, the next time
+        ``lower_bounds_`` / ``upper_bounds_`` (or ``mask``) are used.
+        """
+        if getattr(self, 'reservoir_', None) is None:
+            self.columns_ = self._columns(df)
+            self.reservoir_ = Reservoir(self.sample_size, random_state=self.random_state)
+
+        self.reservoir_.update(df[self.columns_])
+        self.bounds_ = None
+        return self
+
+    @property
+    def lower_bounds_(self):
+        return self._fences()[0]
+
+    @property
+    def upper_bounds_(self):
+        return self._fences()[1]
+
+    def mask(self, df):
+        """Boolean array that is True for the rows of ``df`` to keep."""
+        outlier = np.zeros(len(df), dtype=bool)
+        for col, lower, upper in zip(self.columns_, self.lower_bounds_, self.upper_bounds_):
+            values = df[col].to_numpy()
+            outlier |= (values < lower) | (values > upper)
+        return ~outlier
+
+    def transform(self, df):
+        """Return ``df`` without its outlier rows (the index is left as is)."""
+        return df[self.mask(df)]
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def _columns(self, df):
+        if self.columns is not None:
+            return list(self.columns)
+        return df.select_dtypes(include='number').columns.tolist()
+
+    def _fences(self):
+        if self.bounds_ is None:
+            sample = self.reservoir_.sample()
+            self.bounds_ = self._bounds(sample.quantile([self.lower, self.upper]))
+        return self.bounds_
+
+    def _bounds(self, quantiles):
+        # Q1 and Q3 as in the notebook, here the 1st and 99th percentile
+        q1 = quantiles.loc[self.lower].to_numpy(dtype=np.float64)
+        q3 = quantiles.loc[self.upper].to_numpy(dtype=np.float64)
+        iqr = q3 - q1
+        return q1 - self.k * iqr, q3 + self.k * iqr
@@ -0,0 +1,132 @@
+"""EDA and results plots aggregated with NumPy before rendering.
+
+Scatter plots, scatter matrices and pandas histograms of 1.5M rows hand every
+point to matplotlib or plotly. The notebook output (and any exported HTML)
+then holds millions of markers, and browsers stall on it. The functions here
+reduce the data first: histogram counts per column, 2D density bins instead
+of scatter points (drawn as heatmaps with a log color scale, so sparse
+regions stay visible), and boxplot statistics with a bounded number of
+outlier markers. What gets rendered grows with the number of bins, not the
+number of rows. matplotlib and plotly are imported only when a plot is drawn.
+"""
+
+import numpy as np
+
+
+def histogram(values, bins=20, range=None):
+    """Counts and bin edges of ``values``, ignoring NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.histogram(values[~np.isnan(values)], bins=bins, range=range)
+
+
+def density(x, y, bins=200, range=None):
+    """2D histogram of the pairs (x, y): counts of shape (x bins, y bins) and the edges."""
+    x = np.asarray(x, dtype=np.float64).ravel()
+    y = np.asarray(y, dtype=np.float64).ravel()
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return np.histogram2d(x[keep], y[keep], bins=bins, range=range)
+
+
+def plot_histograms(df, columns=None, bins=20, ncols=3, colors=None):
+    """One histogram per (numeric) column in a grid; returns the matplotlib figure."""
+    import matplotlib.pyplot as plt
+
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    columns = list(columns)
+    nrows = max((len(columns) + ncols - 1) // ncols, 1)
+    fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=(15, nrows * 2), squeeze=False)
+    fig.tight_layout(pad=5.0)
+    for i, (ax, col) in enumerate(zip(axes.flat, columns)):
+        counts, edges = histogram(df[col], bins)
+        ax.stairs(counts, edges, fill=True, color=None if colors is None else colors[i])
+        ax.set_title(f'Histogram of {col}')
+        ax.set_xlabel(col)
+        ax.set_ylabel('Frequency')
+    # Hide the unused axes of the last row
+    for ax in axes.flat[len(columns):]:
+        fig.delaxes(ax)
+    return fig
+
+
+def plot_density(ax, x, y, bins=200, range=None, cmap='viridis', log=True):
+    """Draw the 2D density of (x, y) on a matplotlib axis, in place of a scatter plot."""
+    from matplotlib.colors import LogNorm
+
+    counts, x_edges, y_edges = density(x, y, bins, range)
+    # Empty bins stay blank
+    counts = np.ma.masked_equal(counts, 0)
+    mesh = ax.pcolormesh(x_edges, y_edges, counts.T, cmap=cmap, norm=LogNorm() if log else None)
+    ax.figure.colorbar(mesh, ax=ax, label='Rows')
+    return mesh
+
+
+def plot_predictions(ax, y_true, y_pred, bins=200, cmap='viridis'):
+    """Density of predicted vs. actual values with the diagonal of perfect predictions."""
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    plot_density(ax, y_true, y_pred, bins, cmap=cmap)
+    low, high = np.nanmin(y_true), np.nanmax(y_true)
+    ax.plot([low, high], [low, high], 'k--', lw=2)
+    ax.set_xlabel('Actual values')
+    ax.set_ylabel('Predicted values')
+
+
+def plot_residuals(ax, y_true, y_pred, bins=200, cmap='viridis'):
+    """Heatmap of residuals (actual - predicted) against the predictions, with the zero line."""
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    plot_density(ax, y_pred, y_true - y_pred, bins, cmap=cmap)
+    ax.axhline(0, color='red', linestyle='--')
+    ax.set_xlabel('Predicted Values')
+    ax.set_ylabel('Residuals')
+
+
+def boxplot_stats(values, whis=1.5, max_fliers=200):
+    """Boxplot statistics for matplotlib's ``Axes.bxp``, with at most ``max_fliers`` outliers.
+
+    The outliers kept are evenly spaced quantiles of all of them, so the
+    spread of the outliers is still shown.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    fliers = values[(values < low) | (values > high)]
+    if len(fliers) > max_fliers:
+        fliers = np.quantile(fliers, np.linspace(0, 1, max_fliers))
+    return {'med': median, 'q1': q1, 'q3': q3, 'whislo': inside.min(), 'whishi': inside.max(),
+            'fliers': fliers}
+
+
+def plot_box(ax, values, whis=1.5, max_fliers=200):
+    """Horizontal boxplot of ``values`` from ``boxplot_stats``."""
+    return ax.bxp([boxplot_stats(values, whis, max_fliers)], orientation='horizontal', showfliers=True)
+
+
+def density_matrix(df, dimensions, bins=60, title=None, height=900, width=900):
+    """Plotly scatter-matrix replacement: histograms on the diagonal, log-density heatmaps elsewhere."""
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+
+    n = len(dimensions)
+    fig = make_subplots(rows=n, cols=n, horizontal_spacing=0.02, vertical_spacing=0.02)
+    for i, y_col in enumerate(dimensions):
+        for j, x_col in enumerate(dimensions):
+            if i == j:
+                counts, edges = histogram(df[x_col], bins)
+                trace = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, marker_color='steelblue',
+                               showlegend=False)
+            else:
+                counts, x_edges, y_edges = density(df[x_col], df[y_col], bins)
+                # log10(1 + count), so a bin with one flight is still visible; rounded to keep the HTML small
+                trace = go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+                                   z=np.where(counts.T > 0, np.log10(1 + counts.T).round(3), np.nan),
+                                   colorscale='Viridis', showscale=False)
+            fig.add_trace(trace, row=i + 1, col=j + 1)
+            if i == n - 1:
+                fig.update_xaxes(title_text=x_col.replace('_', ' '), row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=y_col.replace('_', ' '), row=i + 1, col=j + 1)
+    fig.update_layout(title=title, height=height, width=width, bargap=0)
+    return fig
@@ -0,0 +1,295 @@
+"""Per-stage wall time, CPU time, memory and row counts of the pipeline.
+
+The notebook calls ``gc.collect()`` after nearly every step because it
+"frequently ran out of RAM", but nothing showed which step the memory (or
+the time) went to. ``Profiler.stage`` wraps a step and records its wall and
+CPU time, the resident memory (RSS) before and after it, the peak RSS while
+it ran, and the rows and bytes of its input and output:
+
+    profiler = Profiler()
+    with profiler.stage('outliers', inputs=df) as stage:
+        df = stage.output(outlier_filter.fit_transform(df))
+    profiler.save('profile.json')
+    profiler.chrome_trace('profile.trace.json')
+
+The peak is found by a background thread that samples the RSS every
+``interval`` seconds while a stage is open, and by the process's high-water
+mark (``getrusage``), which catches spikes between samples. RSS comes from
+psutil when it is installed and from ``/proc/self/statm`` otherwise. Stages
+can be nested; ``gc.collect()`` runs when a stage closes (``collect=True``),
+timed separately, so the RSS afterwards shows what the stage really kept.
+
+``save`` writes the records as JSON and ``diff`` compares two such files
+stage by stage. ``chrome_trace`` writes the Trace Event Format read by
+``chrome://tracing`` and Perfetto, with the stages on a timeline and the
+RSS as a counter track.
+"""
+
+import datetime
+import gc
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _statm_rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _make_rss_reader():
+    try:
+        import psutil
+        process = psutil.Process()
+        return lambda: process.memory_info().rss
+    except ImportError:
+        pass
+    try:
+        _statm_rss()
+        return _statm_rss
+    except (OSError, ValueError, AttributeError):
+        return lambda: None
+
+
+# Current resident memory of this process in bytes (None if it can't be read)
+rss = _make_rss_reader()
+
+
+def max_rss():
+    """High-water mark of the process's resident memory in bytes (None if unknown)."""
+    if resource is None:
+        return None
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def size_of(obj):
+    """Rows and bytes of a DataFrame, Series, array, tensor or a list / tuple / dict of them."""
+    if obj is None:
+        return None, None
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj), int(np.sum(obj.memory_usage(index=True, deep=True)))
+    if isinstance(obj, np.ndarray):
+        return (obj.shape[0] if obj.ndim else 1), obj.nbytes
+    if hasattr(obj, 'element_size') and hasattr(obj, 'nelement'):  # torch.Tensor
+        return (obj.shape[0] if obj.dim() else 1), obj.element_size() * obj.nelement()
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (list, tuple)):
+        sizes = [size_of(item) for item in obj]
+        if sizes and all(rows is not None for rows, _ in sizes):
+            # Parts of one dataset (X, y) have the same rows; different datasets add up
+            rows = sizes[0][0] if len({rows for rows, _ in sizes}) == 1 else sum(rows for rows, _ in sizes)
+            return rows, sum(size for _, size in sizes)
+    return None, None
+
+
+class Stage:
+    """Measurements of one stage; ``output(obj)`` records the rows and bytes of what it produced."""
+
+    def __init__(self, name, parent, inputs, metadata):
+        self.name = name
+        self.parent = parent
+        self.rows_in, self.bytes_in = size_of(inputs)
+        self.rows_out = self.bytes_out = None
+        self.metadata = metadata
+        self.start = self.wall_s = self.cpu_s = self.gc_s = None
+        self.rss_start = self.rss_end = self.peak_rss = None
+
+    def output(self, obj):
+        """Record ``obj`` as the stage's output and return it unchanged."""
+        self.rows_out, self.bytes_out = size_of(obj)
+        return obj
+
+    def _observe(self, value):
+        if value is not None and (self.peak_rss is None or value > self.peak_rss):
+            self.peak_rss = value
+
+    def record(self):
+        peak_delta = None
+        if self.peak_rss is not None and self.rss_start is not None:
+            peak_delta = self.peak_rss - self.rss_start
+        record = {'name': self.name, 'parent': self.parent, 'start_s': self.start,
+                  'wall_s': self.wall_s, 'cpu_s': self.cpu_s, 'gc_s': self.gc_s,
+                  'rss_start': self.rss_start, 'rss_end': self.rss_end, 'peak_rss': self.peak_rss,
+                  'peak_rss_delta': peak_delta,
+                  'rss_delta': None if self.rss_end is None or self.rss_start is None else self.rss_end - self.rss_start,
+                  'rows_in': self.rows_in, 'rows_out': self.rows_out,
+                  'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
+        record.update(self.metadata)
+        return record
+
+
+class Profiler:
+    """Records the stages run inside ``stage()``; see the module docstring.
+
+    ``interval`` is the RSS sampling period in seconds. With ``verbose``
+    a line is printed as each stage closes. A disabled profiler still runs
+    the stages (and the ``gc.collect()``) but measures nothing.
+    """
+
+    def __init__(self, interval=0.01, collect=True, verbose=False, enabled=True):
+        self.interval = interval
+        self.collect = collect
+        self.verbose = verbose
+        self.enabled = enabled
+        self.stages = []
+        self.started = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._origin = time.perf_counter()
+        self._open = []
+        self._lock = threading.Lock()
+        self._stop = None
+        self._sampler = None
+
+    @contextmanager
+    def stage(self, name, inputs=None, **metadata):
+        """Measure the ``with`` block as stage ``name``; yields its ``Stage``.
+
+        ``inputs`` is what the stage reads (for the rows / bytes in); extra
+        keyword arguments are stored with the record (e.g. ``model='rf'``).
+        """
+        parent = self._open[-1].name if self._open else None
+        stage = Stage(name, parent, inputs if self.enabled else None, metadata)
+        if not self.enabled:
+            try:
+                yield stage
+            finally:
+                if self.collect:
+                    gc.collect()
+            return
+
+        stage.rss_start = rss()
+        stage._observe(stage.rss_start)
+        high_water = max_rss()
+        with self._lock:
+            self._open.append(stage)
+        if len(self._open) == 1:
+            self._start_sampler()
+
+        stage.start = time.perf_counter() - self._origin
+        cpu_start = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_s = time.perf_counter() - self._origin - stage.start
+            stage.cpu_s = time.process_time() - cpu_start
+            stage._observe(rss())
+            # A new high-water mark was reached during this stage
+            new_high = max_rss()
+            if new_high is not None and high_water is not None and new_high > high_water:
+                stage._observe(new_high)
+
+            with self._lock:
+                self._open.remove(stage)
+            if not self._open:
+                self._stop_sampler()
+
+            gc_start = time.perf_counter()
+            if self.collect:
+                gc.collect()
+            stage.gc_s = time.perf_counter() - gc_start
+            stage.rss_end = rss()
+            self.stages.append(stage)
+            if self.verbose:
+                print(self._format(stage.record()))
+
+    def _start_sampler(self):
+        if self.interval is None or rss() is None:
+            return
+        self._stop = threading.Event()
+
+        def sample(stop):
+            while not stop.wait(self.interval):
+                value = rss()
+                with self._lock:
+                    for stage in self._open:
+                        stage._observe(value)
+
+        self._sampler = threading.Thread(target=sample, args=(self._stop,), daemon=True)
+        self._sampler.start()
+
+    def _stop_sampler(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    @staticmethod
+    def _format(record):
+        def mb(value):
+            return '-' if value is None else f'{value / 2 ** 20:,.0f} MB'
+
+        return (f'{record["name"]:24s} {record["wall_s"]:9.3f} s wall {record["cpu_s"]:9.3f} s cpu  '
+                f'peak +{mb(record["peak_rss_delta"])}  rows {record["rows_in"]} -> {record["rows_out"]}')
+
+    def records(self):
+        """The recorded stages as dicts, in the order they finished."""
+        return [stage.record() for stage in self.stages]
+
+    def summary(self):
+        """DataFrame of the recorded stages, one row each."""
+        return pd.DataFrame(self.records())
+
+    def save(self, path, **extra):
+        """Write the records (and any ``extra`` entries, e.g. the configuration) as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'started': self.started, **extra, 'stages': self.records()}, f, indent=2)
+
+    def chrome_trace(self, path):
+        """Write the stages and RSS in the Chrome Trace Event Format (load it in Perfetto)."""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                   'args': {'name': 'flight_forecast'}}]
+        for record in self.records():
+            start_us = record['start_s'] * 1e6
+            events.append({'name': record['name'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': start_us, 'dur': record['wall_s'] * 1e6,
+                           'args': {key: value for key, value in record.items()
+                                    if key not in ('name', 'start_s', 'wall_s')}})
+            for ts, value in ((start_us, record['rss_start']),
+                              (start_us + record['wall_s'] * 1e6, record['rss_end'])):
+                if value is not None:
+                    events.append({'name': 'rss', 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': ts,
+                                   'args': {'MB': value / 2 ** 20}})
+        events.sort(key=lambda event: event.get('ts', -1))
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _by_stage(profile):
+    if isinstance(profile, Profiler):
+        records = profile.records()
+    else:
+        with open(profile) as f:
+            records = json.load(f)['stages']
+    frame = pd.DataFrame(records)
+    # Stages run several times (e.g. once per epoch) are added up, with the largest peak
+    return frame.groupby('name', sort=False).agg(
+        runs=('name', 'size'), wall_s=('wall_s', 'sum'), cpu_s=('cpu_s', 'sum'),
+        peak_rss_delta=('peak_rss_delta', 'max'), rows_out=('rows_out', 'last'))
+
+
+def diff(before, after):
+    """Compare two profiles (``save`` files or ``Profiler`` objects) stage by stage.
+
+    Returns both runs' wall time, CPU time and peak RSS delta per stage and
+    the ratios after / before, so a regression shows up above 1.
+    """
+    before, after = _by_stage(before), _by_stage(after)
+    table = before.join(after, how='outer', lsuffix='_before', rsuffix='_after')
+    for column in ('wall_s', 'cpu_s', 'peak_rss_delta'):
+        table[f'{column}_ratio'] = table[f'{column}_after'] / table[f'{column}_before']
+    # Keep the order in which the stages ran
+    order = list(after.index) + [name for name in before.index if name not in after.index]
+    return table.loc[order]
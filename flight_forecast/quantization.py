@@ -0,0 +1,110 @@
+"""Reduced-precision copies of ``NeuralNet`` for CPU inference.
+
+The saved network is float32 and runs a float32 ``nn.Linear`` stack. ``quantize``
+makes an ``'int8'`` copy (weights quantized to int8, activations quantized on
+the fly per batch) or a ``'bfloat16'`` copy (everything in bfloat16, which
+halves the size and is fast on CPUs with bf16 instructions). ``export`` /
+``load`` save and restore such a copy, and ``compare`` reports how far its
+predictions move from the float model, their RMSE and the inference speed and
+size, so a lower precision is only used when it does not cost accuracy.
+"""
+
+import io
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+from flight_forecast.nn import NeuralNet
+
+DTYPES = ['int8', 'bfloat16']
+
+
+def quantize(model, dtype='int8'):
+    """A copy of the float ``NeuralNet`` with ``dtype`` weights, in eval mode."""
+    copy = NeuralNet(model.layer1.in_features)
+    copy.load_state_dict(model.state_dict())
+    return _convert(copy.cpu().eval(), dtype)
+
+
+def _convert(model, dtype):
+    if dtype == 'int8':
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if dtype == 'bfloat16':
+        return model.to(torch.bfloat16)
+    raise ValueError(f"Unknown dtype {dtype!r}, expected one of {DTYPES}")
+
+
+def predict(model, X, batch_size=65_536):
+    """Float32 predictions of a float, int8 or bfloat16 model for ``X``."""
+    X = torch.as_tensor(np.asarray(X, dtype=np.float32))
+    # The int8 model has no float parameters and takes float32 input
+    parameters = list(model.parameters())
+    input_dtype = parameters[0].dtype if parameters else torch.float32
+    model.eval()
+    with torch.inference_mode():
+        return torch.cat([model(X[start:start + batch_size].to(input_dtype)).float()
+                          for start in range(0, len(X), batch_size)])
+
+
+def export(model, path, dtype='int8'):
+    """Quantize the float ``model`` and save it to ``path``; returns the quantized model."""
+    quantized = quantize(model, dtype)
+    torch.save({'dtype': dtype, 'n_features': model.layer1.in_features,
+                'state_dict': quantized.state_dict()}, path)
+    return quantized
+
+
+def load(path, saved=None):
+    """Load a model saved with ``export``.
+
+    ``saved`` is what ``torch.load(path)`` returned, if the caller already
+    read the file (e.g. to tell it from a plain state dict).
+    """
+    if saved is None:
+        saved = torch.load(path)
+    model = _convert(NeuralNet(saved['n_features']).eval(), saved['dtype'])
+    model.load_state_dict(saved['state_dict'])
+    return model
+
+
+def compare(reference, candidates, X, y=None, threshold=5, repeats=3, batch_size=65_536):
+    """Compare reduced-precision models against the float ``reference``.
+
+    ``candidates`` maps names to models (e.g. ``{'int8': quantize(model)}``).
+    Returns one row per model (the reference first, as ``'float32'``) with the
+    serialized size, the best of ``repeats`` timed predictions over ``X``, the
+    RMSE and largest absolute difference from the reference predictions and,
+    if ``y`` is given, the RMSE and accuracy (share within ``threshold``
+    minutes) against ``y``.
+    """
+    models = {'float32': reference, **candidates}
+    expected = predict(reference, X, batch_size).numpy().ravel()
+    if y is not None:
+        y = np.asarray(y, dtype=np.float64).ravel()
+
+    rows = []
+    for name, model in models.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predictions = predict(model, X, batch_size).numpy().ravel()
+            timings.append(time.perf_counter() - start)
+        diff = predictions.astype(np.float64) - expected
+        row = {'model': name, 'size_kb': _size(model) / 1024,
+               'latency_s': min(timings), 'rows_per_s': len(expected) / min(timings),
+               'rmse_vs_float32': np.sqrt(np.mean(diff ** 2)), 'max_abs_diff': np.abs(diff).max()}
+        if y is not None:
+            error = predictions - y
+            row['rmse'] = np.sqrt(np.mean(error ** 2))
+            row['accuracy'] = np.mean(np.abs(error) <= threshold)
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('model')
+
+
+def _size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
@@ -0,0 +1,68 @@
+"""PCA fitted once, with the number of components picked from a variance target.
+
+The notebook fitted a full ``PCA()`` to plot the cumulative explained variance,
+read off a component count by eye and fitted ``PCA(n_components=n)`` again.
+``Reducer`` fits all components once, keeps the smallest number whose
+cumulative explained variance reaches ``variance`` (or a fixed
+``n_components``), and projects onto those. Since the leading components of a
+full PCA are the components of the truncated one, no refit is needed.
+
+``partial_fit`` uses ``IncrementalPCA`` so the reduction can be fitted chunk by
+chunk over data that does not fit in memory.
+"""
+
+import numpy as np
+from sklearn.decomposition import PCA, IncrementalPCA
+
+
+class Reducer:
+    """Project onto the leading principal components.
+
+    ``svd_solver`` is passed to ``PCA``; the default picks the covariance
+    eigen-solver for tall inputs like ours (many rows, few features), which is
+    much faster than a full SVD. With ``svd_solver='randomized'`` only
+    ``n_components`` components are computed, so ``n_components`` must be set.
+    """
+
+    def __init__(self, variance=0.8, n_components=None, svd_solver='auto',
+                 batch_size=None, random_state=42):
+        self.variance = variance
+        self.n_components = n_components
+        self.svd_solver = svd_solver
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+    def fit(self, X):
+        n_components = self.n_components if self.svd_solver == 'randomized' else None
+        self.pca_ = PCA(n_components=n_components, svd_solver=self.svd_solver,
+                        random_state=self.random_state).fit(X)
+        self._select()
+        return self
+
+    def partial_fit(self, X):
+        """Update the components with one more chunk of rows."""
+        if not hasattr(self, 'pca_'):
+            self.pca_ = IncrementalPCA(batch_size=self.batch_size)
+        self.pca_.partial_fit(X)
+        self._select()
+        return self
+
+    def transform(self, X):
+        X = np.asarray(X)
+        reduced = (X - self.mean_) @ self.components_.T
+        return reduced.astype(X.dtype if X.dtype.kind == 'f' else np.float64, copy=False)
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def _select(self):
+        self.explained_variance_ratio_ = self.pca_.explained_variance_ratio_
+        self.cumulative_variance_ = np.cumsum(self.explained_variance_ratio_)
+        if self.n_components is not None:
+            n = self.n_components
+        else:
+            # Smallest n whose cumulative explained variance reaches the target
+            n = int(np.searchsorted(self.cumulative_variance_, self.variance - 1e-9)) + 1
+        self.n_components_ = min(n, len(self.cumulative_variance_))
+        self.components_ = self.pca_.components_[:self.n_components_]
+        self.mean_ = self.pca_.mean_
@@ -0,0 +1,184 @@
+"""Seeded fixed-size sampling of rows while they are being read.
+
+The notebook used to shuffle the whole merged frame (``df.sample(frac=1)``)
+just to keep its first 1.5 million rows, with a different result on every run.
+``Reservoir`` draws the same kind of uniform sample in one pass over a stream
+of chunks: every row gets a random key from a seeded generator and the rows
+with the smallest keys are kept. Only ``size`` rows (per stratum, when
+stratifying) are held at any time, and the same seed and input always give the
+same sample.
+
+The selection only looks at the keys. The rows stay in the chunks they came
+in, cut down with one ``take`` per chunk when the keys are merged, and are
+concatenated once, in ``sample()``. Concatenating at every merge meant
+unifying the categories of every text column over all held chunks each time.
+Chunks can be DataFrames or ``pyarrow`` tables; ``load_parquet`` keeps the
+sample in Arrow and converts it to pandas only at the end.
+"""
+
+import numpy as np
+import pandas as pd
+
+from flight_forecast.ingest import concat_chunks, iter_flights
+
+
+class Reservoir:
+    """Uniform sample of ``size`` rows from a stream of DataFrame (or Arrow table) chunks.
+
+    With ``stratify`` set to a column (e.g. ``'Month'`` or ``'Airline'``) the
+    sample is split across that column's values in proportion to how often
+    they occur in the stream. This keeps up to ``size`` rows for every value
+    until the proportions are known at the end.
+    """
+
+    def __init__(self, size, stratify=None, random_state=42):
+        self.size = size
+        self.stratify = stratify
+        self.random_state = random_state
+        self._rng = np.random.default_rng(random_state)
+        # Held rows: their chunks, and the keys (and stratum codes) of all of them in chunk order
+        self._chunks = []
+        self._keys = np.empty(0)
+        self._codes = np.empty(0, dtype=np.int64)
+        self._n_held = 0
+        self._n_pending = 0
+        self._threshold = np.inf
+        self._strata = pd.Index([])
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._pending_keys = []
+        self._pending_codes = []
+        self.n_seen_ = 0
+
+    def update(self, df):
+        """Offer the rows of ``df`` to the sample."""
+        keys = self._rng.random(len(df))
+        self.n_seen_ += len(df)
+        codes = None
+        if self.stratify is not None:
+            codes = self._stratum_codes(_values(df, self.stratify))
+            self._counts += np.bincount(codes, minlength=len(self._counts))
+        else:
+            # Once the sample is full, rows keyed above its largest key can never get in
+            candidate = np.flatnonzero(keys < self._threshold)
+            if len(candidate) < len(keys):
+                df, keys = df.take(candidate), keys[candidate]
+        if not len(keys):
+            return self
+
+        # New keys are merged once there are about as many of them as held
+        # rows, so each key is compared O(1) times
+        self._chunks.append(df)
+        self._pending_keys.append(keys)
+        if codes is not None:
+            self._pending_codes.append(codes)
+        self._n_pending += len(keys)
+        if self._n_pending >= max(self.size, self._n_held):
+            self._merge_pending()
+        return self
+
+    def update_all(self, chunks):
+        """Offer every chunk of an iterable to the sample."""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def sample(self):
+        """The sampled rows, in random order and reindexed from 0.
+
+        A DataFrame for DataFrame chunks, an Arrow table for Arrow chunks.
+        """
+        self._merge_pending()
+        if not self._chunks:
+            return pd.DataFrame()
+        keep = np.arange(len(self._keys))
+        if self.stratify is not None:
+            keep = self._allocate()
+        keep = keep[np.argsort(self._keys[keep], kind='stable')]
+        if isinstance(self._chunks[0], pd.DataFrame):
+            # reset_index gives new frames, so unifying their categories leaves the caller's chunks alone
+            rows = concat_chunks([chunk.reset_index(drop=True) for chunk in self._chunks])
+            return rows.take(keep).reset_index(drop=True)
+        import pyarrow as pa
+        return pa.concat_tables(self._chunks).take(keep)
+
+    def _merge_pending(self):
+        if not self._n_pending:
+            return
+        keys = np.concatenate([self._keys] + self._pending_keys)
+        codes = np.concatenate([self._codes] + self._pending_codes) if self.stratify is not None else None
+        self._pending_keys, self._pending_codes, self._n_pending = [], [], 0
+
+        keep = self._smallest(keys, codes)
+        if len(keep) < len(keys):
+            # Cut every chunk down to its rows that are still in the sample
+            chunks, offset = [], 0
+            for chunk in self._chunks:
+                n = len(chunk)
+                lo, hi = np.searchsorted(keep, [offset, offset + n])
+                if hi - lo == n:
+                    chunks.append(chunk)
+                elif hi > lo:
+                    chunks.append(chunk.take(keep[lo:hi] - offset))
+                offset += n
+            self._chunks = chunks
+        self._keys = keys[keep]
+        self._codes = codes[keep] if codes is not None else self._codes
+        self._n_held = len(keep)
+        if self.stratify is None and self._n_held >= self.size:
+            self._threshold = self._keys.max()
+
+    def _smallest(self, keys, codes):
+        # Positions of the rows to hold on to, in order: the `size` smallest
+        # keys, overall or within every stratum
+        if self.stratify is None:
+            if len(keys) <= self.size:
+                return np.arange(len(keys))
+            return np.sort(np.argpartition(keys, self.size)[:self.size])
+
+        order = np.lexsort((keys, codes))
+        # Rank of each row within its stratum, in key order
+        starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return np.sort(order[rank < self.size])
+
+    def _stratum_codes(self, values):
+        codes = self._strata.get_indexer(values)
+        new = codes < 0
+        if new.any():
+            self._strata = self._strata.append(pd.Index(pd.unique(values[new])))
+            self._counts = np.append(self._counts, np.zeros(len(self._strata) - len(self._counts), dtype=np.int64))
+            codes = self._strata.get_indexer(values)
+        return codes
+
+    def _allocate(self):
+        # Largest-remainder split of `size` across strata in proportion to the
+        # number of rows seen of each
+        strata = pd.unique(self._codes)
+        counts = self._counts[strata]
+        total = int(min(self.size, counts.sum()))
+        quota = counts * total / counts.sum()
+        alloc = np.floor(quota).astype(int)
+        alloc[np.argsort(alloc - quota, kind='stable')[:total - alloc.sum()]] += 1
+
+        keep = []
+        for code, n in zip(strata, alloc):
+            positions = np.flatnonzero(self._codes == code)
+            keep.append(positions[np.argsort(self._keys[positions], kind='stable')[:n]])
+        return np.concatenate(keep)
+
+
+def _values(rows, col):
+    if isinstance(rows, pd.DataFrame):
+        return rows[col].to_numpy()
+    return rows.column(col).to_numpy(zero_copy_only=False)
+
+
+def sample_flights(path, airlines_path=None, size=1_500_000, stratify=None,
+                   random_state=42, **filters):
+    """Read a flights CSV through ``iter_flights`` keeping a ``Reservoir`` sample.
+
+    ``filters`` are passed on to ``iter_flights`` (``states``, ``dropna``,
+    ``chunksize`` ...), so rows are filtered and cleaned before they are sampled.
+    """
+    reservoir = Reservoir(size, stratify, random_state)
+    return reservoir.update_all(iter_flights(path, airlines_path, **filters)).sample()
@@ -0,0 +1,326 @@
+"""A local HTTP prediction service with micro-batching.
+
+Predicting one flight at a time pays the per-call overhead of pandas, the
+scaler, the PCA and the model for every request. ``MicroBatcher`` queues the
+records of concurrent requests and runs them through the model together,
+as soon as ``max_batch_size`` records are waiting or the oldest one has
+waited ``max_wait_ms``. The server is plain ``asyncio`` with a minimal
+HTTP/1.1 handler, so it runs anywhere Python does:
+
+    python -m flight_forecast.serve --kind rf --model best_random_forest_model \\
+        --encoder categorical_vocabularies.json --pipeline feature_pipeline
+
+``POST /predict`` takes a JSON flight record, a list of them, or
+``{"records": [...]}`` with the columns of ``FEATURES`` (text columns as
+text), and answers ``{"predictions": [...]}`` (arrival delays in minutes).
+``GET /stats`` reports the request count, rows, throughput, mean batch size
+and p50 / p99 latency over the most recent requests; ``GET /health`` answers
+``ok``.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from flight_forecast.encoding import CategoricalEncoder
+from flight_forecast.features import FeaturePipeline
+
+# Model kinds and whether they take the PCA features (else the scaled features)
+MODEL_KINDS = {'rf': True, 'hgb': True, 'nn': True, 'lr': False}
+
+
+class Predictor:
+    """Encode, scale / reduce and predict a batch of flight records."""
+
+    def __init__(self, encoder, pipeline, model, kind):
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind {kind!r}, expected one of {list(MODEL_KINDS)}")
+        self.encoder = encoder
+        self.pipeline = pipeline
+        self.model = model
+        self.kind = kind
+
+    @classmethod
+    def load(cls, kind, model_path, encoder_path, pipeline_dir):
+        """Load the saved encoder, ``FeaturePipeline`` and model of ``kind``.
+
+        ``rf`` reads an ``export_forest`` directory or a joblib file, ``lr``
+        and ``hgb`` a joblib file and ``nn`` a ``NeuralNet`` state dict or a
+        ``quantization.export`` file.
+        """
+        encoder = CategoricalEncoder.load(encoder_path)
+        # Only the fitted state is needed; the cached matrices are mapped lazily
+        pipeline = FeaturePipeline.load(pipeline_dir, mmap_mode='r')
+        if kind == 'rf' and os.path.isdir(model_path):
+            from flight_forecast.forest import load_forest
+            model = load_forest(model_path)
+        elif kind == 'nn':
+            import torch
+
+            from flight_forecast import quantization
+            from flight_forecast.nn import NeuralNet
+
+            saved = torch.load(model_path)
+            if 'state_dict' in saved:
+                model = quantization.load(model_path, saved)
+            else:
+                model = NeuralNet(pipeline.reducer_.n_components_)
+                model.load_state_dict(saved)
+                model.eval()
+        else:
+            from joblib import load
+            model = load(model_path)
+        return cls(encoder, pipeline, model, kind)
+
+    def predict(self, records):
+        """Predictions for a list of flight records (dicts), as a list of floats."""
+        return self.predict_frame(pd.DataFrame.from_records(records)).tolist()
+
+    def predict_frame(self, df):
+        """Predictions for the flights in a DataFrame with the raw (text) columns."""
+        df = self.encoder.transform(df)
+        # Missing features are filled with the training means by the pipeline
+        X = df.reindex(columns=self.pipeline.features).apply(pd.to_numeric, errors='coerce')
+        if MODEL_KINDS[self.kind]:
+            X = self.pipeline.transform(X)
+        else:
+            X = self.pipeline.scale(X)
+
+        if self.kind == 'nn':
+            from flight_forecast.quantization import predict
+            predictions = predict(self.model, X).numpy()
+        else:
+            predictions = self.model.predict(X)
+        return np.asarray(predictions, dtype=np.float64).ravel()
+
+
+class Stats:
+    """Request latencies (last ``window`` requests), rows and batch sizes."""
+
+    def __init__(self, window=10_000):
+        self.latencies = collections.deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    def record_request(self, rows, seconds):
+        self.requests += 1
+        self.rows += rows
+        self.latencies.append(seconds)
+
+    def record_batch(self, rows):
+        self.batches += 1
+        self.batched_rows += rows
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (None, None)
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'uptime_s': elapsed,
+            'requests_per_s': self.requests / elapsed,
+            'rows_per_s': self.rows / elapsed,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_rows / self.batches if self.batches else None,
+            'latency_ms': {'p50': p50, 'p99': p99,
+                           'mean': latencies.mean() if len(latencies) else None},
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``submit`` calls into batches for ``predict``.
+
+    A batch is run as soon as ``max_batch_size`` records are queued or the
+    first queued request has waited ``max_wait_ms``. ``predict`` (a list of
+    records to a list of predictions) runs in a worker thread, so the event
+    loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, predict, max_batch_size=256, max_wait_ms=5, stats=None):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = stats if stats is not None else Stats()
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        """Predictions for ``records`` (a list of dicts), once their batch has run."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            records = [record for request, _ in pending for record in request]
+            self.stats.record_batch(len(records))
+            try:
+                predictions = await loop.run_in_executor(None, self.predict, records)
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            start = 0
+            for request, future in pending:
+                if not future.done():
+                    future.set_result(predictions[start:start + len(request)])
+                start += len(request)
+
+
+async def handle_connection(reader, writer, batcher):
+    """Serve HTTP/1.1 requests on one connection until it closes."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ValueError as error:
+                # The framing of anything after a malformed request is unknown, so close afterwards
+                await _respond(writer, '400 Bad Request', {'error': f'Malformed request: {error}'}, False)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+
+            status, response = await _route(method, path, body, batcher)
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            await _respond(writer, status, response, keep_alive)
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _read_request(reader):
+    # None when the client closed the connection; ValueError when the request can't be parsed
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError(f'bad request line {request_line[:100]!r}')
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get('content-length', '0')
+    if not length.isdigit():
+        raise ValueError(f'bad Content-Length {length[:100]!r}')
+    body = await reader.readexactly(int(length))
+    return method, path, headers, body
+
+
+async def _respond(writer, status, response, keep_alive):
+    payload = json.dumps(response).encode()
+    writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(payload)}\r\n'
+                 f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload)
+    await writer.drain()
+
+
+async def _route(method, path, body, batcher):
+    if method == 'GET' and path == '/health':
+        return '200 OK', 'ok'
+    if method == 'GET' and path == '/stats':
+        return '200 OK', batcher.stats.snapshot()
+    if method != 'POST' or path != '/predict':
+        return '404 Not Found', {'error': f'{method} {path} not found'}
+
+    try:
+        records = json.loads(body)
+    except json.JSONDecodeError as error:
+        return '400 Bad Request', {'error': f'Invalid JSON: {error}'}
+    if isinstance(records, dict):
+        records = records['records'] if 'records' in records else [records]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return '400 Bad Request', {'error': 'Expected a record, a list of records or {"records": [...]}'}
+    if not records:
+        return '200 OK', {'predictions': []}
+
+    start = time.perf_counter()
+    try:
+        predictions = await batcher.submit(records)
+    except Exception as error:
+        return '500 Internal Server Error', {'error': str(error)}
+    batcher.stats.record_request(len(records), time.perf_counter() - start)
+    return '200 OK', {'predictions': predictions}
+
+
+async def serve(predictor, host='127.0.0.1', port=8000, max_batch_size=256, max_wait_ms=5):
+    """Run the server until cancelled."""
+    batcher = MicroBatcher(predictor.predict, max_batch_size, max_wait_ms)
+    batcher.start()
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(reader, writer, batcher), host, port)
+    print(f'Serving {predictor.kind} predictions on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve flight delay predictions over HTTP.')
+    parser.add_argument('--kind', choices=list(MODEL_KINDS), default='rf')
+    parser.add_argument('--model', required=True, help='saved model file or directory')
+    parser.add_argument('--encoder', required=True, help='categorical_vocabularies.json')
+    parser.add_argument('--pipeline', required=True, help='FeaturePipeline directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    predictor = Predictor.load(args.kind, args.model, args.encoder, args.pipeline)
+    try:
+        asyncio.run(serve(predictor, args.host, args.port, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
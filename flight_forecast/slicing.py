@@ -0,0 +1,90 @@
+"""Indexed slicing of the flights frame by state, airport and carrier.
+
+The notebook used to filter with ``pandasql``, which copies the whole frame
+into SQLite and back for a single ``WHERE`` clause. ``FlightIndex`` instead
+groups row positions by each key column once; a slice is then a few array
+concatenations and intersections, so switching the region of interest is
+cheap.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columns the index is built over by default
+INDEX_COLUMNS = ['OriginState', 'DestState', 'Origin', 'Dest', 'Airline']
+
+
+class FlightIndex:
+    """Row positions of ``df`` grouped by the values of ``columns``.
+
+    For every column the positions are stored sorted by value (``order``) with
+    the start of each value's run in ``offsets``, i.e. one int32 array per
+    column instead of a dict of arrays.
+    """
+
+    def __init__(self, df, columns=INDEX_COLUMNS):
+        self.df = df
+        self._groups = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, uniques = df[col].cat.codes.to_numpy(), df[col].cat.categories
+            else:
+                codes, uniques = pd.factorize(df[col])
+            lookup = {value: code for code, value in enumerate(uniques)}
+            # Stable sort keeps positions ascending within each value; missing
+            # values (code -1) sort first and belong to no group
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            offsets = np.count_nonzero(codes < 0) + np.concatenate([[0], np.cumsum(counts)])
+            self._groups[col] = (lookup, order, offsets)
+
+        # Rows that pass the cancelled / diverted checks
+        self._flags = {col: ~df[col].to_numpy(dtype=bool)
+                       for col in ['Cancelled', 'Diverted'] if col in df.columns}
+
+    def lookup(self, col, values):
+        """Sorted row positions where ``col`` is one of ``values``."""
+        lookup, order, offsets = self._groups[col]
+        codes = [lookup[value] for value in values if value in lookup]
+        parts = [order[offsets[code]:offsets[code + 1]] for code in codes]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate(parts))
+
+    def positions(self, states=None, origin_states=None, dest_states=None,
+                  airports=None, origins=None, dests=None, airlines=None,
+                  drop_cancelled=True, drop_diverted=True):
+        """Sorted row positions matching every given condition.
+
+        ``states`` and ``airports`` match either end of the flight, e.g.
+        ``states=['PA']`` is ``OriginState = 'PA' OR DestState = 'PA'``. The
+        other arguments match one column each. Conditions left as ``None`` are
+        not applied.
+        """
+        selected = None
+
+        def restrict(pos):
+            nonlocal selected
+            selected = pos if selected is None else np.intersect1d(selected, pos, assume_unique=True)
+
+        if states is not None:
+            restrict(np.union1d(self.lookup('OriginState', states), self.lookup('DestState', states)))
+        if airports is not None:
+            restrict(np.union1d(self.lookup('Origin', airports), self.lookup('Dest', airports)))
+        for col, values in [('OriginState', origin_states), ('DestState', dest_states),
+                            ('Origin', origins), ('Dest', dests), ('Airline', airlines)]:
+            if values is not None:
+                restrict(self.lookup(col, values))
+
+        if selected is None:
+            selected = np.arange(len(self.df), dtype=np.int32)
+        for col, drop in [('Cancelled', drop_cancelled), ('Diverted', drop_diverted)]:
+            if drop and col in self._flags:
+                selected = selected[self._flags[col][selected]]
+        return selected
+
+    def slice(self, **conditions):
+        """Rows of the frame matching ``conditions`` (see ``positions``), reindexed from 0."""
+        return self.df.take(self.positions(**conditions)).reset_index(drop=True)
@@ -0,0 +1,179 @@
+"""Partitioned Parquet copy of the merged flights + airlines frame.
+
+Parsing the CSV and redoing the airline join on every run is most of the
+pipeline's cold start. ``convert_to_parquet`` does both once and writes the
+merged frame as a hive-partitioned Parquet dataset, one file per month
+(``Month=../part-0.parquet``). Within a file the rows are sorted by origin
+state and row groups only start at a new state, so a filter on
+``OriginState`` skips the row groups of other states by their statistics. (A directory per
+month and state meant hundreds of tiny files, each opened, read and rewritten
+on its own.) ``load_parquet`` then memory-maps only the columns, months and
+row groups a run needs, and samples in Arrow, converting to pandas once.
+
+Requires ``pyarrow``.
+"""
+
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from flight_forecast.ingest import FLIGHTS_SCHEMA, iter_flights
+from flight_forecast.sampling import Reservoir
+
+# Directory level of the dataset, and the column its files are sorted by
+PARTITION_COLUMNS = ['Month']
+SORT_COLUMN = 'OriginState'
+
+
+def convert_to_parquet(path, airlines_path, out_dir, chunksize=500_000,
+                       min_rows_per_group=50_000, max_rows_per_group=256_000):
+    """Convert a flights CSV (joined with Airlines.csv) into a Parquet dataset.
+
+    The whole merged frame is kept, nulls, cancellations and diversions
+    included, so any filter can still be applied when loading. The CSV is
+    streamed through ``iter_flights`` and each month's file is appended to as
+    chunks arrive; sorting by state then holds one month at a time in memory.
+    Rewriting ``out_dir`` replaces the months it already holds, in either
+    layout. Consecutive states share a row group until it has
+    ``min_rows_per_group`` rows, since every row group costs a read per column.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    chunks = iter_flights(path, airlines_path, drop_cancelled=False,
+                          drop_diverted=False, dropna=False, chunksize=chunksize)
+    chunks = (chunk for chunk in chunks if len(chunk))
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError(f"{path} has no flights to convert")
+
+    # Categories differ from chunk to chunk, so store strings as plain strings;
+    # Parquet dictionary-encodes them on disk anyway
+    schema = pa.Schema.from_pandas(first, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    schema = schema.remove_metadata()
+
+    def batches():
+        for chunk in itertools.chain([first], chunks):
+            table = pa.Table.from_pandas(chunk, preserve_index=False).cast(schema)
+            yield from table.to_batches()
+
+    files = []
+    ds.write_dataset(batches(), out_dir, schema=schema, format='parquet',
+                     partitioning=_partitioning(schema),
+                     existing_data_behavior='delete_matching',
+                     max_rows_per_group=max_rows_per_group,
+                     file_visitor=lambda written: files.append(written.path))
+
+    # Every chunk adds a small row group to each month it touches; rewrite the
+    # months one at a time, sorted by state, in row groups cut between states
+    for file in files:
+        table = pq.read_table(file)
+        table = table.take(pc.sort_indices(table, sort_keys=[(SORT_COLUMN, 'ascending')]))
+        states = table.column(SORT_COLUMN).to_numpy(zero_copy_only=False)
+        with pq.ParquetWriter(file, table.schema) as writer:
+            start = 0
+            for stop in np.r_[np.flatnonzero(states[1:] != states[:-1]) + 1, len(table)]:
+                if stop - start >= min_rows_per_group or stop == len(table):
+                    writer.write_table(table.slice(start, stop - start), row_group_size=max_rows_per_group)
+                    start = stop
+
+
+def load_parquet(path, columns=None, states=None, origin_states=None, months=None,
+                 drop_cancelled=False, drop_diverted=False, dropna=False,
+                 sample_size=None, stratify=None, random_state=42):
+    """Load (a slice of) a dataset written by ``convert_to_parquet``.
+
+    ``months`` selects partitions, so only their files are opened, and
+    ``origin_states`` selects row groups. ``states`` keeps flights whose
+    origin *or* destination is in the list (the notebook's PA filter); the
+    destination side is not sorted on, so that filter also scans the
+    ``DestState`` column of the other row groups. Only ``columns`` are read,
+    and files are memory-mapped rather than copied into buffers. String
+    columns come back as categoricals, like ``load_flights``.
+
+    With ``sample_size`` set, the matching rows of each file are read as an
+    Arrow table and offered to a seeded ``Reservoir`` (see
+    ``flight_forecast.sampling``), which ``take``s the rows that win; only the
+    sample is converted to pandas, in random order.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+
+    partitioning = _partitioning(path=path)
+    schema = ds.dataset(path, format='parquet', partitioning=partitioning).schema
+    columns = list(columns) if columns is not None else _ordered(schema.names)
+    strings = [col for col in columns
+               if col not in partitioning.schema.names and pa.types.is_string(schema.field(col).type)]
+    dataset = ds.dataset(path, partitioning=partitioning,
+                         format=ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=strings)),
+                         filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+    filters = []
+    if months is not None:
+        filters.append(ds.field('Month').isin(list(months)))
+    if origin_states is not None:
+        filters.append(ds.field('OriginState').isin(list(origin_states)))
+    if states is not None:
+        filters.append(ds.field('OriginState').isin(list(states))
+                       | ds.field('DestState').isin(list(states)))
+    if drop_cancelled:
+        filters.append(ds.field('Cancelled') == False)  # noqa: E712
+    if drop_diverted:
+        filters.append(ds.field('Diverted') == False)  # noqa: E712
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    if sample_size is None:
+        table = dataset.to_table(columns=columns, filter=expression)
+        return _to_frame(table.drop_null() if dropna else table)
+
+    reservoir = Reservoir(sample_size, stratify, random_state)
+    for fragment in dataset.get_fragments(filter=expression):
+        table = fragment.to_table(schema=dataset.schema, columns=columns, filter=expression)
+        reservoir.update(table.drop_null() if dropna else table)
+    if not reservoir.n_seen_:
+        return _to_frame(dataset.schema.empty_table().select(columns))
+    return _to_frame(reservoir.sample())
+
+
+def _to_frame(table):
+    df = table.to_pandas()
+    # A partition key in datasets written with a directory per state
+    if SORT_COLUMN in df.columns and not isinstance(df[SORT_COLUMN].dtype, pd.CategoricalDtype):
+        df[SORT_COLUMN] = df[SORT_COLUMN].astype('category')
+    return df
+
+
+def _partitioning(schema=None, path=None):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    fields = [pa.field('Month', pa.int8())]
+    if schema is not None:
+        fields = [schema.field(col) for col in PARTITION_COLUMNS]
+    elif path is not None and _state_directories(path):
+        # Written before the states were merged into the month files; still readable
+        fields.append(pa.field(SORT_COLUMN, pa.string()))
+    return ds.partitioning(pa.schema(fields), flavor='hive')
+
+
+def _state_directories(path):
+    for month in sorted(os.listdir(path)):
+        if os.path.isdir(os.path.join(path, month)):
+            return any(name.startswith(f'{SORT_COLUMN}=') for name in os.listdir(os.path.join(path, month)))
+    return False
+
+
+def _ordered(names):
+    # Same column order as the merged frame: flights columns, then airline columns
+    known = [col for col in FLIGHTS_SCHEMA if col in names]
+    return known + [col for col in names if col not in known]
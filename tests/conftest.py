@@ -0,0 +1,51 @@
+"""Small, seeded inputs for the checks in this directory.
+
+Run with ``python -m pytest tests`` from the repository root. Nothing here
+needs the Kaggle data or Google Drive.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import flight_forecast (and benchmarks) from this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def flights_csv(tmp_path_factory):
+    """Paths of a 20,000 row synthetic Combined_Flights CSV and its Airlines.csv."""
+    from benchmarks import synthetic
+
+    directory = tmp_path_factory.mktemp('synthetic')
+    flights_path = synthetic.generate(str(directory), 20_000, random_state=0, verbose=False)
+    return flights_path, os.path.join(directory, synthetic.AIRLINES_FILE)
+
+
+@pytest.fixture
+def flights():
+    """A few hundred flights with the model features, text columns and nulls."""
+    rng = np.random.default_rng(0)
+    n = 600
+    airlines = np.array(['AA', 'DL', 'UA', 'WN', 'B6'])
+    df = pd.DataFrame({
+        'DepDelay': rng.normal(10, 30, n),
+        'TaxiOut': rng.gamma(4, 4, n),
+        'DepTime': rng.integers(0, 2400, n).astype(np.float64),
+        'WheelsOff': rng.integers(0, 2400, n).astype(np.float64),
+        'TaxiIn': rng.gamma(2, 4, n),
+        'CRSDepTime': rng.integers(0, 2400, n),
+        'CRSArrTime': rng.integers(0, 2400, n),
+        'Marketing_Airline_Network': rng.choice(airlines, n),
+        'IATA_Code_Marketing_Airline': rng.choice(airlines, n),
+        'Origin': rng.choice(['PHL', 'PIT', 'JFK', 'ORD'], n),
+        'Cancelled': rng.random(n) < 0.05,
+    })
+    df['ArrDelay'] = df['DepDelay'] + 0.5 * df['TaxiOut'] + rng.normal(0, 5, n)
+    df['ArrivalDelayGroups'] = np.clip(df['ArrDelay'] // 15, -2, 12)
+    df.loc[rng.random(n) < 0.05, 'TaxiOut'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'Origin'] = None
+    return df
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from benchmarks import synthetic
+from flight_forecast.ingest import FLIGHTS_SCHEMA, load_flights
+
+
+def test_synthetic_flights_look_like_the_real_ones(flights_csv):
+    flights_path, airlines_path = flights_csv
+    df = pd.read_csv(flights_path, dtype=FLIGHTS_SCHEMA)
+    assert list(df.columns) == list(FLIGHTS_SCHEMA) and len(df) == 20_000
+    assert 0.01 < df['Cancelled'].mean() < 0.03 and 0.0005 < df['Diverted'].mean() < 0.01
+
+    # Cancelled flights have no departure, diverted ones no arrival
+    assert df.loc[df['Cancelled'], 'DepTime'].isna().all()
+    assert df.loc[df['Diverted'], 'ArrDelay'].isna().all()
+    flown = df[~df['Cancelled'] & ~df['Diverted']]
+    assert flown[['DepDelay', 'ArrDelay', 'TaxiOut']].notna().all().all()
+    assert flown['DepDelay'].corr(flown['ArrDelay']) > 0.5
+
+    # Every carrier joins with Airlines.csv, and Pennsylvania has traffic
+    merged = load_flights(flights_path, airlines_path, states=['PA'], usecols=['Airline'])
+    assert 0 < len(merged) and set(pd.read_csv(airlines_path)['Description']) >= set(df['Airline'])
+
+
+def test_generate_is_seeded_and_reused(tmp_path):
+    first = synthetic.generate(str(tmp_path / 'a'), 3000, chunksize=1000, random_state=3, verbose=False)
+    second = synthetic.generate(str(tmp_path / 'b'), 3000, chunksize=1000, random_state=3, verbose=False)
+    with open(first) as f, open(second) as g:
+        assert f.read() == g.read()
+
+    modified = os.path.getmtime(first)
+    assert synthetic.generate(str(tmp_path / 'a'), 3000, random_state=3, verbose=False) == first
+    assert os.path.getmtime(first) == modified
+    synthetic.generate(str(tmp_path / 'a'), 2000, random_state=3, verbose=False)
+    assert len(pd.read_csv(first)) == 2000
+
+
+def test_stage_suite_runs(flights_csv, tmp_path, monkeypatch, capsys):
+    monkeypatch.syspath_prepend(os.path.dirname(synthetic.__file__))
+    from benchmarks import run
+
+    # Reuse the session's synthetic files; the stages write next to them
+    data_dir = tmp_path / 'data'
+    shutil.copytree(os.path.dirname(flights_csv[0]), data_dir)
+    args = argparse.Namespace(rows=20_000, data_dir=str(data_dir), random_state=0, sample_size=10_000,
+                              nn_epochs=1, rf_trees=2, rf_max_depth=5)
+    profiler = run.run(args)
+    profiler.save(str(tmp_path / 'results.json'), config={'rows': args.rows})
+
+    with open(tmp_path / 'results.json') as f:
+        stages = [record['name'] for record in json.load(f)['stages']]
+    assert stages == run.STAGES
+    run.compare(profiler, str(tmp_path / 'results.json'))
+    out = capsys.readouterr().out
+    assert all(stage in out for stage in run.STAGES)
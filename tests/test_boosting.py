@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from flight_forecast.boosting import BinnedGradientBoosting, Binner
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(size=4000), rng.integers(0, 5, 4000), rng.exponential(size=4000)])
+    y = 3 * X[:, 0] + X[:, 1] ** 2 + rng.normal(0, 0.1, 4000)
+    return X, y
+
+
+def test_binner_bins(data):
+    X, _ = data
+    X = X.copy()
+    X[::10, 2] = np.nan
+    binner = Binner(max_bins=16).fit(X)
+    binned = binner.transform(X)
+
+    assert binned.dtype == np.uint8
+    # Few distinct values get one bin each, in order
+    np.testing.assert_array_equal(binned[:, 1], X[:, 1])
+    assert binned[:, 0].max() == 15
+    # Bins hold roughly equal shares of a continuous column
+    assert np.bincount(binned[:, 0]).min() > len(X) / 16 / 2
+    assert (binned[::10, 2] == 16).all() and (binned[1::10, 2] < 16).all()
+
+
+def test_matches_hist_gradient_boosting(data):
+    X, y = data
+    model = BinnedGradientBoosting(max_iter=50).fit(X[:3000], y[:3000])
+    reference = HistGradientBoostingRegressor(max_iter=50, random_state=42).fit(X[:3000], y[:3000])
+    error = np.sqrt(np.mean((model.predict(X[3000:]) - y[3000:]) ** 2))
+    reference_error = np.sqrt(np.mean((reference.predict(X[3000:]) - y[3000:]) ** 2))
+    assert error < 1.1 * reference_error
+
+
+def test_binned_matrix_cache_is_keyed_on_the_data(data, tmp_path):
+    X, y = data
+    uncached = BinnedGradientBoosting(max_iter=20).fit(X, y)
+
+    first = BinnedGradientBoosting(max_iter=20, cache_dir=str(tmp_path)).fit(X, y)
+    (name,) = os.listdir(tmp_path)
+    # Other boosting parameters reuse the matrix
+    second = BinnedGradientBoosting(max_iter=10, cache_dir=str(tmp_path))
+    second.binner_ = Binner().fit(X)
+    assert isinstance(second._binned(X), np.memmap)
+    second.fit(X, y)
+    assert os.listdir(tmp_path) == [name]
+    np.testing.assert_array_equal(first.predict(X), uncached.predict(X))
+
+    changed = X.copy()
+    changed[0, 0] += 1
+    BinnedGradientBoosting(max_iter=20, cache_dir=str(tmp_path)).fit(changed, y)
+    assert len(os.listdir(tmp_path)) == 2
+    BinnedGradientBoosting(max_bins=32, max_iter=20, cache_dir=str(tmp_path)).fit(X, y)
+    assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_forecast.cache import StageCache
+from flight_forecast.encoding import CategoricalEncoder, encode_bools
+from flight_forecast.outliers import OutlierFilter
+
+
+class Counter:
+    """A stage function that counts how often it really ran."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.fn(*args, **kwargs)
+
+
+def _results(df):
+    encoder = CategoricalEncoder().fit(df)
+    frame = df.set_index('Origin').iloc[:50]
+    return frame, df['DepDelay'].to_numpy(), {'encoder': encoder, 'n': [len(df), 1.5]}
+
+
+def test_round_trip(flights, tmp_path):
+    cache = StageCache(tmp_path, verbose=False)
+    stage = Counter(_results)
+    first = cache.call('results', stage, flights)
+    second = cache.call('results', stage, flights)
+    assert stage.calls == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    pd.testing.assert_frame_equal(second[0], first[0])
+    np.testing.assert_array_equal(second[1], first[1])
+    assert second[2]['encoder'].vocabularies_ == first[2]['encoder'].vocabularies_
+    assert second[2]['n'] == [len(flights), 1.5]
+
+
+def test_key_follows_the_inputs(flights, tmp_path):
+    cache = StageCache(tmp_path, verbose=False)
+    key = cache.key('outliers', OutlierFilter().fit_transform, flights)
+    assert key == cache.key('outliers', OutlierFilter().fit_transform, flights.copy())
+    changed = flights.copy()
+    changed.loc[3, 'DepDelay'] += 1
+    assert key != cache.key('outliers', OutlierFilter().fit_transform, changed)
+    assert key != cache.key('outliers', OutlierFilter(upper=0.95).fit_transform, flights)
+    assert key != cache.key('outliers:v2', OutlierFilter().fit_transform, flights)
+
+    path = tmp_path / 'flights.csv'
+    path.write_text('a\n1\n')
+    before = cache.key('load', pd.read_csv, str(path))
+    os.utime(path, ns=(0, 0))
+    assert cache.key('load', pd.read_csv, str(path)) != before
+
+
+def test_cached_ingest_matches_uncached(tmp_path):
+    from benchmarks import synthetic
+    from flight_forecast.store import convert_to_parquet, load_parquet
+
+    flights_path = synthetic.generate(tmp_path / 'data', 5000, verbose=False)
+    parquet_dir = str(tmp_path / 'parquet')
+    convert_to_parquet(flights_path, os.path.join(tmp_path, 'data', synthetic.AIRLINES_FILE), parquet_dir)
+
+    def ingest(cache):
+        df = cache.call('load_sample', load_parquet, parquet_dir, months=[1, 2], dropna=True,
+                        sample_size=500, random_state=1)
+        return cache.call('outliers', OutlierFilter().fit_transform, df)
+
+    expected = ingest(StageCache(tmp_path / 'unused', enabled=False))
+    cache = StageCache(tmp_path / 'cache', verbose=False)
+    pd.testing.assert_frame_equal(ingest(cache), expected)
+    pd.testing.assert_frame_equal(ingest(cache), expected)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_eviction(tmp_path):
+    cache = StageCache(tmp_path, verbose=False)
+    for i in range(3):
+        cache.call(f'stage{i}', np.zeros, 1000)
+    os.utime(os.path.join(tmp_path, cache.key('stage0', np.zeros, 1000), 'entry.json'), (0, 0))
+    stale = tmp_path / 'abc.tmp-999999999'
+    stale.mkdir()
+    os.utime(stale, (0, 0))
+
+    size = cache.entries()['bytes'].iloc[0]
+    evicted = cache.evict(2 * size)
+    assert evicted == [cache.key('stage0', np.zeros, 1000)]
+    assert not stale.exists()
+    assert set(cache.entries()['stage']) == {'stage1', 'stage2'}
+    cache.clear()
+    assert cache.entries().empty
+
+
+def test_sparse_frames(flights, tmp_path):
+    cache = StageCache(tmp_path, verbose=False)
+    first = cache.call('encode', encode_bools, flights, sparse=True)
+    second = cache.call('encode', encode_bools, flights, sparse=True)
+    assert cache.hits == 1
+    assert isinstance(second['Cancelled_True'].dtype, pd.SparseDtype)
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_entries_being_written_are_not_evicted(tmp_path):
+    cache = StageCache(tmp_path, verbose=False)
+    cache.call('stage', np.zeros, 1000)
+    # Another process between writing entry.json and renaming its directory into place
+    writing = tmp_path / f'{"0" * 64}.tmp-{os.getpid() + 1}'
+    writing.mkdir()
+    (writing / 'entry.json').write_text('{"stage": "other", "bytes": 1, "created": 0, "layout": {}}')
+
+    assert list(cache.entries()['stage']) == ['stage']
+    cache.clear()
+    assert writing.exists() and cache.entries().empty
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_disabled_cache_always_runs(flights, tmp_path, enabled):
+    cache = StageCache(tmp_path, enabled=enabled, verbose=False)
+    stage = Counter(len)
+    assert cache.call('rows', stage, flights) == cache.call('rows', stage, flights) == len(flights)
+    assert stage.calls == (1 if enabled else 2)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_forecast import cli
+
+
+@pytest.fixture(scope='module')
+def data_dir(flights_csv, tmp_path_factory):
+    data_dir = str(tmp_path_factory.mktemp('cli'))
+    for source in flights_csv:
+        shutil.copy(source, data_dir)
+    cli.main(['--data-dir', data_dir, 'ingest', '--sample-size', '15000', '--no-cache'])
+    return data_dir
+
+
+def test_ingest_writes_the_features(data_dir):
+    assert os.path.isdir(os.path.join(data_dir, cli.PARQUET_DIR))
+    assert os.path.exists(os.path.join(data_dir, cli.ENCODER_FILE))
+    from flight_forecast.features import FeaturePipeline
+
+    pipeline = FeaturePipeline.load(os.path.join(data_dir, cli.FEATURES_DIR))
+    assert 0 < len(pipeline.y_train) < 15_000
+
+
+@pytest.fixture(scope='module')
+def trained(data_dir):
+    cli.main(['--data-dir', data_dir, 'train', '--model', 'lr'])
+    cli.main(['--data-dir', data_dir, 'train', '--model', 'rf', '--no-search', '--n-estimators', '5',
+              '--max-depth', '6', '--n-jobs', '1'])
+    return data_dir
+
+
+def test_train_and_report(trained):
+    assert os.path.isdir(os.path.join(trained, cli.COMPACT_FOREST_DIR))
+    cli.main(['--data-dir', trained, '--profile', 'report', '--bootstrap', '20'])
+    report = pd.read_csv(os.path.join(trained, 'report.csv'), index_col='model')
+    assert list(report.index) == ['Linear Regression', 'Random Forest']
+    assert (report['rmse'] > 0).all() and (report['accuracy@5'] <= report['accuracy@15']).all()
+    assert (report['rmse_lower'] <= report['rmse']).all() and (report['rmse'] <= report['rmse_upper']).all()
+    assert os.path.exists(os.path.join(trained, 'profile_report.json'))
+
+
+def test_predict_matches_the_trained_forest(trained, flights_csv, tmp_path):
+    flights = pd.read_csv(flights_csv[0]).head(200)
+    flights.to_csv(tmp_path / 'input.csv', index=False)
+    cli.main(['--data-dir', trained, 'predict', '--model', 'rf', '--input', str(tmp_path / 'input.csv'),
+              '--output', str(tmp_path / 'predictions.csv')])
+
+    predictions = pd.read_csv(tmp_path / 'predictions.csv')
+    assert list(predictions.columns) == ['FlightDate', 'Airline', 'Origin', 'Dest', 'PredictedArrDelay']
+    assert len(predictions) == 200 and np.isfinite(predictions['PredictedArrDelay']).all()
+
+    from joblib import load
+
+    from flight_forecast.serve import Predictor
+
+    predictor = Predictor.load('rf', os.path.join(trained, cli.MODEL_FILES['rf']),
+                               os.path.join(trained, cli.ENCODER_FILE), os.path.join(trained, cli.FEATURES_DIR))
+    assert isinstance(predictor.model, type(load(os.path.join(trained, cli.MODEL_FILES['rf']))))
+    np.testing.assert_allclose(predictions['PredictedArrDelay'], predictor.predict_frame(flights), rtol=1e-6)
+
+
+def test_predict_does_not_import_torch_or_plotting(trained, flights_csv, tmp_path):
+    pd.read_csv(flights_csv[0]).head(5).to_csv(tmp_path / 'input.csv', index=False)
+    code = ('import sys; from flight_forecast.cli import main; '
+            f'main(["--data-dir", {trained!r}, "predict", "--input", {str(tmp_path / "input.csv")!r}]); '
+            'print(sorted(m for m in ("torch", "matplotlib", "plotly") if m in sys.modules))')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
+    assert result.stdout.count('\n') == 5 + 2
+
+
+def test_data_dir_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv(cli.DATA_DIR_ENV, str(tmp_path))
+    args = cli.build_parser().parse_args(['train', '--model', 'hgb'])
+    assert args.data_dir == str(tmp_path) and cli.model_path(args, 'hgb').startswith(str(tmp_path))
+
+
+def test_network_learning_rate_is_not_scaled_by_default():
+    args = cli.build_parser().parse_args(['train', '--model', 'nn'])
+    assert (args.lr, args.lr_rule, args.warmup_epochs) == (0.01, 'none', 0)
+    args = cli.build_parser().parse_args(['train', '--model', 'nn', '--lr-rule', 'sqrt', '--warmup-epochs', '2'])
+    assert (args.lr_rule, args.warmup_epochs) == ('sqrt', 2)
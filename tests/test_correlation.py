@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from flight_forecast.correlation import CorrelationAccumulator, target_correlations
+
+
+def _numeric(flights):
+    df = flights.select_dtypes(include=['number', 'bool']).copy()
+    df.loc[df.sample(30, random_state=1).index, 'ArrDelay'] = np.nan
+    df['Constant'] = 1.0
+    return df
+
+
+def test_matches_df_corr(flights):
+    df = _numeric(flights)
+    expected = df.astype(np.float64).corr()[['ArrDelay', 'DepDelay']]
+    r = target_correlations(df, ['ArrDelay', 'DepDelay'])
+    pd.testing.assert_frame_equal(r, expected, rtol=1e-10, check_names=False)
+
+
+def test_chunks_give_the_same_correlations(flights):
+    df = _numeric(flights)
+    accumulator = CorrelationAccumulator()
+    for start in range(0, len(df), 97):
+        accumulator.update(df.iloc[start:start + 97])
+    pd.testing.assert_frame_equal(accumulator.correlations(), target_correlations(df), rtol=1e-10)
+
+
+def test_top_k_ranks_by_absolute_correlation(flights):
+    df = _numeric(flights)
+    # The notebook's steps: df.corr(), take ArrDelay, drop it and its near-copies
+    expected = df.astype(np.float64).corr()['ArrDelay'].drop(['ArrDelay', 'ArrivalDelayGroups']).dropna()
+    expected = expected.loc[expected.abs().sort_values(ascending=False).index[:3]]
+
+    top = CorrelationAccumulator().update(df).top_k(3, exclude=['ArrivalDelayGroups'])
+    pd.testing.assert_series_equal(top, expected, rtol=1e-10, check_names=False)
+    assert top.index[0] == 'DepDelay' and 'Constant' not in top.index
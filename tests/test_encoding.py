@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+from flight_forecast.encoding import UNKNOWN, CategoricalEncoder, encode_bools
+
+
+def test_codes_follow_the_sorted_vocabulary(flights):
+    encoder = CategoricalEncoder().fit(flights)
+    assert encoder.vocabularies_['Origin'] == ['JFK', 'ORD', 'PHL', 'PIT']
+    codes = encoder.transform(flights)['Origin']
+    expected = flights['Origin'].map({'JFK': 0, 'ORD': 1, 'PHL': 2, 'PIT': 3}).fillna(UNKNOWN)
+    np.testing.assert_array_equal(codes, expected)
+
+
+def test_unknown_values_and_categoricals():
+    encoder = CategoricalEncoder(columns=['Origin']).fit(pd.DataFrame({'Origin': ['PHL', 'PIT']}))
+    values = pd.Series(['PIT', 'LAX', None, 'PHL'], dtype='category')
+    np.testing.assert_array_equal(encoder.encode('Origin', values), [1, UNKNOWN, UNKNOWN, 0])
+    assert list(encoder.decode('Origin', [1, UNKNOWN])) == ['PIT', None]
+
+
+def test_save_load_round_trip(flights, tmp_path):
+    encoder = CategoricalEncoder().fit(flights)
+    encoder.save(tmp_path / 'vocabularies.json')
+    loaded = CategoricalEncoder.load(tmp_path / 'vocabularies.json')
+    assert loaded.vocabularies_ == encoder.vocabularies_
+    pd.testing.assert_frame_equal(loaded.transform(flights), encoder.transform(flights))
+
+
+def test_encode_bools_matches_drop_first():
+    df = pd.DataFrame({'Cancelled': [True, False, True], 'Diverted': [False, False, False]})
+    encoded = encode_bools(df)
+    assert list(encoded.columns) == ['Cancelled_True']
+    np.testing.assert_array_equal(encoded['Cancelled_True'], [1, 0, 1])
+    assert encoded['Cancelled_True'].dtype == np.uint8
+
+
+def test_encode_bools_matches_one_hot_encoder(flights):
+    df = flights.assign(Diverted=np.random.default_rng(1).random(len(flights)) < 0.1, Late=False)
+    bools = ['Cancelled', 'Diverted', 'Late']
+
+    # The notebook's OneHotEncoder(drop='first') step
+    encoder = OneHotEncoder(sparse_output=False, drop='first')
+    encoded = pd.DataFrame(encoder.fit_transform(df[bools]), columns=encoder.get_feature_names_out(bools))
+    expected = pd.concat([df.drop(bools, axis=1), encoded], axis=1)
+
+    for sparse in [False, True]:
+        df_bools = encode_bools(df, sparse=sparse)
+        assert list(df_bools.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(df_bools.astype({col: np.float64 for col in encoded.columns}), expected)
+    assert isinstance(encode_bools(df, sparse=True)['Cancelled_True'].dtype, pd.SparseDtype)
+    assert list(df.columns) == list(flights.columns) + ['Diverted', 'Late']
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from flight_forecast.encoding import CategoricalEncoder
+from flight_forecast.features import ARRAYS, FEATURES, FeaturePipeline
+
+
+@pytest.fixture
+def encoded(flights):
+    return CategoricalEncoder().fit_transform(flights)
+
+
+def test_matches_scaler_and_pca(encoded):
+    pipeline = FeaturePipeline(variance=0.8).fit(encoded)
+
+    X = encoded[FEATURES].fillna(encoded[FEATURES].mean())
+    X_train, X_test = train_test_split(X, test_size=0.2, random_state=42)
+    scaler = StandardScaler().fit(X_train)
+    np.testing.assert_allclose(pipeline.X_test_scaled, scaler.transform(X_test), rtol=1e-5, atol=1e-5)
+
+    pca = PCA().fit(scaler.transform(X_train).astype(np.float32))
+    n = np.searchsorted(np.cumsum(pca.explained_variance_ratio_), 0.8) + 1
+    assert pipeline.X_train_pca.shape == (len(X_train), n)
+    assert pipeline.X_train_pca.dtype == np.float32
+
+
+def test_save_load_round_trip(encoded, tmp_path):
+    pipeline = FeaturePipeline(variance=0.8).fit(encoded)
+    pipeline.save(tmp_path / 'pipeline')
+    loaded = FeaturePipeline.load(tmp_path / 'pipeline')
+
+    for name in ARRAYS:
+        assert isinstance(getattr(loaded, name), np.memmap)
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(pipeline, name))
+    new_rows = encoded.sample(50, random_state=1)
+    np.testing.assert_array_equal(loaded.transform(new_rows), pipeline.transform(new_rows))
@@ -0,0 +1,108 @@
+import io
+import json
+import os
+
+import numpy as np
+import joblib
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+from flight_forecast.forest import FORMAT, NODE_ARRAYS, VERSION, export_forest, load_forest
+
+
+def _data(missing=False):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 5))
+    y = 2 * X[:, 0] + np.sin(3 * X[:, 1]) + rng.normal(0, 0.3, 2000)
+    if missing:
+        X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize('estimator', [RandomForestRegressor(n_estimators=15, random_state=0),
+                                       RandomForestRegressor(n_estimators=10, max_depth=4, random_state=0),
+                                       ExtraTreesRegressor(n_estimators=10, random_state=0)])
+def test_predictions_are_bit_identical(estimator, tmp_path):
+    X, y = _data()
+    forest = estimator.fit(X, y)
+    export_forest(forest, tmp_path)
+    compact = load_forest(tmp_path)
+
+    assert isinstance(compact.threshold, np.memmap)
+    np.testing.assert_array_equal(compact.predict(X), forest.predict(X))
+    # Several blocks on several threads, and float64 input rounded to float32 like sklearn does
+    np.testing.assert_array_equal(compact.predict(X + 1e-9, n_jobs=3, block_size=128), forest.predict(X + 1e-9))
+
+
+def test_missing_values(tmp_path):
+    X, y = _data(missing=True)
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    export_forest(forest, tmp_path)
+    np.testing.assert_array_equal(load_forest(tmp_path).predict(X), forest.predict(X))
+
+
+def test_loads_version_1(tmp_path):
+    X, y = _data(missing=True)
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    # The version 1 layout: per-tree child indices and node offsets
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    arrays = {'tree_offsets': np.concatenate([[0], np.cumsum([tree.node_count for tree in trees])])}
+    for name, dtype in [('feature', np.int16), ('threshold', np.float64), ('children_left', np.int32),
+                        ('children_right', np.int32), ('value', np.float64), ('missing_go_to_left', np.uint8)]:
+        arrays[name] = np.concatenate([getattr(tree, name).reshape(tree.node_count) for tree in trees]).astype(dtype)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+    manifest = {'format': FORMAT, 'version': 1, 'n_trees': len(trees), 'n_features': X.shape[1],
+                'max_depth': max(tree.max_depth for tree in trees),
+                'arrays': {name: {'dtype': values.dtype.str, 'shape': list(values.shape)}
+                           for name, values in arrays.items()}}
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    np.testing.assert_array_equal(load_forest(tmp_path).predict(X), forest.predict(X))
+
+
+def test_rejects_mismatched_arrays(tmp_path):
+    X, y = _data()
+    export_forest(RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y), tmp_path)
+    np.save(os.path.join(tmp_path, 'value.npy'), np.zeros(3))
+    with pytest.raises(ValueError, match='value.npy'):
+        load_forest(tmp_path)
+
+
+def test_export_layout(tmp_path):
+    X, y = _data()
+    forest = RandomForestRegressor(n_estimators=8, random_state=0).fit(X, y)
+    export_forest(forest, tmp_path)
+
+    with open(os.path.join(tmp_path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    assert (manifest['format'], manifest['version'], manifest['n_trees']) == (FORMAT, VERSION, 8)
+    assert manifest['n_nodes'] == sum(estimator.tree_.node_count for estimator in forest.estimators_)
+    for name, dtype in NODE_ARRAYS.items():
+        assert np.load(os.path.join(tmp_path, f'{name}.npy')).dtype == dtype
+
+    # Much smaller than the pickled forest
+    pickled = io.BytesIO()
+    joblib.dump(forest, pickled)
+    size = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path))
+    assert size < pickled.tell() / 2
+
+    in_memory = load_forest(tmp_path, mmap_mode=None)
+    assert not isinstance(in_memory.threshold, np.memmap)
+    np.testing.assert_array_equal(in_memory.predict(X), forest.predict(X))
+
+
+def test_rejects_other_formats(tmp_path):
+    X, y = _data()
+    with pytest.raises(ValueError):
+        export_forest(RandomForestRegressor(n_estimators=2).fit(X, np.column_stack([y, y])), tmp_path / 'multi')
+
+    export_forest(RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y), tmp_path)
+    with open(os.path.join(tmp_path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    manifest['version'] = VERSION + 1
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match='version'):
+        load_forest(tmp_path)
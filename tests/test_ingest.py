@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from flight_forecast.ingest import concat_chunks, filter_flights, iter_flights, load_flights
+
+
+def _baseline(flights_path, airlines_path):
+    # The notebook: read everything, merge, drop nulls, then the PA query
+    df = pd.read_csv(flights_path)
+    df_airlines = pd.read_csv(airlines_path).rename(columns={'Description': 'Airline'})
+    df = pd.merge(df, df_airlines, on='Airline', how='inner').dropna()
+    df = df[((df['OriginState'] == 'PA') | (df['DestState'] == 'PA')) & ~df['Cancelled'] & ~df['Diverted']]
+    return df.reset_index(drop=True)
+
+
+def test_load_flights_matches_the_notebook(flights_csv):
+    expected = _baseline(*flights_csv)
+    df = load_flights(*flights_csv, states=['PA'], chunksize=3000)
+
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected) > 0
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            np.testing.assert_array_equal(df[col].astype(str), expected[col].astype(str))
+        else:
+            np.testing.assert_allclose(df[col].to_numpy(np.float64), expected[col].to_numpy(np.float64), rtol=1e-6)
+
+
+def test_result_does_not_depend_on_the_chunk_size(flights_csv):
+    pd.testing.assert_frame_equal(load_flights(*flights_csv, chunksize=1000),
+                                  load_flights(*flights_csv, chunksize=1_000_000))
+
+
+def test_chunks_are_filtered_before_they_are_kept(flights_csv):
+    for chunk in iter_flights(*flights_csv, states=['PA', 'NY'], chunksize=5000):
+        assert (chunk['OriginState'].isin(['PA', 'NY']) | chunk['DestState'].isin(['PA', 'NY'])).all()
+        assert not chunk['Cancelled'].any() and not chunk['Diverted'].any()
+        assert not chunk.isna().any().any()
+        assert isinstance(chunk['Airline'].dtype, pd.CategoricalDtype)
+
+
+def test_filter_flights_keeps_every_state_by_default():
+    df = pd.DataFrame({'OriginState': ['PA', 'NY'], 'DestState': ['NY', 'CA'],
+                       'Cancelled': [False, True], 'Diverted': [False, False]})
+    assert len(filter_flights(df)) == 1
+    assert len(filter_flights(df, drop_cancelled=False)) == 2
+    assert len(filter_flights(df, states=['CA'], drop_cancelled=False)) == 1
+
+
+def test_concat_chunks_unions_the_categories():
+    first = pd.DataFrame({'Origin': pd.Categorical(['PIT', 'PHL']), 'Delay': [1.0, 2.0]})
+    second = pd.DataFrame({'Origin': pd.Categorical(['ABE', 'PIT']), 'Delay': [3.0, 4.0]})
+    df = concat_chunks([first, second])
+
+    assert list(df['Origin'].cat.categories) == ['ABE', 'PHL', 'PIT']
+    assert list(df['Origin']) == ['PIT', 'PHL', 'ABE', 'PIT']
+    assert list(df['Delay']) == [1.0, 2.0, 3.0, 4.0]
+    # The chunks themselves keep their own categories
+    assert list(first['Origin'].cat.categories) == ['PHL', 'PIT']
+    assert concat_chunks([]).empty
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from flight_forecast.encoding import CategoricalEncoder
+from flight_forecast.features import FEATURES
+from flight_forecast.linear import StreamingLinearRegression, fit_on_chunks
+
+
+def test_chunked_fit_matches_linear_regression():
+    rng = np.random.default_rng(0)
+    X = rng.normal(1000, 50, (5000, 6)) * rng.uniform(0.1, 10, 6)
+    y = X @ rng.normal(size=6) + rng.normal(0, 3, 5000)
+
+    model = StreamingLinearRegression().fit(X, y, chunksize=777)
+    scaler = StandardScaler().fit(X)
+    reference = LinearRegression().fit(scaler.transform(X), y)
+
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-8)
+    np.testing.assert_allclose(model.intercept_, reference.intercept_, rtol=1e-8)
+    np.testing.assert_allclose(model.predict(X[:100]), reference.predict(scaler.transform(X[:100])), rtol=1e-8)
+
+
+def test_fit_on_chunks_skips_missing_rows(flights):
+    encoder = CategoricalEncoder().fit(flights)
+    chunks = (flights.iloc[start:start + 100] for start in range(0, len(flights), 100))
+    model = fit_on_chunks(chunks, encoder=encoder)
+
+    complete = encoder.transform(flights)[FEATURES + ['ArrDelay']].dropna()
+    reference = StreamingLinearRegression().fit(complete[FEATURES].to_numpy(), complete['ArrDelay'].to_numpy())
+    assert model.n_samples_seen_ == len(complete)
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-8)
+
+
+def test_fit_on_chunks_transforms_the_features(flights):
+    encoder = CategoricalEncoder().fit(flights)
+    complete = encoder.transform(flights)[FEATURES + ['ArrDelay']].dropna()
+    scaler = StandardScaler().fit(complete[FEATURES])
+    chunks = (flights.iloc[start:start + 100] for start in range(0, len(flights), 100))
+    model = fit_on_chunks(chunks, encoder=encoder, transform=scaler.transform)
+
+    reference = StreamingLinearRegression().fit(scaler.transform(complete[FEATURES]), complete['ArrDelay'].to_numpy())
+    np.testing.assert_allclose(model.predict(scaler.transform(complete[FEATURES])),
+                               reference.predict(scaler.transform(complete[FEATURES])), rtol=1e-8)
+
+
+def test_empty_input_is_an_error():
+    with pytest.raises(ValueError):
+        StreamingLinearRegression().fit(np.empty((0, 3)), np.empty(0))
+    with pytest.raises(ValueError):
+        StreamingLinearRegression().predict(np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        fit_on_chunks(iter([])).coef_
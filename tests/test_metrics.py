@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from flight_forecast.metrics import MetricsAccumulator, custom_accuracy, evaluate
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    y = rng.normal(5000, 40, 20_000)  # a large mean, to catch cancellation in R²
+    return y, {'good': y + rng.normal(0, 3, len(y)), 'bad': y + rng.normal(5, 30, len(y))}
+
+
+def test_matches_sklearn(predictions):
+    y, models = predictions
+    results = evaluate(y, models, thresholds=(5, 15), chunksize=3000)
+    assert list(results.index) == ['good', 'bad']
+    for name, y_pred in models.items():
+        row = results.loc[name]
+        assert row['mse'] == pytest.approx(mean_squared_error(y, y_pred), rel=1e-10)
+        assert row['rmse'] == pytest.approx(np.sqrt(mean_squared_error(y, y_pred)), rel=1e-10)
+        assert row['mae'] == pytest.approx(mean_absolute_error(y, y_pred), rel=1e-10)
+        assert row['r2'] == pytest.approx(r2_score(y, y_pred), rel=1e-8)
+        assert row['accuracy@5'] == custom_accuracy(y, y_pred)
+        assert row['accuracy@15'] == custom_accuracy(y, y_pred, threshold=15)
+
+
+def test_confidence_intervals(predictions):
+    y, models = predictions
+    results, intervals = evaluate(y, models, chunksize=7000, n_bootstrap=100, random_state=1)
+    for name in models:
+        for metric in ['rmse', 'r2', 'accuracy@5']:
+            lower, upper = intervals.loc[name, (metric, 'lower')], intervals.loc[name, (metric, 'upper')]
+            assert lower < results.loc[name, metric] < upper
+    assert intervals.loc['good', ('rmse', 'upper')] < intervals.loc['bad', ('rmse', 'lower')]
+
+    # Reproducible for a seed, whatever the number of threads
+    again = MetricsAccumulator(n_bootstrap=100, random_state=1, n_jobs=1)
+    for start in range(0, len(y), 7000):
+        again.update(y[start:start + 7000], {name: p[start:start + 7000] for name, p in models.items()})
+    np.testing.assert_allclose(again.confidence_intervals().to_numpy(), intervals.to_numpy())
+
+
+def test_errors():
+    accumulator = MetricsAccumulator()
+    with pytest.raises(ValueError):
+        accumulator.update(np.zeros(3), {'model': np.zeros(2)})
+    with pytest.raises(ValueError):
+        accumulator.confidence_intervals()
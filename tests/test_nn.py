@@ -0,0 +1,108 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from flight_forecast.nn import (BatchIterator, EarlyStopping, Evaluator, NeuralNet, holdout, scaled_lr,
+                               train_epoch, warmup)
+
+
+def _data(n=1000, n_features=4):
+    generator = torch.Generator().manual_seed(0)
+    X = torch.randn(n, n_features, generator=generator)
+    y = (X @ torch.randn(n_features, 1, generator=generator)) * 10
+    return X, y
+
+
+def test_each_epoch_is_a_seeded_permutation():
+    X, y = _data()
+    batches = BatchIterator(X, y, batch_size=300, generator=torch.Generator().manual_seed(1))
+    assert len(batches) == 4
+
+    epochs = []
+    for _ in range(2):
+        parts = [(inputs.clone(), labels.clone()) for inputs, labels in batches.epoch()]
+        assert [len(inputs) for inputs, _ in parts] == [300, 300, 300, 100]
+        inputs = torch.cat([inputs for inputs, _ in parts])
+        labels = torch.cat([labels for _, labels in parts])
+        # Rows stay paired with their labels, and every row comes once
+        order = torch.argsort(inputs[:, 0])
+        assert torch.equal(inputs[order], X[torch.argsort(X[:, 0])])
+        assert torch.equal(labels[order], y[torch.argsort(X[:, 0])])
+        epochs.append(inputs)
+    assert not torch.equal(epochs[0], epochs[1])
+
+    again = BatchIterator(X, y, batch_size=300, generator=torch.Generator().manual_seed(1))
+    assert torch.equal(torch.cat([inputs for inputs, _ in again.epoch()]), epochs[0])
+
+
+def test_train_epoch_reduces_the_loss():
+    X, y = _data()
+    torch.manual_seed(0)
+    model = NeuralNet(X.shape[1])
+    optimizer = torch.optim.Adam(model.parameters(), lr=scaled_lr(0.01, 100, rule=None))
+    batches = BatchIterator(X, y, batch_size=100)
+    first, _ = train_epoch(model, optimizer, torch.nn.MSELoss(), batches)
+    for _ in range(20):
+        loss, accuracy = train_epoch(model, optimizer, torch.nn.MSELoss(), batches)
+    assert loss < first / 10 and 0 <= accuracy <= 1
+
+
+def test_scaled_lr():
+    assert scaled_lr(0.01, 80) == 0.01
+    assert scaled_lr(0.01, 80, rule='sqrt') == pytest.approx(0.02)
+    assert scaled_lr(0.01, 80, rule='linear') == pytest.approx(0.04)
+    assert scaled_lr(0.01, 80, rule=None) == 0.01
+    with pytest.raises(ValueError):
+        scaled_lr(0.01, 80, rule='cubic')
+
+
+def test_warmup_ramps_up_to_the_learning_rate():
+    X, y = _data()
+    model = NeuralNet(X.shape[1])
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.04)
+    scheduler = warmup(optimizer, 4)
+    batches = BatchIterator(X, y, batch_size=len(X) // 2)
+    rates = []
+    for _ in range(3):
+        rates.append(optimizer.param_groups[0]['lr'])
+        train_epoch(model, optimizer, torch.nn.MSELoss(), batches, scheduler=scheduler)
+    assert rates == pytest.approx([0.01, 0.03, 0.04])
+
+
+def test_holdout_splits_off_distinct_rows():
+    X, y = _data()
+    X_fit, y_fit, X_val, y_val = holdout(X, y, size=200)
+    assert len(X_val) == 200 and len(X_fit) == 800
+    rows = torch.cat([X_fit, X_val])
+    assert torch.equal(rows[torch.argsort(rows[:, 0])], X[torch.argsort(X[:, 0])])
+    assert len(holdout(X, y, size=10_000)[2]) == 500
+
+
+def test_evaluator_matches_a_full_pass():
+    X, y = _data()
+    model = NeuralNet(X.shape[1])
+    evaluator = Evaluator(X, y, torch.nn.MSELoss(), every=3, batch_size=128)
+    loss, accuracy = evaluator.evaluate(model)
+    with torch.no_grad():
+        outputs = model(X)
+    assert loss == pytest.approx(torch.nn.MSELoss()(outputs, y).item(), rel=1e-5)
+    assert accuracy == pytest.approx((torch.abs(outputs - y) <= 5).float().mean().item())
+    assert [epoch for epoch in range(9) if evaluator.due(epoch)] == [2, 5, 8]
+
+
+def test_early_stopping_keeps_the_best_weights():
+    model = NeuralNet(4)
+    stopping = EarlyStopping(patience=2, min_delta=0.1)
+    assert not stopping.step(5.0, model, epoch=0)
+    best = {key: value.clone() for key, value in model.state_dict().items()}
+
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.add_(1.0)
+    assert not stopping.step(4.95, model, epoch=1)  # not better by min_delta
+    assert stopping.step(6.0, model, epoch=2)
+    assert stopping.best_epoch == 0 and stopping.best_loss == 5.0
+
+    stopping.restore(model)
+    for key, value in model.state_dict().items():
+        assert torch.equal(value, best[key])
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from flight_forecast.outliers import OutlierFilter
+
+
+def _notebook_outliers(df):
+    # The per-column loop the notebook used to run
+    outliers = set()
+    for col in df.select_dtypes(include='number').columns:
+        Q1 = df[col].quantile(0.01)
+        Q3 = df[col].quantile(0.99)
+        IQR = Q3 - Q1
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        outliers.update(df[(df[col] < lower_bound) | (df[col] > upper_bound)].index)
+    return df.drop(index=[idx for idx in outliers if idx in df.index])
+
+
+def _with_outliers(flights):
+    df = flights.copy()
+    df.loc[[3, 50, 400], 'ArrDelay'] = [7000, -5000, 9000]
+    df.loc[[10, 50], 'TaxiOut'] = 3000
+    return df
+
+
+def test_matches_the_notebook_loop(flights):
+    df = _with_outliers(flights)
+    pd.testing.assert_frame_equal(OutlierFilter(lower=0.01, upper=0.99, k=1.5).fit_transform(df),
+                                  _notebook_outliers(df))
+    assert not OutlierFilter().fit_transform(df).index.isin([3, 10, 50, 400]).any()
+
+
+def test_partial_fit_approximates_fit():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'a': rng.standard_t(3, 50_000), 'b': rng.exponential(10, 50_000)})
+    exact = OutlierFilter().fit(df)
+
+    streamed = OutlierFilter(sample_size=20_000, random_state=0)
+    for start in range(0, len(df), 4000):
+        streamed.partial_fit(df.iloc[start:start + 4000])
+    assert streamed.columns_ == ['a', 'b']
+    np.testing.assert_allclose(streamed.lower_bounds_, exact.lower_bounds_, rtol=0.1, atol=0.5)
+    np.testing.assert_allclose(streamed.upper_bounds_, exact.upper_bounds_, rtol=0.1)
+
+    # A sample holding every row gives the exact fences
+    whole = OutlierFilter(sample_size=len(df))
+    for start in range(0, len(df), 4000):
+        whole.partial_fit(df.iloc[start:start + 4000])
+    np.testing.assert_allclose(whole.lower_bounds_, exact.lower_bounds_)
+    np.testing.assert_array_equal(whole.mask(df), exact.mask(df))
+
+
+def test_bounds_follow_later_chunks():
+    outlier_filter = OutlierFilter(columns=['a']).partial_fit(pd.DataFrame({'a': np.arange(100.0)}))
+    before = outlier_filter.upper_bounds_
+    outlier_filter.partial_fit(pd.DataFrame({'a': np.arange(100.0, 1000.0)}))
+    assert outlier_filter.upper_bounds_ > before
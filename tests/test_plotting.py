@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_forecast import plotting
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'DepDelay': rng.normal(10, 30, 50_000), 'TaxiOut': rng.gamma(4, 4, 50_000)})
+    df['ArrDelay'] = df['DepDelay'] + rng.normal(0, 5, 50_000)
+    df.loc[::100, 'TaxiOut'] = np.nan
+    return df
+
+
+def test_aggregates_match_numpy(df):
+    counts, edges = plotting.histogram(df['TaxiOut'], bins=30)
+    expected_counts, expected_edges = np.histogram(df['TaxiOut'].dropna(), bins=30)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_array_equal(edges, expected_edges)
+
+    counts, _, _ = plotting.density(df['DepDelay'], df['TaxiOut'], bins=50)
+    assert counts.shape == (50, 50) and counts.sum() == df[['DepDelay', 'TaxiOut']].notna().all(axis=1).sum()
+
+
+def test_boxplot_stats_match_matplotlib(df):
+    from matplotlib.cbook import boxplot_stats
+
+    expected = boxplot_stats(df['DepDelay'].to_numpy())[0]
+    stats = plotting.boxplot_stats(df['DepDelay'], max_fliers=10_000)
+    for key in ['med', 'q1', 'q3', 'whislo', 'whishi']:
+        assert stats[key] == pytest.approx(expected[key])
+    np.testing.assert_array_equal(np.sort(stats['fliers']), np.sort(expected['fliers']))
+
+    few = plotting.boxplot_stats(df['DepDelay'], max_fliers=20)
+    assert len(few['fliers']) == 20
+    assert few['fliers'].min() == expected['fliers'].min() and few['fliers'].max() == expected['fliers'].max()
+
+
+def test_rendered_size_does_not_grow_with_rows(df):
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig = plotting.plot_histograms(df, bins=20)
+    assert len(fig.axes) == 3
+    fig, ax = plt.subplots()
+    mesh = plotting.plot_density(ax, df['DepDelay'], df['ArrDelay'], bins=40)
+    assert mesh.get_array().size == 40 * 40
+    plt.close('all')
+
+    small = plotting.density_matrix(df.head(1000), ['DepDelay', 'TaxiOut', 'ArrDelay'], bins=20)
+    large = plotting.density_matrix(df, ['DepDelay', 'TaxiOut', 'ArrDelay'], bins=20)
+    assert len(large.data) == 9
+    assert abs(len(large.to_json()) - len(small.to_json())) < len(small.to_json()) / 2
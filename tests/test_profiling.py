@@ -0,0 +1,78 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_forecast.profiling import Profiler, diff, rss, size_of
+
+
+def test_records_time_rows_and_nesting():
+    profiler = Profiler(interval=0.001)
+    df = pd.DataFrame({'a': np.arange(1000)})
+    with profiler.stage('outer', inputs=df, model='lr') as outer:
+        with profiler.stage('inner', inputs=[df, df['a']]) as inner:
+            time.sleep(0.02)
+            inner.output(df.head(10))
+        outer.output(np.zeros((5, 3)))
+
+    inner, outer = profiler.records()
+    assert (inner['name'], inner['parent'], outer['parent']) == ('inner', 'outer', None)
+    assert inner['wall_s'] >= 0.02 and outer['wall_s'] >= inner['wall_s']
+    assert (inner['rows_in'], inner['rows_out'], outer['rows_out']) == (1000, 10, 5)
+    assert outer['bytes_out'] == 5 * 3 * 8 and outer['model'] == 'lr'
+    assert list(profiler.summary()['name']) == ['inner', 'outer']
+
+
+@pytest.mark.skipif(rss() is None, reason='no RSS reader on this platform')
+def test_peak_memory_is_seen():
+    profiler = Profiler(interval=0.001)
+    with profiler.stage('allocate'):
+        block = np.ones(50 * 2 ** 20 // 8)
+        time.sleep(0.02)
+        del block
+    (record,) = profiler.records()
+    assert record['peak_rss_delta'] > 40 * 2 ** 20
+    assert record['rss_end'] < record['peak_rss']
+
+
+def test_size_of():
+    assert size_of(None) == (None, None)
+    assert size_of(np.zeros((4, 2))) == (4, 64)
+    # X and y of one dataset share rows, different datasets add up
+    assert size_of([np.zeros((4, 2)), np.zeros(4)]) == (4, 96)
+    assert size_of({'train': np.zeros(4), 'test': np.zeros(2)}) == (6, 48)
+    assert size_of('text') == (None, None)
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+    with profiler.stage('skipped') as stage:
+        stage.output(np.zeros(3))
+    assert profiler.records() == []
+
+
+def test_save_diff_and_trace(tmp_path):
+    before = Profiler()
+    for name, seconds in [('load', 0.01), ('train', 0.02), ('train', 0.02)]:
+        with before.stage(name):
+            time.sleep(seconds)
+    before.save(tmp_path / 'before.json', config={'rows': 10})
+    with open(tmp_path / 'before.json') as f:
+        assert json.load(f)['config'] == {'rows': 10}
+
+    after = Profiler()
+    for name, seconds in [('train', 0.08), ('predict', 0.01)]:
+        with after.stage(name):
+            time.sleep(seconds)
+    table = diff(str(tmp_path / 'before.json'), after)
+    assert list(table.index) == ['train', 'predict', 'load']
+    assert table.loc['train', 'runs_before'] == 2
+    assert table.loc['train', 'wall_s_ratio'] == pytest.approx(2, rel=0.5)
+    assert np.isnan(table.loc['load', 'wall_s_after'])
+
+    after.chrome_trace(tmp_path / 'trace.json')
+    with open(tmp_path / 'trace.json') as f:
+        events = json.load(f)['traceEvents']
+    assert [event['name'] for event in events if event['ph'] == 'X'] == ['train', 'predict']
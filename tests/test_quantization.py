@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from flight_forecast import quantization
+from flight_forecast.nn import NeuralNet
+
+
+@pytest.fixture
+def model_and_data():
+    torch.manual_seed(0)
+    model = NeuralNet(6).eval()
+    X = np.random.default_rng(0).normal(size=(2000, 6)).astype(np.float32)
+    return model, X
+
+
+@pytest.mark.parametrize('dtype', ['int8', 'bfloat16'])
+def test_export_load_round_trip(model_and_data, tmp_path, dtype):
+    model, X = model_and_data
+    quantized = quantization.export(model, tmp_path / 'model.pt', dtype=dtype)
+    loaded = quantization.load(tmp_path / 'model.pt')
+
+    np.testing.assert_array_equal(quantization.predict(loaded, X), quantization.predict(quantized, X))
+    expected = quantization.predict(model, X).numpy()
+    predictions = quantization.predict(loaded, X).numpy()
+    assert predictions.dtype == np.float32 and predictions.shape == (2000, 1)
+    assert np.abs(predictions - expected).max() < 0.05 * np.abs(expected).max()
+    # The float model is left as it was
+    assert next(model.parameters()).dtype == torch.float32
+
+
+def test_compare_reports_every_model(model_and_data):
+    model, X = model_and_data
+    y = quantization.predict(model, X).numpy().ravel() + 1
+    report = quantization.compare(model, {dtype: quantization.quantize(model, dtype) for dtype in quantization.DTYPES},
+                                  X, y, repeats=1)
+    assert list(report.index) == ['float32', 'int8', 'bfloat16']
+    assert report.loc['float32', 'rmse_vs_float32'] == 0
+    assert report.loc['float32', 'rmse'] == pytest.approx(1)
+    assert report.loc['int8', 'size_kb'] < report.loc['float32', 'size_kb']
+
+
+def test_unknown_dtype():
+    with pytest.raises(ValueError):
+        quantization.quantize(NeuralNet(3), 'int4')
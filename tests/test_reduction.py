@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+
+from flight_forecast.reduction import Reducer
+
+
+@pytest.fixture
+def X():
+    rng = np.random.default_rng(0)
+    latent = rng.normal(size=(3000, 3)) * [5, 3, 1]
+    return latent @ rng.normal(size=(3, 8)) + rng.normal(0, 0.1, (3000, 8))
+
+
+def _same_up_to_sign(a, b):
+    signs = np.sign(np.sum(a * b, axis=0))
+    np.testing.assert_allclose(a * signs, b, rtol=1e-6, atol=1e-6)
+
+
+def test_picks_components_like_the_notebook(X):
+    # The notebook: full PCA, read n off the cumulative variance, fit PCA(n) again
+    cumulative = np.cumsum(PCA().fit(X).explained_variance_ratio_)
+    n = int(np.argmax(cumulative >= 0.95)) + 1
+
+    reducer = Reducer(variance=0.95).fit(X)
+    assert reducer.n_components_ == n
+    np.testing.assert_allclose(reducer.cumulative_variance_, cumulative)
+    _same_up_to_sign(reducer.transform(X), PCA(n_components=n).fit_transform(X))
+    assert reducer.transform(X.astype(np.float32)).dtype == np.float32
+
+
+def test_fixed_and_randomized_components(X):
+    expected = PCA(n_components=2).fit_transform(X)
+    _same_up_to_sign(Reducer(n_components=2).fit_transform(X), expected)
+    _same_up_to_sign(Reducer(n_components=2, svd_solver='randomized').fit_transform(X), expected)
+    assert Reducer(n_components=20).fit(X).n_components_ == 8
+
+
+def test_partial_fit_matches_pca(X):
+    reducer = Reducer(variance=0.95)
+    for start in range(0, len(X), 500):
+        reducer.partial_fit(X[start:start + 500])
+    expected = Reducer(variance=0.95).fit(X)
+    assert reducer.n_components_ == expected.n_components_
+    _same_up_to_sign(reducer.transform(X), expected.transform(X))
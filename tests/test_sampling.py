@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from flight_forecast.sampling import Reservoir, sample_flights
+
+
+def _frame(n=5000):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({'row': np.arange(n),
+                         'Month': rng.choice([1, 2, 3, 4], n, p=[0.1, 0.2, 0.3, 0.4]),
+                         'Airline': pd.Categorical(rng.choice(['AA', 'DL', 'UA'], n))})
+
+
+def _chunks(df, sizes):
+    start = 0
+    for size in sizes:
+        yield df.iloc[start:start + size]
+        start += size
+    if start < len(df):
+        yield df.iloc[start:]
+
+
+def test_keeps_the_rows_with_the_smallest_seeded_keys():
+    df = _frame()
+    sample = Reservoir(300, random_state=5).update_all(_chunks(df, [700] * 7)).sample()
+    keys = np.random.default_rng(5).random(len(df))
+    np.testing.assert_array_equal(sample['row'], np.argsort(keys)[:300])
+    assert isinstance(sample['Airline'].dtype, pd.CategoricalDtype)
+    assert sample.index.equals(pd.RangeIndex(300))
+
+
+def test_same_seed_same_sample_whatever_the_chunks():
+    df = _frame()
+    first = Reservoir(500, random_state=1).update_all(_chunks(df, [100] * 50)).sample()
+    second = Reservoir(500, random_state=1).update_all(_chunks(df, [2500, 1, 1499])).sample()
+    pd.testing.assert_frame_equal(first, second)
+    other = Reservoir(500, random_state=2).update_all(_chunks(df, [2500])).sample()
+    assert not first['row'].equals(other['row'])
+
+
+def test_small_streams_are_kept_whole():
+    df = _frame(50)
+    sample = Reservoir(100).update_all(_chunks(df, [20, 20])).sample()
+    assert sorted(sample['row']) == list(range(50))
+    assert Reservoir(10).sample().empty
+
+
+@pytest.mark.parametrize('stratify', ['Month', 'Airline'])
+def test_stratified_sample_keeps_the_proportions(stratify):
+    df = _frame()
+    reservoir = Reservoir(400, stratify=stratify, random_state=0)
+    sample = reservoir.update_all(_chunks(df, [300] * 20)).sample()
+
+    assert len(sample) == 400
+    expected = df[stratify].value_counts() * 400 / len(df)
+    counts = sample[stratify].value_counts().reindex(expected.index)
+    assert (np.abs(counts - expected) < 1).all()
+
+    # Within a stratum, the rows with the smallest keys
+    keys = pd.Series(np.random.default_rng(0).random(len(df)))
+    for value, rows in sample.groupby(stratify, observed=True)['row']:
+        in_stratum = keys[(df[stratify] == value).to_numpy()]
+        assert set(rows) == set(in_stratum.nsmallest(len(rows)).index)
+
+
+def test_arrow_chunks_give_the_same_sample():
+    df = _frame().astype({'Airline': str})
+    tables = (pa.Table.from_pandas(chunk, preserve_index=False) for chunk in _chunks(df, [900] * 6))
+    table = Reservoir(250, stratify='Month', random_state=4).update_all(tables).sample()
+    expected = Reservoir(250, stratify='Month', random_state=4).update_all(_chunks(df, [900] * 6)).sample()
+    pd.testing.assert_frame_equal(table.to_pandas(), expected)
+
+
+def _best_time(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_sample_flights_is_not_slower_than_read_csv_and_sample(flights_csv):
+    flights_path, airlines_path = flights_csv
+
+    def baseline():
+        df = pd.read_csv(flights_path)
+        df_airlines = pd.read_csv(airlines_path).rename(columns={'Description': 'Airline'})
+        return pd.merge(df, df_airlines, on='Airline').dropna().sample(15_000, random_state=1)
+
+    sample = sample_flights(flights_path, airlines_path, size=15_000, drop_cancelled=False, drop_diverted=False)
+    assert len(sample) == min(15_000, len(baseline()))
+    # A little slack for timing noise on a busy machine
+    assert _best_time(lambda: sample_flights(flights_path, airlines_path, size=15_000, drop_cancelled=False,
+                                             drop_diverted=False)) <= 1.25 * _best_time(baseline)
@@ -0,0 +1,43 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import GridSearchCV
+
+from flight_forecast.search import HalvingForestSearch
+
+PARAM_GRID = {'n_estimators': [5, 10, 20], 'max_depth': [3, None]}
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = 3 * X[:, 0] - X[:, 1] ** 2 + rng.normal(0, 0.5, 300)
+    return X, y
+
+
+def test_single_round_matches_grid_search():
+    X, y = _data()
+    estimator = RandomForestRegressor(random_state=42)
+    # 6 candidates and factor 6: one round on every row, i.e. a grid search
+    search = HalvingForestSearch(estimator, PARAM_GRID, cv=3, factor=6, n_jobs=1, random_state=0).fit(X, y)
+    assert search.n_iterations_ == 1
+
+    # The search shuffles the rows once and splits them with KFold, like GridSearchCV(cv=3) on shuffled rows
+    order = np.random.default_rng(0).permutation(len(X))
+    grid = GridSearchCV(estimator, PARAM_GRID, cv=3).fit(X[order], y[order])
+
+    scores = {tuple(sorted(p.items())): s for p, s in zip(search.cv_results_['params'],
+                                                          search.cv_results_['mean_test_score'])}
+    for params, score in zip(grid.cv_results_['params'], grid.cv_results_['mean_test_score']):
+        np.testing.assert_allclose(scores[tuple(sorted(params.items()))], score, rtol=1e-12)
+    assert search.best_params_ == grid.best_params_
+
+
+def test_each_round_keeps_the_best_half():
+    X, y = _data()
+    search = HalvingForestSearch(RandomForestRegressor(random_state=42), PARAM_GRID, cv=3, factor=2,
+                                 n_jobs=1).fit(X, y)
+    iterations = search.cv_results_['iter']
+    assert search.n_iterations_ == 3
+    assert [np.sum(iterations == i) for i in range(3)] == [6, 3, 2]
+    assert search.cv_results_['n_resources'][-1] == len(X)
+    np.testing.assert_array_equal(search.predict(X[:5]), search.best_estimator_.predict(X[:5]))
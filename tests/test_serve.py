@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from flight_forecast.encoding import CategoricalEncoder
+from flight_forecast.features import FeaturePipeline
+from flight_forecast.serve import MicroBatcher, Predictor, handle_connection
+
+
+@pytest.fixture
+def saved(flights, tmp_path):
+    encoder = CategoricalEncoder().fit(flights)
+    encoder.save(tmp_path / 'vocabularies.json')
+    pipeline = FeaturePipeline(n_components=3).fit(encoder.transform(flights))
+    pipeline.save(tmp_path / 'pipeline')
+    return encoder, pipeline, tmp_path
+
+
+def _records(flights, n):
+    return json.loads(flights.head(n).to_json(orient='records'))
+
+
+def test_predictor_matches_the_model(flights, saved):
+    from joblib import dump
+
+    encoder, pipeline, directory = saved
+    model = LinearRegression().fit(pipeline.X_train_scaled, pipeline.y_train)
+    dump(model, directory / 'lr.joblib')
+    predictor = Predictor.load('lr', str(directory / 'lr.joblib'), str(directory / 'vocabularies.json'),
+                               str(directory / 'pipeline'))
+
+    expected = model.predict(pipeline.scale(encoder.transform(flights.head(20))))
+    np.testing.assert_allclose(predictor.predict(_records(flights, 20)), expected, rtol=1e-5)
+    with pytest.raises(ValueError):
+        Predictor(encoder, pipeline, model, 'svm')
+
+
+def test_quantized_network_is_read_once(flights, saved, monkeypatch):
+    torch = pytest.importorskip('torch')
+    from flight_forecast import quantization
+    from flight_forecast.nn import NeuralNet
+
+    encoder, pipeline, directory = saved
+    network = NeuralNet(pipeline.reducer_.n_components_)
+    quantized = quantization.export(network, directory / 'nn.pt', dtype='bfloat16')
+
+    reads = []
+    load = torch.load
+    monkeypatch.setattr(torch, 'load', lambda *args, **kwargs: reads.append(args) or load(*args, **kwargs))
+    predictor = Predictor.load('nn', str(directory / 'nn.pt'), str(directory / 'vocabularies.json'),
+                               str(directory / 'pipeline'))
+    assert len(reads) == 1
+    np.testing.assert_allclose(predictor.predict(_records(flights, 5)),
+                               quantization.predict(quantized, pipeline.transform(encoder.transform(flights.head(5)))).numpy().ravel())
+
+
+def _run(predict, requests, max_batch_size=256, max_wait_ms=5):
+    """Send raw HTTP requests over one connection each; returns (status, JSON body) per request."""
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size, max_wait_ms)
+        batcher.start()
+        server = await asyncio.start_server(lambda r, w: handle_connection(r, w, batcher), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def send(raw):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(raw)
+            await writer.drain()
+            status = (await reader.readline()).decode().split(' ', 1)[1].strip()
+            headers = {}
+            while (line := await reader.readline()) != b'\r\n':
+                name, _, value = line.decode().partition(':')
+                headers[name.lower()] = value.strip()
+            body = json.loads(await reader.readexactly(int(headers['content-length'])))
+            writer.close()
+            return status, body
+
+        try:
+            return await asyncio.gather(*[send(raw) for raw in requests])
+        finally:
+            server.close()
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def _post(body, path='/predict'):
+    payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return (f'POST {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n').encode() + payload
+
+
+def _double(records):
+    return [2 * record['x'] for record in records]
+
+
+def test_record_shapes():
+    responses = _run(_double, [_post({'x': 1}), _post([{'x': 2}, {'x': 3}]), _post({'records': [{'x': 4}]}),
+                               _post([]), _post([1, 2]), _post({'records': 5}), _post(b'{not json')])
+    assert responses[:4] == [('200 OK', {'predictions': [2]}), ('200 OK', {'predictions': [4, 6]}),
+                             ('200 OK', {'predictions': [8]}), ('200 OK', {'predictions': []})]
+    assert [status for status, _ in responses[4:]] == ['400 Bad Request'] * 3
+
+
+def test_malformed_requests_get_400():
+    responses = _run(_double, [b'GARBAGE\r\n\r\n',
+                               b'POST /predict HTTP/1.1\r\nContent-Length: ten\r\n\r\n',
+                               b'POST /predict HTTP/1.1\r\nContent-Length: -5\r\n\r\n',
+                               b'GET /missing HTTP/1.1\r\nConnection: close\r\n\r\n',
+                               b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'])
+    assert [status for status, _ in responses] == ['400 Bad Request'] * 3 + ['404 Not Found', '200 OK']
+    assert 'Content-Length' in responses[1][1]['error']
+
+
+def test_concurrent_requests_are_batched_and_split_back():
+    batches = []
+
+    def predict(records):
+        batches.append(len(records))
+        return _double(records)
+
+    requests = [_post([{'x': i}, {'x': i + 0.5}]) for i in range(20)]
+    responses = _run(predict, requests, max_batch_size=16, max_wait_ms=50)
+    assert [body['predictions'] for _, body in responses] == [[2 * i, 2 * i + 1] for i in range(20)]
+    assert sum(batches) == 40 and max(batches) >= 16 and len(batches) < 20
+
+
+def test_prediction_errors_are_500():
+    def fail(records):
+        raise RuntimeError('model exploded')
+
+    ((status, body),) = _run(fail, [_post({'x': 1})])
+    assert status == '500 Internal Server Error' and body == {'error': 'model exploded'}
@@ -0,0 +1,48 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight_forecast.ingest import load_flights
+from flight_forecast.slicing import FlightIndex
+
+
+@pytest.fixture(scope='module')
+def merged(flights_csv):
+    df = load_flights(*flights_csv, drop_cancelled=False, drop_diverted=False, dropna=False,
+                      usecols=['Airline', 'OriginState', 'DestState', 'Origin', 'Dest', 'Cancelled', 'Diverted', 'ArrDelay'])
+    df.loc[df.sample(50, random_state=0).index, 'Origin'] = None
+    return df
+
+
+def _sql(df, where):
+    # What pandasql did: copy the frame into SQLite and run the query there
+    with sqlite3.connect(':memory:') as connection:
+        df.assign(position=np.arange(len(df))).to_sql('df', connection, index=False)
+        return pd.read_sql(f'SELECT position FROM df WHERE {where} ORDER BY position', connection)['position'].to_numpy()
+
+
+@pytest.mark.parametrize('conditions, where', [
+    (dict(states=['PA']),
+     "(OriginState = 'PA' OR DestState = 'PA') AND NOT Cancelled AND NOT Diverted"),
+    (dict(states=['PA', 'NY'], drop_diverted=False),
+     "(OriginState IN ('PA', 'NY') OR DestState IN ('PA', 'NY')) AND NOT Cancelled"),
+    (dict(origin_states=['CA'], dests=['NAY', 'NBY'], airlines=['Delta Air Lines Inc.']),
+     "OriginState = 'CA' AND Dest IN ('NAY', 'NBY') AND Airline = 'Delta Air Lines Inc.' "
+     "AND NOT Cancelled AND NOT Diverted"),
+    (dict(airports=['PAA'], drop_cancelled=False, drop_diverted=False),
+     "(Origin = 'PAA' OR Dest = 'PAA')"),
+    (dict(states=['XX']), "0"),
+])
+def test_positions_match_the_sql_query(merged, conditions, where):
+    np.testing.assert_array_equal(FlightIndex(merged).positions(**conditions), _sql(merged, where))
+
+
+def test_slice_is_reindexed(merged):
+    index = FlightIndex(merged)
+    df = index.slice(states=['PA'])
+    expected = merged[(merged['OriginState'].eq('PA') | merged['DestState'].eq('PA'))
+                      & ~merged['Cancelled'] & ~merged['Diverted']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected)
+    assert len(index.slice(drop_cancelled=False, drop_diverted=False)) == len(merged)
@@ -0,0 +1,135 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from flight_forecast.ingest import load_flights
+from flight_forecast.store import convert_to_parquet, load_parquet
+
+
+@pytest.fixture(scope='module')
+def parquet_dir(flights_csv, tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp('parquet'))
+    # Small row groups so that the state pruning has something to skip
+    convert_to_parquet(*flights_csv, out_dir, chunksize=3000, min_rows_per_group=500)
+    return out_dir
+
+
+def _sorted(df):
+    # Category order depends on where a frame came from; sort on the values
+    key = ['FlightDate', 'Tail_Number', 'CRSDepTime', 'Flight_Number_Marketing_Airline']
+    order = df[key].astype(str).sort_values(key).index
+    return df.loc[order].reset_index(drop=True)
+
+
+def _same_rows(df, expected):
+    df, expected = _sorted(df), _sorted(expected)
+    assert list(df.columns) == list(expected.columns)
+    for col in df.columns:
+        if isinstance(expected[col].dtype, pd.CategoricalDtype):
+            assert df[col].astype(str).tolist() == expected[col].astype(str).tolist(), col
+        else:
+            np.testing.assert_array_equal(df[col].to_numpy(np.float64), expected[col].to_numpy(np.float64), err_msg=col)
+
+
+def test_one_file_per_month_sorted_by_state(parquet_dir):
+    import pyarrow.parquet as pq
+
+    months = sorted(os.listdir(parquet_dir))
+    assert months and all(month.startswith('Month=') for month in months)
+    for month in months:
+        (name,) = os.listdir(os.path.join(parquet_dir, month))
+        table = pq.read_table(os.path.join(parquet_dir, month, name))
+        states = table.column('OriginState').to_pylist()
+        assert states == sorted(states)
+
+
+def test_round_trip_matches_the_csv(flights_csv, parquet_dir):
+    expected = load_flights(*flights_csv, drop_cancelled=False, drop_diverted=False, dropna=False)
+    df = load_parquet(parquet_dir)
+    assert len(df) == len(expected)
+    _same_rows(df, expected)
+    assert isinstance(df['OriginState'].dtype, pd.CategoricalDtype)
+
+
+def test_filters_match_the_csv_loader(flights_csv, parquet_dir):
+    expected = load_flights(*flights_csv, states=['PA'])
+    df = load_parquet(parquet_dir, states=['PA'], drop_cancelled=True, drop_diverted=True, dropna=True)
+    _same_rows(df, expected)
+
+    origin = load_parquet(parquet_dir, origin_states=['PA'], months=[1, 2], columns=['Month', 'OriginState'])
+    assert set(origin['OriginState']) == {'PA'} and set(origin['Month']) <= {1, 2}
+    full = load_parquet(parquet_dir, columns=['Month', 'OriginState'])
+    assert len(origin) == ((full['OriginState'] == 'PA') & full['Month'].isin([1, 2])).sum()
+
+
+def test_origin_states_skip_other_row_groups(parquet_dir):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(parquet_dir, format='parquet', partitioning='hive')
+    fragments = [fragment.subset(ds.field('OriginState').isin(['PA']))
+                 for fragment in dataset.get_fragments()]
+    groups = sum(fragment.num_row_groups for fragment in dataset.get_fragments())
+    assert sum(fragment.num_row_groups for fragment in fragments) < groups
+
+
+def test_sampled_load_is_seeded(parquet_dir):
+    first = load_parquet(parquet_dir, dropna=True, sample_size=2000, random_state=7)
+    second = load_parquet(parquet_dir, dropna=True, sample_size=2000, random_state=7)
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 2000 and not first.isna().any().any()
+    assert isinstance(first['Airline'].dtype, pd.CategoricalDtype)
+
+    stratified = load_parquet(parquet_dir, columns=['Month'], sample_size=2000, stratify='Month')
+    shares = load_parquet(parquet_dir, columns=['Month'])['Month'].value_counts(normalize=True)
+    assert (np.abs(stratified['Month'].value_counts() - 2000 * shares) < 1).all()
+
+    empty = load_parquet(parquet_dir, months=[13], sample_size=100)
+    assert empty.empty and list(empty.columns) == list(first.columns)
+
+
+def test_reads_datasets_with_a_directory_per_state(flights_csv, parquet_dir, tmp_path):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(parquet_dir, format='parquet', partitioning='hive').to_table()
+    partitioning = ds.partitioning(pa.schema([pa.field('Month', pa.int8()), pa.field('OriginState', pa.string())]),
+                                   flavor='hive')
+    ds.write_dataset(table, str(tmp_path), format='parquet', partitioning=partitioning)
+
+    df = load_parquet(str(tmp_path), states=['PA'], drop_cancelled=True, drop_diverted=True, dropna=True)
+    _same_rows(df[load_parquet(parquet_dir).columns], load_flights(*flights_csv, states=['PA']))
+
+
+def test_empty_csv_is_an_error(flights_csv, tmp_path):
+    empty = tmp_path / 'empty.csv'
+    with open(flights_csv[0]) as f:
+        empty.write_text(f.readline())
+    with pytest.raises(ValueError):
+        convert_to_parquet(str(empty), flights_csv[1], str(tmp_path / 'out'))
+
+
+def _best_time(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_sampled_load_is_not_slower_than_read_csv_and_sample(flights_csv, tmp_path):
+    flights_path, airlines_path = flights_csv
+    parquet_dir = str(tmp_path)
+    convert_to_parquet(flights_path, airlines_path, parquet_dir)
+
+    def baseline():
+        df = pd.read_csv(flights_path)
+        df_airlines = pd.read_csv(airlines_path).rename(columns={'Description': 'Airline'})
+        return pd.merge(df, df_airlines, on='Airline').dropna().sample(15_000, random_state=1)
+
+    assert _best_time(lambda: load_parquet(parquet_dir, dropna=True, sample_size=15_000)) <= _best_time(baseline)